@@ -0,0 +1,66 @@
+import math
+from flask import request, session, jsonify, render_template
+from config import ADMISSION_CONTROL_ENABLED, ADMISSION_MAX_WAIT_SECONDS
+from utils import log_activity
+from word_scheduler import word_scheduler
+from jobs import job_manager
+
+# Upload endpoints that queue Word work, mapped to their route type
+ADMISSION_ENDPOINTS = {
+    'macros.language': 'language',
+    'macros.technical': 'technical',
+    'macros.macro_processing': 'macro_processing',
+    'ppd.ppd_route': 'ppd',
+}
+
+JSON_ENDPOINTS = {'ppd.ppd_route'}
+
+SHUTDOWN_RETRY_AFTER = 120
+
+
+def check_admission():
+    """
+    Reject Word-backed uploads with 429 when the estimated queue wait is past
+    ADMISSION_MAX_WAIT_SECONDS, and with 503 once shutdown has begun. Runs before CSRF validation so the multipart
+    body is never parsed or written to the upload folder.
+    """
+    if request.method != 'POST':
+        return None
+
+    route_type = ADMISSION_ENDPOINTS.get(request.endpoint)
+    if route_type is None:
+        return None
+
+    if not job_manager.accepting:
+        if request.endpoint in JSON_ENDPOINTS:
+            response = jsonify({'error': "The server is restarting. Please retry in a few minutes."})
+        else:
+            response = render_template('429.html', shutting_down=True, retry_after=SHUTDOWN_RETRY_AFTER)
+        return response, 503, {'Retry-After': str(SHUTDOWN_RETRY_AFTER)}
+
+    if not ADMISSION_CONTROL_ENABLED:
+        return None
+
+    estimated = word_scheduler.estimate_wait_seconds(session.get('role'), route_type)
+    if estimated <= ADMISSION_MAX_WAIT_SECONDS:
+        return None
+
+    retry_after = max(1, math.ceil(estimated - ADMISSION_MAX_WAIT_SECONDS))
+    log_activity(session.get('username', 'unknown'), f"ADMISSION_REJECTED_{route_type.upper()}",
+                 details=f"estimated wait {int(estimated)}s")
+
+    if request.endpoint in JSON_ENDPOINTS:
+        response = jsonify({
+            'error': (f"Word workers are busy (estimated wait {math.ceil(estimated / 60)} min). "
+                      f"Please retry in {math.ceil(retry_after / 60)} min."),
+            'estimated_wait': int(estimated),
+            'retry_after': retry_after,
+        })
+    else:
+        response = render_template('429.html', estimated_wait=int(estimated), retry_after=retry_after)
+    return response, 429, {'Retry-After': str(retry_after)}
+
+
+def init_admission_control(app):
+    # Must be registered before CSRFProtect, whose hook reads the form body
+    app.before_request(check_admission)
@@ -1069,6 +1069,7 @@ def ppd():
                 CitationAnalyzer,
                 extract_with_word,
                 extract_with_docx,
+                remove_tags_keep_formatting_docx,
                 generate_formatting_html,
                 generate_multilingual_html,
                 build_comments_html,
@@ -1094,7 +1095,7 @@ def ppd():
                     else:
                         paras, comments, imgs, foot, end = extract_with_docx(path)
 
-                    CitationAnalyzer().remove_tags_keep_formatting_docx(path)
+                    remove_tags_keep_formatting_docx(path)
                     analyzer = CitationAnalyzer()
                     doc_data = [(t, p, c) for (t, p, c, _) in paras]
                     dtypes = analyzer.analyze_document_citations(doc_data)
@@ -11,6 +11,8 @@ from config import ROUTE_MACROS
 from database import init_db, get_db
 from utils import setup_logging, log_errors, cleanup_expired_tokens, get_ip_address
 from auth_utils import get_user_role
+from admission import init_admission_control
+from jobs import job_manager
 from models import db, User
 
 # Import Blueprints
@@ -21,6 +23,8 @@ from routes.ppd import ppd_bp
 from routes.validation import validation_bp
 from routes.admin import admin_bp
 from routes.doi import doi_bp
+from routes.jobs import jobs_bp
+from routes.workers import workers_bp
 
 def start_background_cleanup():
     def cleanup_worker():
@@ -41,7 +45,8 @@ def create_app():
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
     db.init_app(app)
-    CSRFProtect(app)
+    init_admission_control(app)
+    csrf = CSRFProtect(app)
 
     # Register Blueprints
     app.register_blueprint(auth_bp)
@@ -51,6 +56,9 @@ def create_app():
     app.register_blueprint(validation_bp)
     app.register_blueprint(admin_bp)
     app.register_blueprint(doi_bp)
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(workers_bp)
+    csrf.exempt(workers_bp)
 
     # Before Request Handler
     @app.before_request
@@ -145,6 +153,9 @@ def create_app():
     # Initialize PPD Progress Data
     app.config["PROGRESS_DATA"] = {}
 
+    # Clean up orphaned job folders and resume jobs a restart interrupted
+    job_manager.init_app(app)
+
     app.logger.info("Application initialized with modular routes")
     return app
 
@@ -160,4 +171,7 @@ if __name__ == '__main__':
     print(f"Local: http://localhost:{port}")
     print(f"Network: http://{host_ip}:{port}")
     print("=================================\n")
-    serve(app, host="0.0.0.0", port=port, threads=4)
\ No newline at end of file
+    try:
+        serve(app, host="0.0.0.0", port=port, threads=4)
+    finally:
+        job_manager.shutdown()
\ No newline at end of file
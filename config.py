@@ -13,6 +13,44 @@ ALLOWED_EXTENSIONS = {'.doc', '.docx'}
 WORD_START_RETRIES = 3
 TOKEN_TTL = timedelta(hours=1)
 
+# Content-addressed cache of macro outputs (document hash + macro list + template
+# hash + native rule data hash)
+MACRO_CACHE_ENABLED = True
+MACRO_CACHE_FOLDER = os.path.join(BASE_DIR, "macro_cache")
+MACRO_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# Skip macros that the OOXML preflight shows cannot change the document
+MACRO_PREFLIGHT_ENABLED = True
+
+# Run macros that have a Python/OOXML port (ooxml/native.py) without Word
+NATIVE_MACROS_ENABLED = True
+# Rule data of the native macros; the macro cache key hashes this folder
+# together with the spelling, terminology and keyword files below
+NATIVE_RULES_FOLDER = os.path.join(BASE_DIR, "ooxml", "rules")
+
+# Word lists for the native spell check: a base list plus house and subject
+# lists layered on top of it. The shipped base list can be swapped for any
+# plain word list (optionally .gz) or a fully inflected Hunspell .dic
+SPELLCHECK_DICTIONARY = os.path.join(BASE_DIR, "ooxml", "rules", "spelling", "en_base.txt.gz")
+SPELLCHECK_CUSTOM_LISTS = [
+    os.path.join(BASE_DIR, "ooxml", "rules", "spelling", "publisher.txt"),
+    os.path.join(BASE_DIR, "ooxml", "rules", "spelling", "medical.txt"),
+    os.path.join(BASE_DIR, "ooxml", "rules", "spelling", "units.txt"),
+]
+
+# Preferred-term banks for the native terminology check, one JSON file per
+# publisher; a bank's isbn_prefixes select it from the document file name.
+# Compiled matchers are cached in TERMINOLOGY_CACHE_FOLDER.
+TERMINOLOGY_FOLDER = os.path.join(BASE_DIR, "ooxml", "rules", "terminology")
+TERMINOLOGY_DEFAULT_BANK = "default"
+TERMINOLOGY_CACHE_FOLDER = os.path.join(BASE_DIR, "terminology_cache")
+TERMINOLOGY_COMMENTS = True
+
+# Keyword rules of the PPD highlight (keyword + next word), one JSON file per
+# publisher selected by isbn_prefixes like the term banks
+KEYWORD_RULES_FOLDER = os.path.join(BASE_DIR, "ooxml", "rules", "keywords")
+KEYWORD_DEFAULT_RULES = "default"
+
 ROUTE_MACROS = {
     'language': {
         'name': 'Language Editing',
@@ -68,3 +106,50 @@ ROUTE_PERMISSIONS = {
     'macro_processing': ['COPYEDIT', 'PPD', 'PM', 'ADMIN'],
     'ppd': ['PPD', 'PM', 'ADMIN']
 }
+
+# Word worker scheduling: lower class is served first. Roles missing here, or
+# not permitted on the route by ROUTE_PERMISSIONS, fall into the last class.
+# Each worker slot is one Word instance; a batch spreads its documents over
+# up to WORD_BATCH_WORKERS of them.
+WORD_WORKERS = 4
+WORD_BATCH_WORKERS = 4
+# PPD batches analyse up to PPD_WORKERS files at once; their Word steps still
+# wait for scheduler slots, each in its own Word instance, and the rest
+# (citations, dashboards) runs alongside.
+PPD_WORKERS = 4
+WORD_ROLE_PRIORITY = {
+    'ADMIN': 0,
+    'PM': 0,
+    'PPD': 1,
+    'COPYEDIT': 2,
+}
+WORD_PRIORITY_STEP_SECONDS = 120
+WORD_FAIR_SHARE_SECONDS = 60
+WORD_AGING_RATE = 1.0
+
+# Background job journal: on shutdown running jobs get JOB_DRAIN_SECONDS to
+# finish, then stop at the next file and resume after restart. Finished jobs'
+# folders (and s4c_ppd_* folders no job owns) are removed after JOB_RESULT_TTL.
+JOB_DRAIN_SECONDS = 60
+JOB_RESULT_TTL = TOKEN_TTL
+JOB_ORPHAN_PREFIX = "s4c_ppd_"
+
+# Remote Word worker agents (worker_agent.py) pull documents from this hub.
+# The endpoints are disabled while S4C_WORKER_TOKEN is unset. A worker that
+# misses heartbeats for WORKER_DEAD_SECONDS is dropped and its documents go
+# back to the queue; after WORKER_MAX_ATTEMPTS leases a document fails.
+WORKER_AGENT_TOKEN = os.environ.get("S4C_WORKER_TOKEN", "")
+WORKER_LEASE_SECONDS = 300
+WORKER_HEARTBEAT_SECONDS = 15
+WORKER_DEAD_SECONDS = 60
+WORKER_MAX_ATTEMPTS = 3
+WORKER_POLL_SECONDS = 2
+# A document still unleased after this long is taken back from the hub when a
+# local Word worker of its batch is idle
+WORKER_RECLAIM_SECONDS = 10
+
+# Admission control for Word-backed uploads: reject with 429 once the
+# estimated queue wait exceeds ADMISSION_MAX_WAIT_SECONDS.
+ADMISSION_CONTROL_ENABLED = True
+ADMISSION_MAX_WAIT_SECONDS = 15 * 60
+ADMISSION_DEFAULT_DOC_SECONDS = 60
@@ -0,0 +1,645 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Tuple, Dict, Any
+
+# Citation analysis and dashboard HTML shared by the Word-driven analyzer
+# (word_analyzer) and the native dashboard (ooxml/dashboard.py). Nothing
+# here needs Word, so it imports on any worker.
+
+# ---------------------------------------------------------------------
+# 1️⃣ BuildDetailedSummaryTable (Python conversion)
+# ---------------------------------------------------------------------
+def build_detailed_summary_table(
+    dict_types: dict,
+    figure_count: int,
+    table_count: int,
+    footnote_count: int,
+    endnote_count: int,
+    fmt_content: str,
+    spec_content: str,
+    comment_content: str
+) -> str:
+    """Equivalent to VBA BuildDetailedSummaryTable()"""
+
+    def count_items(section_html: str, token: str) -> int:
+        return section_html.lower().count(token.lower())
+
+    def build_progress_row(title: str, cap_cnt: int, cit_cnt: int, miss_cap: int, miss_cit: int) -> str:
+        total = max(cap_cnt, cit_cnt)
+        complete_pct = round(((total - miss_cap - miss_cit) / total * 100), 1) if total else 0
+        html = f"""
+        <tr>
+          <td><strong>{title}</strong></td>
+          <td>{total}</td>
+          <td>
+            <div style='display:flex;align-items:center;gap:10px;'>
+              <div style='width:100px;height:20px;background:#f0f0f0;border-radius:10px;overflow:hidden;'>
+                <div style='width:{complete_pct}%;height:100%;background:linear-gradient(90deg,#27ae60,#2ecc71);'></div>
+              </div>
+              <span style='font-size:12px;color:#27ae60;'>{complete_pct}% Complete</span>
+            </div>
+          </td>
+          <td>
+            <i class='fas fa-check-circle' style='color:#27ae60;'></i> {cit_cnt} citation(s)<br>
+            {'<span style="color:#e74c3c;"><i class="fas fa-times-circle"></i> Missing ' + str(miss_cap) + ' caption(s)</span>' if miss_cap else ''}
+          </td>
+          <td>
+            <i class='fas fa-check-circle' style='color:#27ae60;'></i> {cap_cnt} caption(s)<br>
+            {'<span style="color:#f39c12;"><i class="fas fa-exclamation-triangle"></i> Missing ' + str(miss_cit) + ' citation(s)</span>' if miss_cit else ''}
+          </td>
+          <td>{"Add missing items" if miss_cap or miss_cit else "No action required"}</td>
+        </tr>
+        """
+        return html
+
+    def build_critical_issues_block(miss_cap, miss_cit, fmt_count):
+        html = """
+        <div style='background:#fff3cd;border:1px solid #ffeaa7;border-radius:10px;padding:20px;margin-top:20px;'>
+          <h3 style='color:#856404;margin-bottom:15px;'><i class='fas fa-exclamation-triangle'></i> Critical Issues Requiring Attention</h3>
+          <ul style='margin:0;padding-left:20px;color:#856404;'>
+        """
+        if miss_cit > 0:
+            html += f"<li><strong>{miss_cit} Missing Citations:</strong> Check missing citations in Citations tab</li>"
+        if miss_cap > 0:
+            html += f"<li><strong>{miss_cap} Missing Captions:</strong> Check missing captions in Citations tab</li>"
+        if fmt_count > 0:
+            html += f"<li><strong>{fmt_count} Formatting Issues:</strong> See Formatting tab</li>"
+        html += "</ul></div>"
+        return html
+
+    # --- counts ---
+    fmt_count = count_items(fmt_content, "<tr")
+    spec_count = count_items(spec_content, "<tr")
+    comment_count_val = count_items(comment_content, "<tr")
+
+    # --- per-type stats: Figures and Tables always, the other types when present ---
+    progress_rows = ""
+    total_miss_cap = total_miss_cit = 0
+    for type_key, title in SUMMARY_TYPE_TITLES.items():
+        tdict = dict_types.get(type_key) or {"Caption": {}, "Citation": {}}
+        cap_cnt = len(tdict["Caption"])
+        cit_cnt = len(tdict["Citation"])
+        if type_key not in ("Figure", "Table") and not (cap_cnt or cit_cnt):
+            continue
+        missing_caps, missing_cits = find_missing(tdict)
+        total_miss_cap += len(missing_caps)
+        total_miss_cit += len(missing_cits)
+        progress_rows += build_progress_row(title, cap_cnt, cit_cnt, len(missing_caps), len(missing_cits))
+
+    # --- build HTML summary ---
+    html = """
+    <div class='header'>
+      <div class='section-title'><i class='fas fa-chart-pie'></i> Analysis Summary</div>
+      <table style='margin-bottom:20px;width:100%;border-collapse:collapse;'>
+        <thead>
+          <tr>
+            <th>Element Type</th>
+            <th>Total Found</th>
+            <th>Status Overview</th>
+            <th>Citations Status</th>
+            <th>Captions Status</th>
+            <th>Action Required</th>
+          </tr>
+        </thead><tbody>
+    """
+
+    html += progress_rows
+
+    # add special chars, formatting, comments, notes
+    html += f"""
+    <tr><td><strong>Special Characters</strong></td><td>{spec_count}</td>
+        <td colspan='3'><a href='javascript:void(0);' onclick="showTab('special-chars');"
+        style='color:#667eea;text-decoration:underline;'>Review multilingual symbols</a></td>
+        <td>Review unusual characters</td></tr>
+
+    <tr><td><strong>Formatting Issues</strong></td><td>{fmt_count}</td>
+        <td colspan='3'><a href='javascript:void(0);' onclick="showTab('formatting');"
+        style='color:#f39c12;text-decoration:underline;'>View formatting issues</a></td>
+        <td>Review formatting anomalies</td></tr>
+
+    <tr><td><strong>Comments</strong></td><td>{comment_count_val}</td>
+        <td colspan='3'><a href='javascript:void(0);' onclick="showTab('comments');"
+        style='color:#3498db;text-decoration:underline;'>Review editor comments</a></td>
+        <td>Review highlighted feedback</td></tr>
+
+    <tr><td><strong>Notes</strong></td><td>{footnote_count + endnote_count}</td>
+        <td colspan='3'><a href='javascript:void(0);' onclick="showTab('media');"
+        style='color:#27ae60;text-decoration:underline;'>{footnote_count} Footnotes, {endnote_count} Endnotes</a></td>
+        <td>No action required</td></tr>
+    """
+
+    if figure_count > 0:
+        html += f"""
+        <tr><td><strong>Images</strong></td><td>{figure_count}</td>
+        <td colspan='3'><a href='javascript:void(0);' onclick="showTab('media');"
+        style='color:#27ae60;text-decoration:underline;'><i class='fas fa-check-circle'></i> {figure_count} image(s) detected</a></td>
+        <td>No action required</td></tr>
+        """
+    else:
+        html += """
+        <tr><td><strong>Images</strong></td><td>0</td>
+        <td colspan='3'><span style='color:#e67e22;'><i class='fas fa-exclamation-triangle'></i> No images detected</span></td>
+        <td>Check for missing image elements</td></tr>
+        """
+
+    html += "</tbody></table>"
+    html += build_critical_issues_block(total_miss_cap, total_miss_cit, fmt_count)
+    html += "</div>"
+
+    return html
+# ------------------------------
+# Citation / Caption Analyzer
+# ------------------------------
+REGEX_NORMALIZE = str.maketrans({'\u2013': '-', '\u2014': '-', '\xa0': ' '})
+
+# Label as written (lower case, single spaces, no trailing '.') -> type
+CITATION_LABELS = {
+    "figure": "Figure", "figures": "Figure", "fig": "Figure", "figs": "Figure",
+    "table": "Table", "tables": "Table", "tab": "Table", "tabs": "Table",
+    "box": "Box", "boxes": "Box",
+    "exhibit": "Exhibit", "exhibits": "Exhibit",
+    "appendix": "Appendix", "appendices": "Appendix",
+    "case study": "Case Study", "case studies": "Case Study",
+}
+
+_NUMBER = r'[0-9]+(?:[.\-][0-9]+)*'
+_MULTI_LABEL = r'(Figures?|Figs?\.?|Tables?|Tabs?\.?|Boxes?|Exhibits?|Appendices?|Case\s+Studies?)'
+CITATION_PREFIX = r'(?:\(|\b)'
+# Citation forms after the shared prefix: "Figures 2.1-2.4", "Tables 3.1 and 3.2", "Fig. 4a"
+CITATION_BODIES = {
+    'single': r'(Figure|Fig\.?|Table|Tab\.?|Box|Exhibit|Appendix|Case\s+Study)\.?\s*(' + _NUMBER + r')([A-Za-z]?)(?:\)|\b)',
+    'range': _MULTI_LABEL + r'\.?\s+([0-9]+(?:[\.\-][0-9]+)+)([A-Za-z]?)\s*(?:to|through|–|—|-)\s*(' + _NUMBER
+             + r')([A-Za-z]?)(?:\)|\b)',
+    'and': _MULTI_LABEL + r'\.?\s+([0-9]+(?:[\.\-][0-9]+)+)([A-Za-z]?)\s+(?:and|&)\s*(' + _NUMBER
+           + r')([A-Za-z]?)(?:\)|\b)',
+}
+
+
+# One pass per paragraph: at each position where a label can start, three
+# optional lookaheads test the range, 'and' and single forms together. Each
+# form's own groups follow its named group, in CITATION_BODIES order.
+CITATION_SCANNER = re.compile(
+    CITATION_PREFIX + r'(?=fig|tab|box|exhibit|appendi|case\s)'
+    + ''.join(f'(?:(?=(?P<{kind}>{body})))?' for kind, body in CITATION_BODIES.items()),
+    re.IGNORECASE
+)
+_RANGE = CITATION_SCANNER.groupindex['range']
+_AND = CITATION_SCANNER.groupindex['and']
+_SINGLE = CITATION_SCANNER.groupindex['single']
+
+# Row titles of the dashboard summary, in display order
+SUMMARY_TYPE_TITLES = {
+    "Figure": "Figures", "Table": "Tables", "Box": "Boxes",
+    "Exhibit": "Exhibits", "Appendix": "Appendices", "Case Study": "Case Studies",
+}
+
+
+def citation_key(item_id: str) -> str:
+    """
+    Key on which a caption and a citation of one type match: the number as
+    CITATION_SCANNER stores it (dashes read as '.', no trailing '.') and its
+    letter suffix in lower case, so "Figure 2-1A" matches "Fig. 2.1a".
+    """
+    if not item_id:
+        return ""
+    ref = item_id.strip().translate(REGEX_NORMALIZE).replace('--', '-')
+    for ch in ['[', ']', '°']:
+        ref = ref.replace(ch, '')
+    m = re.search(r'([0-9]+(?:[.\-][0-9]+)*)([A-Za-z]?)', ref)
+    if m:
+        return m.group(1).replace('-', '.').rstrip('.') + m.group(2).lower()
+    return ref.lower()
+
+
+def find_missing(tdict, normalize=citation_key):
+    """
+    (citations without a caption, captions without a citation) for one type's
+    dict, each in the order found. Keys match when normalize() agrees; the
+    summary table and the missing-items tables both use citation_key. The
+    normalized keys of each side are hashed once, so this is linear in the
+    number of items.
+    """
+    captions = {normalize(k) for k in tdict["Caption"]}
+    citations = {normalize(k) for k in tdict["Citation"]}
+    return ([k for k in tdict["Citation"] if normalize(k) not in captions],
+            [k for k in tdict["Caption"] if normalize(k) not in citations])
+
+
+@dataclass
+class CitationItem:
+    item_id: str
+    page_no: int
+    is_caption: bool
+
+
+class CitationAnalyzer:
+    def __init__(self):
+        self.supported_types = ["Figure", "Table", "Box", "Exhibit", "Appendix", "Case Study"]
+        self.regex_patterns = self._setup_regex_patterns()
+
+    def _setup_regex_patterns(self) -> Dict[str, re.Pattern]:
+        patterns = {}
+        for kind, body in CITATION_BODIES.items():
+            patterns[kind] = re.compile(CITATION_PREFIX + body, re.IGNORECASE)
+        return patterns
+
+    def normalize_for_regex(self, text: str) -> str:
+        return text.translate(REGEX_NORMALIZE)
+
+    def normalize_type(self, label: str) -> str:
+        if not label:
+            return "Figure"
+        return CITATION_LABELS.get(" ".join(label.lower().rstrip('.').split()), "Figure")
+
+    def normalize_fig_number(self, fig_ref: str) -> str:
+        return citation_key(fig_ref)
+
+    def is_caption_paragraph(self, text: str) -> bool:
+        t = self.normalize_for_regex(text.strip()).lower()
+        if not t:
+            return False
+        if len(t.splitlines()) > 7:
+            return False
+        for prefix in ['figure', 'fig.', 'table', 'tab.', 'box', 'exhibit', 'appendix', 'case study']:
+            if t.startswith(prefix):
+                return True
+        return False
+
+    def analyze_document_citations(self, document_content: List[Tuple[str, int, bool]]) -> Dict[str, Any]:
+        """
+        Captions and citations per supported type. Each paragraph is scanned
+        once with CITATION_SCANNER, which reports at every candidate position
+        whether the range, 'and' and single forms match there; each form then
+        keeps its own non-overlapping matches, in the order separate
+        finditer passes would give them.
+        """
+        dict_types = {t: {"Caption": {}, "Citation": {}, "CaptionPage": {}, "CitationPage": {}} for t in self.supported_types}
+        labels = CITATION_LABELS
+
+        for text, page_no, is_caption in document_content:
+            txt = text.translate(REGEX_NORMALIZE)
+            ranges, ands, singles = [], [], []
+            range_end = and_end = single_end = 0
+
+            for m in CITATION_SCANNER.finditer(txt):
+                pos = m.start()
+                if m.group(_RANGE) is not None and pos >= range_end:
+                    range_end = m.end(_RANGE)
+                    ranges.append(m.group(_RANGE + 1, _RANGE + 2, _RANGE + 4))
+                if m.group(_AND) is not None and pos >= and_end:
+                    and_end = m.end(_AND)
+                    ands.append(m.group(_AND + 1, _AND + 2, _AND + 4))
+                if m.group(_SINGLE) is not None and pos >= single_end:
+                    single_end = m.end(_SINGLE)
+                    singles.append(m.group(_SINGLE + 1, _SINGLE + 2, _SINGLE + 3))
+
+            for label, start_num, end_num in ranges:
+                label = labels.get(" ".join(label.lower().rstrip('.').split()), "Figure")
+                start_num = start_num.replace('-', '.')
+                end_num = end_num.replace('-', '.')
+                try:
+                    sp = start_num.split('.')
+                    ep = end_num.split('.')
+                    if int(sp[0]) == int(ep[0]) and len(sp) > 1 and len(ep) > 1:
+                        start_minor = int(sp[1])
+                        end_minor = int(ep[1])
+                        for n in range(start_minor, end_minor + 1):
+                            item_id = f"{label} {sp[0]}.{n}"
+                            self._store(dict_types, label, item_id, page_no, is_caption)
+                    else:
+                        self._store(dict_types, label, f"{label} {start_num}", page_no, is_caption)
+                        self._store(dict_types, label, f"{label} {end_num}", page_no, is_caption)
+                except Exception:
+                    self._store(dict_types, label, f"{label} {start_num}", page_no, is_caption)
+                    self._store(dict_types, label, f"{label} {end_num}", page_no, is_caption)
+
+            for label, first_num, second_num in ands:
+                label = labels.get(" ".join(label.lower().rstrip('.').split()), "Figure")
+                self._store(dict_types, label, f"{label} {first_num.replace('-', '.')}", page_no, is_caption)
+                self._store(dict_types, label, f"{label} {second_num.replace('-', '.')}", page_no, is_caption)
+
+            for label, main_no, suffix in singles:
+                label = labels.get(" ".join(label.lower().rstrip('.').split()), "Figure")
+                item_id = f"{label} {main_no.replace('-', '.')}{suffix or ''}"
+                self._store(dict_types, label, item_id, page_no, is_caption)
+
+        return dict_types
+
+    def _store(self, dict_types, label, item_id, page_no, is_caption):
+        tdict = dict_types.get(label)
+        if tdict is None:
+            return
+        if is_caption:
+            if item_id not in tdict['Caption']:
+                tdict['Caption'][item_id] = True
+                tdict['CaptionPage'][item_id] = page_no
+        else:
+            if item_id not in tdict['Citation']:
+                tdict['Citation'][item_id] = True
+                tdict['CitationPage'][item_id] = page_no
+
+    def find_missing(self, dict_types: Dict) -> Dict[str, Tuple[List[str], List[str]]]:
+        """find_missing() for every supported type, matching on citation_key like the summary table."""
+        return {t: find_missing(dict_types[t]) for t in self.supported_types}
+
+    def build_citation_tables_html(self, dict_types: Dict, doc_name: str) -> str:
+        return "".join(self.iter_citation_tables_html(dict_types, doc_name))
+
+    def iter_citation_tables_html(self, dict_types: Dict, doc_name: str):
+        """build_citation_tables_html as HTML chunks, a row at a time."""
+        missing = self.find_missing(dict_types)
+        yield "<div class='citation-analysis'>"
+        yield from self._iter_summary_table(dict_types, missing)
+        yield from self._iter_table("Citations Found", dict_types, "Citation", doc_name)
+        yield from self._iter_table("Captions Found", dict_types, "Caption", doc_name)
+        yield from self._iter_missing_table("Missing Captions", dict_types, missing, True, doc_name)
+        yield from self._iter_missing_table("Missing Citations", dict_types, missing, False, doc_name)
+        yield "</div>"
+
+    def _iter_summary_table(self, dict_types, missing):
+        yield "<h3>Summary Overview</h3><table class='summary-table'><thead><tr><th>Type</th><th>Captions</th><th>Citations</th><th>Missing Captions</th><th>Missing Citations</th></tr></thead><tbody>"
+        for type_key in self.supported_types:
+            cap_cnt = len(dict_types[type_key]["Caption"])
+            cit_cnt = len(dict_types[type_key]["Citation"])
+            miss_cap_cnt = len(missing[type_key][0])
+            miss_cit_cnt = len(missing[type_key][1])
+            if cap_cnt > 0 or cit_cnt > 0:
+                yield f"<tr><td><strong>{type_key}</strong></td><td>{cap_cnt}</td><td>{cit_cnt}</td><td>{miss_cap_cnt}</td><td>{miss_cit_cnt}</td></tr>"
+        yield "</tbody></table>"
+
+    def _iter_table(self, title, dict_types, dict_key, doc_name):
+        yield f"<h3>{title}</h3><table id='{title.replace(' ', '').lower()}Table'><thead><tr><th>Document</th><th>Type</th><th>Item</th><th>Page</th></tr></thead><tbody>"
+        count = 0
+        for type_key in self.supported_types:
+            for item_key in sorted(dict_types[type_key][dict_key].keys()):
+                page_no = dict_types[type_key].get(dict_key + "Page", {}).get(item_key, "N/A")
+                yield f"<tr><td>{doc_name}</td><td>{type_key}</td><td>{item_key}</td><td>{page_no}</td></tr>"
+                count += 1
+        if count == 0:
+            yield "<tr><td colspan='4'>No items found</td></tr>"
+        yield "</tbody></table>"
+
+    def _iter_missing_table(self, title, dict_types, missing, missing_cap, doc_name):
+        yield f"<h3>{title}</h3><table id='{title.replace(' ', '').lower()}Table'><thead><tr><th>Document</th><th>Type</th><th>Item</th><th>Page</th></tr></thead><tbody>"
+        count = 0
+        for type_key in self.supported_types:
+            missing_caps, missing_cits = missing[type_key]
+            if missing_cap:
+                for cit_key in missing_caps:
+                    page_no = dict_types[type_key]["CitationPage"].get(cit_key, "N/A")
+                    yield f"<tr><td>{doc_name}</td><td>{type_key}</td><td>{cit_key}</td><td>{page_no}</td></tr>"
+                    count += 1
+            else:
+                for cap_key in missing_cits:
+                    page_no = dict_types[type_key]["CaptionPage"].get(cap_key, "N/A")
+                    yield f"<tr><td>{doc_name}</td><td>{type_key}</td><td>{cap_key}</td><td>{page_no}</td></tr>"
+                    count += 1
+        if count == 0:
+            yield "<tr><td colspan='4'>All items matched</td></tr>"
+        yield "</tbody></table>"
+
+
+# ------------------------------
+# HTML Template pieces
+# ------------------------------
+# CSS + JS embedded (adapted from your VBA)
+DASHBOARD_CSS = r"""/* === S4Carlisle AI Manuscript Analysis Dashboard === */
+* { margin: 0; padding: 0; box-sizing: border-box; }
+body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); min-height: 100vh; color: #333; padding: 20px; }
+.container { max-width: 1400px; margin: 0 auto; }
+.header { background: white; border-radius: 15px; padding: 30px; margin-bottom: 20px; box-shadow: 0 10px 30px rgba(0,0,0,0.1); }
+.title { font-size: 2rem; font-weight: 700; color: #2c3e50; margin-bottom: 20px; }
+.metadata { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 15px; }
+.meta-item { background: #f8f9ff; padding: 15px; border-radius: 10px; border-left: 4px solid #667eea; }
+.meta-label { font-weight: 600; color: #555; font-size: 0.9rem; }
+.meta-value { font-size: 1.1rem; font-weight: 700; color: #2c3e50; margin-top: 5px; }
+.nav-tabs { display: flex; background: white; border-radius: 15px; padding: 5px; margin-bottom: 20px; box-shadow: 0 5px 15px rgba(0,0,0,0.1); gap: 5px; }
+.nav-tab { flex: 1; text-align: center; padding: 15px; border-radius: 10px; cursor: pointer; transition: all 0.3s; font-weight: 500; }
+.nav-tab.active { background: #667eea; color: white; box-shadow: 0 5px 15px rgba(102, 126, 234, 0.3); }
+.nav-tab:hover:not(.active) { background: #f8f9ff; }
+.tab-content { display: none; background: white; border-radius: 15px; padding: 30px; box-shadow: 0 8px 25px rgba(0,0,0,0.1); }
+.tab-content.active { display: block; animation: fadeIn 0.3s; }
+@keyframes fadeIn { from { opacity: 0; } to { opacity: 1; } }
+.section-title { font-size: 1.5rem; font-weight: 600; color: #2c3e50; margin-bottom: 20px; }
+table { width: 100%; border-collapse: collapse; margin: 20px 0; background: white; border-radius: 10px; overflow: hidden; }
+th { background: #667eea; color: white; padding: 12px; font-weight: 600; text-align: left; }
+td { padding: 10px 12px; border-bottom: 1px solid #eee; }
+tr:hover { background: #f8f9ff; }
+h3 { color: #2c3e50; margin-top: 30px; margin-bottom: 15px; font-size: 1.2rem; }
+.summary-table { margin-bottom: 30px; }
+@media (max-width: 768px) { .container { padding: 10px; } .title { font-size: 1.5rem; } .metadata { grid-template-columns: 1fr; } }
+"""
+
+DASHBOARD_JS = r"""
+function showTab(tabId) {
+    document.querySelectorAll('.tab-content').forEach(c => c.classList.remove('active'));
+    document.querySelectorAll('.nav-tab').forEach(t => t.classList.remove('active'));
+    const target = document.getElementById(tabId);
+    if (target) target.classList.add('active');
+    // set active on the tab that was clicked
+    const tabs = document.querySelectorAll('.nav-tab');
+    tabs.forEach(tab => {
+        if (tab.getAttribute('data-target') === tabId) tab.classList.add('active');
+    });
+}
+document.addEventListener('DOMContentLoaded', function() {
+    // make first tab active if not already
+    if (!document.querySelector('.nav-tab.active')) {
+        const first = document.querySelector('.nav-tab');
+        if (first) first.classList.add('active');
+    }
+});
+"""
+
+# Basic HTML page wrapper (Jinja-like placeholders)
+HTML_WRAPPER = """<!doctype html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width,initial-scale=1">
+<title>Document Analysis - {{ doc_name }}</title>
+<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css">
+<link rel="stylesheet" href="https://cdn.datatables.net/1.13.6/css/jquery.dataTables.min.css">
+<style>{{ css }}</style>
+<script src="https://code.jquery.com/jquery-3.7.1.min.js"></script>
+<script src="https://cdn.datatables.net/1.13.6/js/jquery.dataTables.min.js"></script>
+</head>
+<body>
+<div class="container">
+    <div class="header">
+        <div class="title">
+            <img src="{{ logo_path }}" alt="" style="height:40px;vertical-align:middle;margin-right:10px;">
+            <i class="fa-solid fa-robot"></i>S4Carlisle Manuscript Analysis Dashboard
+        </div>
+        <div class="metadata">
+            <div class="meta-item"><div class="meta-label">File</div><div class="meta-value">{{ doc_name }}</div></div>
+            <div class="meta-item"><div class="meta-label">Pages</div><div class="meta-value">{{ pages }}</div></div>
+            <div class="meta-item"><div class="meta-label">Words</div><div class="meta-value">{{ words }}</div></div>
+            <div class="meta-item"><div class="meta-label">CE Pages</div><div class="meta-value">{{ ce_pages }}</div></div>
+            <div class="meta-item"><div class="meta-label">Date</div><div class="meta-value">{{ date }}</div></div>
+            <div class="meta-item"><div class="meta-label">Analyst</div><div class="meta-value">{{ analyst }}</div></div>
+        </div>
+    </div>
+    
+    <div id="analysis-summary" class="tab-content active" style="margin-bottom: 25px;">
+    {% if detailed_summary is string %}{{ detailed_summary }}{% else %}{% for chunk in detailed_summary %}{{ chunk }}{% endfor %}{% endif %}
+    </div>
+
+    <!-- Navigation Tabs -->
+    <div class="nav-tabs">
+        <div class="nav-tab active" data-target="citations" onclick="showTab('citations')">Citations</div>
+        <div class="nav-tab" data-target="special-chars" onclick="showTab('special-chars')">Special Chars</div>
+        <div class="nav-tab" data-target="formatting" onclick="showTab('formatting')">Formatting</div>
+        <div class="nav-tab" data-target="comments" onclick="showTab('comments')">Comments</div>
+        <div class="nav-tab" data-target="media" onclick="showTab('media')">Media</div>
+    </div>
+
+    <!-- Tabs -->
+    <div id="citations" class="tab-content active">
+        <div class="section-title"><i class="fa-solid fa-closed-captioning"></i> Citations & Captions</div>
+        {% if msr_content is string %}{{ msr_content }}{% else %}{% for chunk in msr_content %}{{ chunk }}{% endfor %}{% endif %}
+    </div>
+
+    <div id="special-chars" class="tab-content">
+        <div class="section-title"><i class="fas fa-language"></i> Special Characters</div>
+        {% if spec_content is string %}{{ spec_content }}{% else %}{% for chunk in spec_content %}{{ chunk }}{% endfor %}{% endif %}
+    </div>
+
+    <div id="formatting" class="tab-content">
+        <div class="section-title"><i class="fas fa-cogs"></i> Formatting</div>
+        {% if fmt_content is string %}{{ fmt_content }}{% else %}{% for chunk in fmt_content %}{{ chunk }}{% endfor %}{% endif %}
+    </div>
+
+    <div id="comments" class="tab-content">
+        <div class="section-title"><i class="fas fa-comments"></i> Comments & Highlights</div>
+        {% if comment_content is string %}{{ comment_content }}{% else %}{% for chunk in comment_content %}{{ chunk }}{% endfor %}{% endif %}
+        {% if export_highlight is string %}{{ export_highlight }}{% else %}{% for chunk in export_highlight %}{{ chunk }}{% endfor %}{% endif %}
+    </div>
+
+    <div id="media" class="tab-content">
+        <div class="section-title"><i class="fas fa-images"></i> Media & Notes</div>
+        <p><b>Images:</b> {{ images }} | <b>Footnotes:</b> {{ footnotes }} | <b>Endnotes:</b> {{ endnotes }}</p>
+    </div>
+
+</div>
+
+<!-- Tab JS -->
+<script>
+function showTab(tabId) {
+    document.querySelectorAll('.tab-content').forEach(c => c.classList.remove('active'));
+    document.querySelectorAll('.nav-tab').forEach(t => t.classList.remove('active'));
+    const target = document.getElementById(tabId);
+    if (target) target.classList.add('active');
+    document.querySelectorAll('.nav-tab').forEach(tab => {
+        if (tab.getAttribute('data-target') === tabId) tab.classList.add('active');
+    });
+}
+</script>
+
+<script>
+$(document).ready(function(){
+    $('table').each(function(){
+        // Skip tables with irregular rows (colspan/rowspan)
+        const hasIrregularRows = $(this).find('td[colspan], td[rowspan]').length > 0;
+        if (hasIrregularRows) {
+            console.log('Skipping DataTables init for irregular table:', this.id);
+            return; // ✅ Skip DataTables for this table
+        }
+
+        try {
+            $(this).DataTable({
+                pageLength: 10,
+                autoWidth: false,
+                ordering: true,
+                responsive: true,
+                columnDefs: [
+                    { targets: "_all", defaultContent: "" }
+                ]
+            });
+        } catch (e) {
+            console.warn('DataTable init failed for', this.id, e);
+        }
+    });
+});
+</script>
+
+
+<script>{{ js }}</script>
+</body>
+</html>
+"""
+
+
+@lru_cache(maxsize=1)
+def dashboard_template():
+    """HTML_WRAPPER, compiled once per process."""
+    from jinja2 import Template
+    return Template(HTML_WRAPPER)
+
+
+def write_dashboard_html(out_path: str, **context) -> None:
+    """
+    Render the dashboard straight into out_path. The section values may be
+    strings or iterables of HTML chunks (the iter_* builders); chunks are
+    written as the template yields them, so the page is never held whole.
+    """
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.writelines(dashboard_template().generate(**context))
+
+
+def iter_formatting_table_html(rows):
+    yield "<table><thead><tr><th>Type</th><th>Page</th><th>Category</th><th>Details</th></tr></thead><tbody>"
+    if rows:
+        for r in rows:
+            yield f"<tr><td>{r[0]}</td><td>{r[1]}</td><td>{r[2]}</td><td>{r[3]}</td></tr>"
+    else:
+        yield "<tr><td colspan='4'>No formatting issues found or not detectable without Word automation.</td></tr>"
+    yield "</tbody></table>"
+
+
+def iter_multilingual_table_html(page_map):
+    yield "<table><thead><tr><th>Language/Type</th><th>Page</th></tr></thead><tbody>"
+    for lang, pages in page_map.items():
+        for p in sorted(pages):
+            yield f"<tr><td>{lang}</td><td>{p}</td></tr>"
+
+    if not page_map:
+        yield "<tr><td colspan='2'>No multilingual characters found</td></tr>"
+
+    yield "</tbody></table>"
+
+
+def build_comments_html(comments: List[Tuple]):
+    return "".join(iter_comments_html(comments))
+
+
+def iter_comments_html(comments: List[Tuple]):
+    if not comments:
+        yield "<p>No comments found or comments unavailable (python-docx can't always read comments).</p>"
+        return
+    yield "<table><thead><tr><th>#</th><th>Page</th><th>Author</th><th>Comment</th></tr></thead><tbody>"
+    for i, (author, text, page) in enumerate(comments, start=1):
+        yield f"<tr><td>{i}</td><td>{page}</td><td>{escape_html(author)}</td><td>{escape_html(text)}</td></tr>"
+    yield "</tbody></table>"
+
+
+def build_export_highlight_html(paragraphs_full):
+    return "".join(iter_export_highlight_html(paragraphs_full))
+
+
+def iter_export_highlight_html(paragraphs_full):
+    # paragraphs_full elements: (text, page, is_caption, is_highlighted) if word used
+    highlights = [(t, p) for t, p, is_cap, is_high in paragraphs_full if is_high]
+    if not highlights:
+        yield "<p>No highlighted paragraphs found.</p>"
+        return
+    yield "<table><thead><tr><th>Highlighted Text</th><th>Page</th></tr></thead><tbody>"
+    for t, p in highlights:
+        yield f"<tr><td>{escape_html(t)}</td><td>{p}</td></tr>"
+    yield "</tbody></table>"
+
+
+def escape_html(s: str) -> str:
+    return (s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+            .replace("\n", "<br>"))
@@ -0,0 +1,277 @@
+import os
+import json
+import time
+import shutil
+import atexit
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from config import UPLOAD_FOLDER, JOB_DRAIN_SECONDS, JOB_RESULT_TTL, JOB_ORPHAN_PREFIX
+from database import get_db
+from utils import log_errors, log_activity
+
+ACTIVE_STATUSES = ('running', 'interrupted')
+
+
+def _now():
+    return datetime.utcnow().isoformat(sep=' ')
+
+
+def _loads(value, default):
+    if not value:
+        return default
+    try:
+        return json.loads(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class JobManager:
+    """
+    Journal and control for background batches. Every job and each of its
+    files is recorded in the jobs / job_files tables as it progresses, so a
+    job can be cancelled between files, drained on shutdown and, after a
+    restart, resumed from its first unfinished file by the runner registered
+    for its kind.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stop = {}        # job_id -> Event set on cancel or shutdown
+        self._cancelled = set()
+        self._threads = {}     # job_id -> thread running it in this process
+        self._runners = {}
+        self.accepting = True
+        self._shut_down = False
+
+    def register_runner(self, kind, runner):
+        """runner(app, job_id) works through a job's pending files; used by start() and resume()."""
+        self._runners[kind] = runner
+
+    # --- journal ---------------------------------------------------------
+
+    def create(self, job_id, kind, folder, files, user_id=None, username=None, role=None, route_type=None,
+               params=None):
+        now = _now()
+        with get_db() as db:
+            db.execute('''INSERT INTO jobs (id, kind, user_id, username, role, route_type, folder, params, status,
+                                            created_at, updated_at)
+                          VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'running', ?, ?)''',
+                       (job_id, kind, user_id, username, role, route_type, folder, json.dumps(params or {}), now, now))
+            db.executemany('''INSERT INTO job_files (job_id, position, path, status, updated_at)
+                              VALUES (?, ?, ?, 'pending', ?)''',
+                           [(job_id, position, path, now) for position, path in enumerate(files)])
+            db.commit()
+        with self._lock:
+            self._stop[job_id] = threading.Event()
+
+    def job(self, job_id):
+        with get_db() as db:
+            row = db.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['params'] = _loads(job['params'], {})
+        job['result'] = _loads(job['result'], {})
+        return job
+
+    def files(self, job_id):
+        with get_db() as db:
+            rows = db.execute('SELECT * FROM job_files WHERE job_id = ? ORDER BY position', (job_id,)).fetchall()
+        files = []
+        for row in rows:
+            f = dict(row)
+            f['errors'] = _loads(f['errors'], [])
+            f['outputs'] = _loads(f['outputs'], [])
+            files.append(f)
+        return files
+
+    def pending_files(self, job_id):
+        """[(position, path)] of the files still to process, in upload order."""
+        return [(f['position'], f['path']) for f in self.files(job_id) if f['status'] == 'pending']
+
+    def file_finished(self, job_id, position, status='done', errors=(), outputs=()):
+        with get_db() as db:
+            db.execute('''UPDATE job_files SET status = ?, errors = ?, outputs = ?, updated_at = ?
+                          WHERE job_id = ? AND position = ?''',
+                       (status, json.dumps(list(errors)), json.dumps(list(outputs)), _now(), job_id, position))
+            db.execute('UPDATE jobs SET updated_at = ? WHERE id = ?', (_now(), job_id))
+            db.commit()
+
+    def set_status(self, job_id, status, result=None):
+        with get_db() as db:
+            if result is None:
+                db.execute('UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?', (status, _now(), job_id))
+            else:
+                db.execute('UPDATE jobs SET status = ?, result = ?, updated_at = ? WHERE id = ?',
+                           (status, json.dumps(result), _now(), job_id))
+            if status == 'cancelled':
+                db.execute('''UPDATE job_files SET status = 'cancelled', updated_at = ?
+                              WHERE job_id = ? AND status = 'pending' ''', (_now(), job_id))
+            db.commit()
+
+    def active_jobs(self):
+        with get_db() as db:
+            rows = db.execute('''SELECT j.*,
+                                        (SELECT COUNT(*) FROM job_files f WHERE f.job_id = j.id) AS total,
+                                        (SELECT COUNT(*) FROM job_files f
+                                          WHERE f.job_id = j.id AND f.status != 'pending') AS finished
+                                 FROM jobs j WHERE j.status IN (?, ?) ORDER BY j.created_at''',
+                              ACTIVE_STATUSES).fetchall()
+        return [dict(row) for row in rows]
+
+    # --- control ---------------------------------------------------------
+
+    def stop_requested(self, job_id):
+        """True once the job was cancelled or the server is shutting down; runners check it between files."""
+        event = self._stop.get(job_id)
+        return event is not None and event.is_set()
+
+    def cancelled(self, job_id):
+        return job_id in self._cancelled
+
+    def cancel(self, job_id):
+        """
+        Cancel a job. A job running in this process stops after its current
+        file; an interrupted one waiting for resume is cancelled at once.
+        Returns False when the job is unknown or already finished.
+        """
+        job = self.job(job_id)
+        if job is None or job['status'] not in ACTIVE_STATUSES:
+            return False
+        with self._lock:
+            self._cancelled.add(job_id)
+            event = self._stop.get(job_id)
+            thread = self._threads.get(job_id)
+        if event is not None:
+            event.set()
+        if thread is None:
+            self.set_status(job_id, 'cancelled')
+        return True
+
+    def finish(self, job_id, failed=False, result=None):
+        """
+        Record the outcome of a run: cancelled, interrupted (stopped by a
+        shutdown with files left), failed or completed. Returns the status.
+        """
+        if self.cancelled(job_id):
+            status = 'cancelled'
+        elif self.stop_requested(job_id) and self.pending_files(job_id):
+            status = 'interrupted'
+        else:
+            status = 'failed' if failed else 'completed'
+        self.set_status(job_id, status, result)
+        return status
+
+    @contextmanager
+    def running(self, job_id):
+        """Track the current thread as the job's runner; a run that raises leaves the job failed."""
+        with self._lock:
+            self._stop.setdefault(job_id, threading.Event())
+            self._threads[job_id] = threading.current_thread()
+        try:
+            yield
+        except Exception:
+            self.set_status(job_id, 'failed')
+            raise
+        finally:
+            with self._lock:
+                self._threads.pop(job_id, None)
+                self._stop.pop(job_id, None)
+                self._cancelled.discard(job_id)
+
+    def start(self, app, job_id, kind):
+        def target():
+            try:
+                with self.running(job_id):
+                    self._runners[kind](app, job_id)
+            except Exception as e:
+                log_errors([f"Job {job_id} ({kind}) failed: {e}"])
+
+        with self._lock:
+            self._stop.setdefault(job_id, threading.Event())
+        threading.Thread(target=target, name=f"job-{job_id}", daemon=True).start()
+
+    def shutdown(self, timeout=JOB_DRAIN_SECONDS):
+        """
+        Stop taking jobs, give running ones `timeout` seconds to drain, then
+        ask the rest to stop after their current file and wait for that as
+        long again. Jobs still running are journalled as interrupted; their
+        unfinished files stay pending for resume().
+        """
+        if self._shut_down:
+            return
+        self._shut_down = True
+        self.accepting = False
+
+        deadline = time.monotonic() + timeout
+        for thread in list(self._threads.values()):
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+        with self._lock:
+            remaining = dict(self._threads)
+            for job_id in remaining:
+                self._stop.setdefault(job_id, threading.Event()).set()
+        deadline = time.monotonic() + timeout
+        for thread in remaining.values():
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+        for job_id in list(self._threads):
+            try:
+                self.set_status(job_id, 'interrupted')
+                log_activity('system', 'JOB_INTERRUPTED', details=job_id)
+            except Exception as e:
+                log_errors([f"Could not journal interrupted job {job_id}: {e}"])
+
+    def resume(self, app):
+        """Restart jobs a previous process left running or interrupted, from their first pending file."""
+        with get_db() as db:
+            rows = db.execute('SELECT id, kind, folder FROM jobs WHERE status IN (?, ?)', ACTIVE_STATUSES).fetchall()
+        for row in rows:
+            job_id, kind, folder = row['id'], row['kind'], row['folder']
+            if kind not in self._runners or not os.path.isdir(folder):
+                self.set_status(job_id, 'failed')
+                log_errors([f"Job {job_id} ({kind}) cannot be resumed"])
+                continue
+            self.set_status(job_id, 'running')
+            log_activity('system', 'JOB_RESUMED', details=job_id)
+            self.start(app, job_id, kind)
+
+    def cleanup_orphans(self):
+        """
+        Remove the folders of jobs that finished more than JOB_RESULT_TTL ago
+        and s4c_ppd_* folders no job owns. Other upload folders are left to
+        the download token cleanup.
+        """
+        cutoff = datetime.utcnow() - JOB_RESULT_TTL
+        with get_db() as db:
+            rows = db.execute('SELECT folder, status, updated_at FROM jobs').fetchall()
+        owned = set()
+        for row in rows:
+            folder = os.path.abspath(row['folder'])
+            finished = row['status'] not in ACTIVE_STATUSES
+            if finished and row['updated_at'] and datetime.fromisoformat(row['updated_at']) < cutoff:
+                shutil.rmtree(folder, ignore_errors=True)
+            else:
+                owned.add(folder)
+
+        if not os.path.isdir(UPLOAD_FOLDER):
+            return
+        for name in os.listdir(UPLOAD_FOLDER):
+            path = os.path.abspath(os.path.join(UPLOAD_FOLDER, name))
+            if not name.startswith(JOB_ORPHAN_PREFIX) or path in owned or not os.path.isdir(path):
+                continue
+            if datetime.utcfromtimestamp(os.path.getmtime(path)) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+                log_activity('system', 'JOB_ORPHAN_CLEANUP', details=name)
+
+    def init_app(self, app):
+        atexit.register(self.shutdown)
+        try:
+            self.cleanup_orphans()
+        except Exception as e:
+            log_errors([f"Job folder cleanup failed: {e}"])
+        self.resume(app)
+
+
+job_manager = JobManager()
@@ -0,0 +1,216 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from config import (MACRO_CACHE_FOLDER, MACRO_CACHE_MAX_BYTES, COMMON_MACRO_FOLDER, DEFAULT_MACRO_NAME,
+                    NATIVE_RULES_FOLDER, SPELLCHECK_DICTIONARY, SPELLCHECK_CUSTOM_LISTS, TERMINOLOGY_FOLDER,
+                    KEYWORD_RULES_FOLDER)
+from utils import log_errors
+
+MANIFEST_NAME = "manifest.json"
+
+_template_hash_lock = threading.Lock()
+_template_hash_cache = {}
+_rules_hash_cache = {}
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def template_hash():
+    """Hash of the macro template, recomputed only when its mtime/size changes."""
+    macro_path = os.path.join(COMMON_MACRO_FOLDER, DEFAULT_MACRO_NAME)
+    try:
+        st = os.stat(macro_path)
+    except OSError:
+        return "no-template"
+
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _template_hash_lock:
+        cached = _template_hash_cache.get(macro_path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        digest = file_sha256(macro_path)
+        _template_hash_cache[macro_path] = (stamp, digest)
+        return digest
+
+
+def native_rule_files():
+    """Every rule file and word list the native macros read."""
+    paths = {SPELLCHECK_DICTIONARY, *SPELLCHECK_CUSTOM_LISTS}
+    for folder in (NATIVE_RULES_FOLDER, TERMINOLOGY_FOLDER, KEYWORD_RULES_FOLDER):
+        for root, _, files in os.walk(folder):
+            paths.update(os.path.join(root, fn) for fn in files)
+    return sorted(os.path.abspath(p) for p in paths)
+
+
+def rules_hash():
+    """Hash of native_rule_files(), recomputed only when one of them is added, removed or changed."""
+    stamps = []
+    for path in native_rule_files():
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        stamps.append((path, st.st_mtime_ns, st.st_size))
+    stamps = tuple(stamps)
+
+    with _template_hash_lock:
+        cached = _rules_hash_cache.get("rules")
+        if cached and cached[0] == stamps:
+            return cached[1]
+        h = hashlib.sha256()
+        for path, _, _ in stamps:
+            h.update(path.encode("utf-8"))
+            h.update(b"\0")
+            h.update(file_sha256(path).encode("ascii"))
+            h.update(b"\0")
+        digest = h.hexdigest()
+        _rules_hash_cache["rules"] = (stamps, digest)
+        return digest
+
+
+class MacroOutputCache:
+    """
+    Content-addressed store of macro outputs.
+
+    Each entry lives in <folder>/<key>/ and holds the processed document, any
+    side files the macros wrote next to it (reports, HTML) and a manifest.
+    Only runs that finished without errors are stored, so a transient COM or
+    macro failure is never replayed. Keys cover the document, the macros, the
+    macro template, the native macros' rule files and word lists and, for
+    macros that name the requesting user, that user. Entries are evicted least-recently-used
+    once the folder grows past max_bytes.
+    """
+
+    def __init__(self, folder=MACRO_CACHE_FOLDER, max_bytes=MACRO_CACHE_MAX_BYTES):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def make_key(self, doc_path, macro_names, analyst=None):
+        """analyst: the user named in the outputs, for macros that write it into them."""
+        h = hashlib.sha256()
+        h.update(file_sha256(doc_path).encode("ascii"))
+        h.update(b"\0")
+        h.update("\n".join(macro_names).encode("utf-8"))
+        h.update(b"\0")
+        h.update(template_hash().encode("ascii"))
+        h.update(b"\0")
+        h.update(rules_hash().encode("ascii"))
+        if analyst:
+            h.update(b"\0")
+            h.update(analyst.encode("utf-8"))
+        return h.hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.folder, key)
+
+    def restore(self, key, doc_path):
+        """
+        Copy a cached result over doc_path (and its side files next to it).
+        Returns the restored files on a hit, or None on a miss.
+        """
+        entry = self._entry_dir(key)
+        manifest_path = os.path.join(entry, MANIFEST_NAME)
+
+        with self._lock:
+            if not os.path.exists(manifest_path):
+                return None
+            try:
+                with open(manifest_path, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+
+                # Entries written before failed runs stopped being cached
+                if manifest.get("errors"):
+                    shutil.rmtree(entry, ignore_errors=True)
+                    return None
+
+                target_dir = os.path.dirname(os.path.abspath(doc_path))
+                new_stem = os.path.splitext(os.path.basename(doc_path))[0]
+                old_stem = manifest.get("stem", "")
+
+                shutil.copyfile(os.path.join(entry, "document"), doc_path)
+                restored = [doc_path]
+
+                for name in manifest.get("extras", []):
+                    out_name = name.replace(old_stem, new_stem, 1) if old_stem else name
+                    out_path = os.path.join(target_dir, out_name)
+                    shutil.copyfile(os.path.join(entry, "extras", name), out_path)
+                    restored.append(out_path)
+
+                os.utime(manifest_path, None)
+                return restored
+            except Exception as e:
+                log_errors([f"Macro cache restore failed for {key[:12]}: {e}"])
+                shutil.rmtree(entry, ignore_errors=True)
+                return None
+
+    def store(self, key, doc_path, extra_paths):
+        entry = self._entry_dir(key)
+        tmp_entry = f"{entry}.tmp{threading.get_ident()}"
+
+        try:
+            os.makedirs(os.path.join(tmp_entry, "extras"), exist_ok=True)
+            shutil.copyfile(doc_path, os.path.join(tmp_entry, "document"))
+
+            extras = []
+            for path in extra_paths:
+                if os.path.isfile(path):
+                    name = os.path.basename(path)
+                    shutil.copyfile(path, os.path.join(tmp_entry, "extras", name))
+                    extras.append(name)
+
+            with open(os.path.join(tmp_entry, MANIFEST_NAME), "w", encoding="utf-8") as f:
+                json.dump({
+                    "stem": os.path.splitext(os.path.basename(doc_path))[0],
+                    "extras": extras,
+                    "created": time.time(),
+                }, f)
+
+            with self._lock:
+                if os.path.exists(entry):
+                    shutil.rmtree(tmp_entry, ignore_errors=True)
+                else:
+                    os.replace(tmp_entry, entry)
+                self._evict()
+        except Exception as e:
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            log_errors([f"Macro cache store failed for {key[:12]}: {e}"])
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            manifest_path = os.path.join(path, MANIFEST_NAME)
+            if not os.path.isfile(manifest_path):
+                continue
+            size = 0
+            for root, _, files in os.walk(path):
+                for fn in files:
+                    try:
+                        size += os.path.getsize(os.path.join(root, fn))
+                    except OSError:
+                        pass
+            entries.append((os.path.getmtime(manifest_path), size, path))
+            total += size
+
+        if total <= self.max_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+macro_output_cache = MacroOutputCache()
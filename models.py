@@ -55,3 +55,47 @@ class MacroProcessing(db.Model):
     processing_date = db.Column(db.DateTime, default=datetime.utcnow)
     errors = db.Column(db.Text)
     route_type = db.Column(db.String(50), default='general')
+
+class MacroTiming(db.Model):
+    __tablename__ = 'macro_timings'
+
+    id = db.Column(db.Integer, primary_key=True)
+    token = db.Column(db.String(100), index=True, nullable=False)
+    route_type = db.Column(db.String(50), index=True)
+    document = db.Column(db.String(255), nullable=False)
+    size_bytes = db.Column(db.Integer)
+    macro_name = db.Column(db.String(150))  # NULL for open/save/cache phases
+    phase = db.Column(db.String(20), nullable=False)  # open | run | save | cache | skipped
+    duration_ms = db.Column(db.Float, nullable=False)
+    recorded_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+
+class Job(db.Model):
+    """Journal of background batches (PPD and macro uploads) so they can be cancelled and resumed."""
+    __tablename__ = 'jobs'
+
+    id = db.Column(db.String(100), primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # ppd | macro
+    user_id = db.Column(db.Integer)
+    username = db.Column(db.String(150))
+    role = db.Column(db.String(50))
+    route_type = db.Column(db.String(50))
+    folder = db.Column(db.String(500), nullable=False)
+    params = db.Column(db.Text)  # JSON, runner specific
+    status = db.Column(db.String(20), nullable=False, index=True)  # running | interrupted | completed | failed | cancelled
+    result = db.Column(db.Text)  # JSON, e.g. the PPD zip path
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class JobFile(db.Model):
+    __tablename__ = 'job_files'
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(100), db.ForeignKey('jobs.id'), index=True, nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    path = db.Column(db.String(500), nullable=False)
+    status = db.Column(db.String(20), nullable=False)  # pending | done | failed | cancelled
+    errors = db.Column(db.Text)  # JSON list
+    outputs = db.Column(db.Text)  # JSON list of files produced for this input
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -0,0 +1,256 @@
+"""
+Native port of citationupdateonly.citationupdate's text stages: the range
+and separator clean-up, expandrange, replacesemicolon and the duplicate
+highlight.
+
+Referencevalidation.replacesemicolonwithstyle stays a Word step although it
+is only a style-aware replace. It runs between content-control stages: the
+earlier ApplyPlainTextContentControlsBasedOnStyle must see the colons without
+cite_bib (one control per number), and the later Macro21 and CondenseCiteBib
+find the colons by that style. Running it here in its place would split the
+Word steps in two, closing and reopening the document in Word around it,
+and Word is started for the neighbouring stages anyway.
+"""
+import os
+import re
+from ooxml.package import (DocxPackage, is_docx, load_styles, find_style_id, w, DOCUMENT_PART, paragraph_runs,
+                           run_spans, run_text, run_style_id, run_highlight, runs_in_spans, replace_text_span,
+                           highlight_spans, clear_run_highlight)
+
+CITE_STYLE = "cite_bib"
+
+# NumbersRangesspace*: "12 - 15", "12 -15", "12- 15" and the en dash forms;
+# Word's <...> wildcards make both numbers whole words
+SPACED_RANGE_RE = re.compile(r"(?<!\w)(\d+)(?: [-–] ?|[-–] )(\d+)(?!\w)")
+EN_DASH = "–"
+
+# removeciteincommabracket: separators that should not carry the citation style
+CITE_SEPARATORS = ",. []"
+
+# expandrange: cite_bib ranges are spelled out as colon-separated numbers,
+# so each number is checked for duplicates on its own
+CITE_RANGE_RE = re.compile(r"(\d{1,4})-(\d{1,4})")
+CITE_COLON = ":"
+RANGE_COLOR = "yellow"
+
+# citationupdate's bookmark loop: the first use of a citation is highlighted,
+# repeats lose their highlight
+FIRST_CITE_COLOR = "yellow"
+
+# Stages of citationupdateonly.citationupdate after the duplicate highlight,
+# in macro order; they work on content controls and still run in Word (see
+# the module docstring for replacesemicolonwithstyle). The macro asks before
+# its duplicate stages; they run as if confirmed.
+CITATION_WORD_STEPS = (
+    "HighlightDupInStyle.ApplyPlainTextContentControlsBasedOnStyle",
+    "HighlightDupInStyle.FindAndStoreContentControlMismatches",
+    "HighlightDupInStyle.ReplaceRangeAndTagValuesWithConfirmation",
+    "HighlightDupInStyle.RemoveGreenHighlightFromWholeDocument",
+    "HighlightDupInStyle.DeleteYellowHighlightREFNParagraphs",
+    "citationupdateonly.listorder1",
+    "HighlightDupInStyle.ReplaceRangeAndTagValuesWithConfirmation4",
+    "Referencevalidation.replacesemicolonwithstyle",
+    "ReferenceRenumber.RemoveAllContentControls",
+    "HighlightDupInStyle.Macro21",
+    "HighlightDupInStyle.CondenseCiteBib1",
+    "HighlightDupInStyle.Macro21",
+    "HighlightDupInStyle.CondenseCiteBib4",
+)
+
+
+def number_ranges_en_dash(p, cite_id):
+    """Close up spaced number ranges with an en dash when the range ascends."""
+    text = "".join(run_text(r) for r in paragraph_runs(p))
+    if "-" not in text and EN_DASH not in text:
+        return 0
+    changes = 0
+    # Right to left, so the offsets of earlier matches stay valid
+    for m in reversed(list(SPACED_RANGE_RE.finditer(text))):
+        first, second = m.group(1), m.group(2)
+        if int(first) < int(second):
+            replace_text_span(p, m.start(), m.end(), f"{first}{EN_DASH}{second}")
+            changes += 1
+    return changes
+
+
+def _char_spans(p, chars, run_filter):
+    spans = []
+    for r, start, end in run_spans(p):
+        if not run_filter(r):
+            continue
+        text = run_text(r)
+        spans += [(start + i, start + i + 1) for i, ch in enumerate(text) if ch in chars]
+    return spans
+
+
+def remove_cite_from_separators(p, cite_id):
+    """Drop the cite_bib character style from commas, full stops, spaces and brackets."""
+    if cite_id is None:
+        return 0
+    spans = _char_spans(p, CITE_SEPARATORS, lambda r: run_style_id(r) == cite_id)
+    if not spans:
+        return 0
+    for r in runs_in_spans(p, spans):
+        rs = r.find(f"{w('rPr')}/{w('rStyle')}")
+        rs.getparent().remove(rs)
+    return len(spans)
+
+
+def _cite_spans(p, cite_id):
+    """(start, end) of each stretch of cite_bib text, as Word's Find by style returns them."""
+    if p.find(f".//{w('rStyle')}[@{w('val')}='{cite_id}']") is None:
+        return []
+    spans = []
+    for r, start, end in run_spans(p):
+        if end == start:
+            continue
+        if run_style_id(r) != cite_id:
+            continue
+        if spans and spans[-1][1] == start:
+            spans[-1][1] = end
+        else:
+            spans.append([start, end])
+    return [tuple(span) for span in spans]
+
+
+def expand_cite_ranges(p, cite_id):
+    """Spell out cite_bib ranges such as "3-5" as "3:4:5" and highlight them."""
+    if cite_id is None:
+        return 0
+    text = "".join(run_text(r) for r in paragraph_runs(p))
+    if not CITE_RANGE_RE.search(text):
+        return 0
+    cites = _cite_spans(p, cite_id)
+    changes = 0
+    # Right to left, so the offsets of earlier matches stay valid
+    for m in reversed(list(CITE_RANGE_RE.finditer(text))):
+        if not any(s <= m.start() and m.end() <= e for s, e in cites):
+            continue
+        numbers = CITE_COLON.join(str(n) for n in range(int(m.group(1)), int(m.group(2)) + 1))
+        if not numbers:
+            continue
+        replace_text_span(p, m.start(), m.end(), numbers)
+        highlight_spans(p, [(m.start(), m.start() + len(numbers))], RANGE_COLOR)
+        changes += 1
+    return changes
+
+
+def remove_cite_from_colons(p, cite_id):
+    """Drop the cite_bib style from highlighted colons, leaving one citation per number."""
+    if cite_id is None or CITE_COLON not in "".join(run_text(r) for r in paragraph_runs(p)):
+        return 0
+    spans = _char_spans(p, CITE_COLON,
+                        lambda r: run_style_id(r) == cite_id and run_highlight(r) not in (None, "none"))
+    if not spans:
+        return 0
+    for r in runs_in_spans(p, spans):
+        rs = r.find(f"{w('rPr')}/{w('rStyle')}")
+        rs.getparent().remove(rs)
+    return len(spans)
+
+
+def highlight_duplicate_citations(p, cite_id, seen):
+    """
+    Highlight the first use of each citation text and clear the highlight of
+    later uses; seen holds the texts met in earlier paragraphs. Returns the
+    number of repeats.
+    """
+    if cite_id is None:
+        return 0
+    cites = _cite_spans(p, cite_id)
+    if not cites:
+        return 0
+    text = "".join(run_text(r) for r in paragraph_runs(p))
+    first, repeats = [], []
+    for start, end in cites:
+        cite = text[start:end]
+        if cite in seen:
+            repeats.append((start, end))
+        else:
+            seen.add(cite)
+            first.append((start, end))
+    if first:
+        highlight_spans(p, first, FIRST_CITE_COLOR)
+    for r in runs_in_spans(p, repeats):
+        clear_run_highlight(r)
+    return len(repeats)
+
+
+def remove_bookmarks(root):
+    """Delete every bookmark Word lists in ActiveDocument.Bookmarks (hidden "_" ones stay)."""
+    ids = set()
+    for start in list(root.iter(w("bookmarkStart"))):
+        if not (start.get(w("name")) or "").startswith("_"):
+            ids.add(start.get(w("id")))
+            start.getparent().remove(start)
+    for end in list(root.iter(w("bookmarkEnd"))):
+        if end.get(w("id")) in ids:
+            end.getparent().remove(end)
+    return len(ids)
+
+
+# (name of the VBA procedure, rule), applied in this order to each paragraph
+CITATION_RULES = [
+    ("NumbersRangesspaceEndash", number_ranges_en_dash),
+    ("removeciteincommabracket", remove_cite_from_separators),
+    ("expandrange", expand_cite_ranges),
+    ("replacesemicolon", remove_cite_from_colons),
+]
+DUPLICATE_RULE = "citationupdate duplicates"
+
+
+def normalize_citations(pkg):
+    """
+    Apply every citation rule, then the duplicate highlight, to the main
+    document in a single pass over its paragraphs, after removing its
+    bookmarks like the macro's RemoveAllBookmarks. Returns {rule name: changes}.
+    """
+    cite_id = find_style_id(load_styles(pkg), CITE_STYLE)
+    root = pkg.xml(DOCUMENT_PART)
+    counts = {"RemoveAllBookmarks": remove_bookmarks(root)}
+    counts.update({name: 0 for name, _ in CITATION_RULES})
+    counts[DUPLICATE_RULE] = 0
+    seen = set()
+    for p in root.iter(w("p")):
+        for name, rule in CITATION_RULES:
+            counts[name] += rule(p, cite_id)
+        counts[DUPLICATE_RULE] += highlight_duplicate_citations(p, cite_id, seen)
+    # The duplicate highlight changes the document whenever there are citations
+    if any(counts.values()) or seen:
+        pkg.mark_dirty(DOCUMENT_PART)
+    return counts
+
+
+def citation_word_steps():
+    """Procedures of citationupdateonly.citationupdate that still run in Word after update_citations."""
+    return CITATION_WORD_STEPS
+
+
+def _write_report(doc_path, counts):
+    stem = os.path.splitext(os.path.basename(doc_path))[0]
+    report_path = os.path.join(os.path.dirname(doc_path), f"{stem}_CitationUpdate.txt")
+    lines = [f"Citation update: {os.path.basename(doc_path)} :", ""]
+    lines += [f"{name}: {count}" for name, count in counts.items()]
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return report_path
+
+
+def update_citations(doc_path):
+    """
+    Native part of citationupdateonly.citationupdate: the text normalization
+    and duplicate highlight; the content-control stages follow in Word
+    (citation_word_steps). Saves doc_path when anything changed and writes
+    the per-rule counts to <name>_CitationUpdate.txt. Returns a list of error
+    strings.
+    """
+    if not is_docx(doc_path):
+        return [f"Citation update skipped, not a .docx: {os.path.basename(doc_path)}"]
+
+    with DocxPackage(doc_path) as pkg:
+        counts = normalize_citations(pkg)
+        if pkg.dirty:
+            pkg.save()
+    if any(counts.values()):
+        _write_report(doc_path, counts)
+    return []
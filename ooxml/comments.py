@@ -0,0 +1,69 @@
+import weakref
+from datetime import datetime, timezone
+from lxml import etree
+from ooxml.package import W_NS, w, DOCUMENT_PART, XML_SPACE
+
+COMMENTS_PART = "word/comments.xml"
+COMMENTS_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.comments+xml"
+COMMENTS_REL_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/comments"
+
+COMMENT_AUTHOR = "S4C"
+
+# Next free comment id per open package, so adding many comments does not
+# rescan comments.xml each time
+_next_ids = weakref.WeakKeyDictionary()
+
+
+def _comments_root(pkg):
+    root = pkg.xml(COMMENTS_PART)
+    if root is None:
+        root = etree.Element(w("comments"), nsmap={"w": W_NS})
+        pkg.add_part(COMMENTS_PART, root, COMMENTS_CONTENT_TYPE)
+        pkg.add_relationship(DOCUMENT_PART, COMMENTS_REL_TYPE, "comments.xml")
+    return root
+
+
+def add_comment(pkg, p, text, author=COMMENT_AUTHOR, start_run=None, end_run=None):
+    """
+    Anchor a Word comment on paragraph p, or on start_run..end_run within it,
+    the equivalent of ActiveDocument.Comments.Add. Returns the comment id.
+    """
+    root = _comments_root(pkg)
+    next_id = _next_ids.get(pkg)
+    if next_id is None:
+        next_id = max((int(c.get(w("id"))) for c in root.iter(w("comment"))), default=-1) + 1
+    _next_ids[pkg] = next_id + 1
+    comment_id = str(next_id)
+
+    comment = etree.SubElement(root, w("comment"))
+    comment.set(w("id"), comment_id)
+    comment.set(w("author"), author)
+    comment.set(w("initials"), "".join(part[0] for part in author.split() if part)[:9])
+    comment.set(w("date"), datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"))
+    cp = etree.SubElement(comment, w("p"))
+    cr = etree.SubElement(cp, w("r"))
+    ct = etree.SubElement(cr, w("t"))
+    ct.text = text
+    ct.set(XML_SPACE, "preserve")
+
+    range_start = etree.Element(w("commentRangeStart"))
+    range_start.set(w("id"), comment_id)
+    range_end = etree.Element(w("commentRangeEnd"))
+    range_end.set(w("id"), comment_id)
+    reference = etree.Element(w("r"))
+    etree.SubElement(reference, w("commentReference")).set(w("id"), comment_id)
+
+    if start_run is not None:
+        start_run.addprevious(range_start)
+    else:
+        ppr = p.find(w("pPr"))
+        p.insert(0 if ppr is None else p.index(ppr) + 1, range_start)
+    if end_run is not None:
+        end_run.addnext(range_end)
+    else:
+        p.append(range_end)
+    range_end.addnext(reference)
+
+    pkg.mark_dirty(COMMENTS_PART)
+    pkg.mark_dirty(DOCUMENT_PART)
+    return comment_id
@@ -0,0 +1,281 @@
+import os
+from collections import defaultdict
+from datetime import datetime
+from ooxml.package import (DocxPackage, is_docx, w, DOCUMENT_PART, paragraph_runs, run_text, run_spans,
+                           run_highlight, in_text_box, highlight_spans)
+from ooxml.comments import COMMENTS_PART
+from ooxml.extract import (Pages, saved_pages, in_fallback, FOOTNOTES_PART, ENDNOTES_PART, A_BLIP, V_IMAGEDATA,
+                           count_notes)
+from ooxml.scripts import script_table
+from dashboard_report import (CitationAnalyzer, build_detailed_summary_table, build_comments_html,
+                              iter_export_highlight_html, write_dashboard_html, DASHBOARD_CSS, DASHBOARD_JS)
+
+
+def escape_html(s):
+    return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+
+class DashboardData:
+    """Everything GenerateDashboardReport reads from the document, gathered in one pass per story."""
+
+    def __init__(self):
+        self.paragraphs = []  # (text, page, is_caption, is_highlighted), main story
+        self.comments = []  # (author, text, page)
+        self.formatting = []  # (page, category, details)
+        self.multilingual = []  # (type, page, character, description)
+        self.images = 0
+        self.footnotes = 0
+        self.endnotes = 0
+        self.words = 0
+        self.pages = 1
+        self.changed_parts = set()
+
+
+def remove_bookmarks_and_content_controls(pkg):
+    """RemoveAllBookmarks and RemoveAllContentControls: content controls are unwrapped, keeping their content."""
+    for part in pkg.story_parts():
+        root = pkg.xml(part)
+        if root is None:
+            continue
+        changed = False
+        for el in list(root.iter(w("bookmarkStart"), w("bookmarkEnd"))):
+            el.getparent().remove(el)
+            changed = True
+        # Innermost first, so nested controls are unwrapped into their parents
+        for sdt in reversed(list(root.iter(w("sdt")))):
+            parent = sdt.getparent()
+            index = parent.index(sdt)
+            content = sdt.find(w("sdtContent"))
+            parent.remove(sdt)
+            if content is not None:
+                for offset, child in enumerate(list(content)):
+                    parent.insert(index + offset, child)
+            changed = True
+        if changed:
+            pkg.mark_dirty(part)
+
+
+def _marked_runs(p, test):
+    """Text of consecutive runs for which test(rPr) holds, as Word's formatted Find returns them."""
+    found = []
+    current = []
+    for r in paragraph_runs(p):
+        rpr = r.find(w("rPr"))
+        if rpr is not None and test(rpr):
+            current.append(run_text(r))
+        elif current:
+            found.append("".join(current))
+            current = []
+    if current:
+        found.append("".join(current))
+    return [t for t in found if t]
+
+
+def _toggle_on(rpr, *tags):
+    for tag in tags:
+        el = rpr.find(w(tag))
+        if el is not None and el.get(w("val"), "true").lower() not in ("0", "false", "off"):
+            return True
+    return False
+
+
+def _highlight_multilingual(p, text):
+    """Highlight multilingual characters by type. Returns [(type, character, description)]."""
+    found = []
+    spans = defaultdict(list)
+    for start, end, script in script_table().spans(text):
+        spans[script.color].append((start, end))
+        found += [(script.name, ch, script.description) for ch in text[start:end]]
+    for color, color_spans in spans.items():
+        highlight_spans(p, color_spans, color)
+    return found
+
+
+def collect_dashboard_data(pkg, caption_test):
+    """
+    Walk the main document once for paragraphs, pages, formatting,
+    multilingual characters, images and note/comment anchors, then the
+    other stories for their multilingual characters. Multilingual
+    characters are highlighted as the macro does.
+    """
+    data = DashboardData()
+    root = pkg.xml(DOCUMENT_PART)
+    pages = Pages(saved_pages(pkg))
+
+    paragraphs = list(root.iter(w("p")))
+    records = []  # (text, is_highlighted, [formatting], [multilingual], main story)
+    anchors = {}  # (kind, id) -> paragraph index
+    section_ends = []
+    for n, p in enumerate(paragraphs):
+        text = "".join(run_text(r) for r in paragraph_runs(p))
+        pages.add(p, len(text))
+
+        multilingual = _highlight_multilingual(p, text)
+        if multilingual:
+            data.changed_parts.add(DOCUMENT_PART)
+
+        formatting = [("Strikethrough", t) for t in _marked_runs(p, lambda rpr: _toggle_on(rpr, "strike", "dstrike"))]
+        formatting += [("Hidden", t) for t in _marked_runs(p, lambda rpr: _toggle_on(rpr, "vanish"))]
+        if p.find(f"{w('pPr')}/{w('sectPr')}") is not None:
+            section_ends.append(n)
+
+        for tag, kind in ((w("footnoteReference"), "footnote"), (w("endnoteReference"), "endnote"),
+                          (w("commentRangeStart"), "comment"), (w("commentReference"), "comment")):
+            for ref in p.iter(tag):
+                anchors.setdefault((kind, ref.get(w("id"))), n)
+
+        highlighted = any(run_highlight(r) not in (None, "none") for r, s, e in run_spans(p) if e > s)
+        main_story = not in_text_box(p)
+        if main_story:
+            data.words += len(text.split())
+        records.append((text, highlighted, formatting, multilingual, main_story))
+
+    paragraph_pages = pages.resolve()
+    data.pages = pages.total
+    for n, (text, highlighted, formatting, multilingual, main_story) in enumerate(records):
+        page = paragraph_pages[n]
+        data.multilingual += [(char_type, page, ch, d) for char_type, ch, d in multilingual]
+        data.formatting += [(page, category, details) for category, details in formatting]
+        stripped = text.strip()
+        if main_story and stripped:
+            data.paragraphs.append((stripped, page, caption_test(stripped), highlighted))
+
+    # The body's own sectPr ends the last section
+    if records:
+        section_ends.append(len(records) - 1)
+    data.formatting += [(paragraph_pages[n], "Section Break", "(Section Break)") for n in section_ends]
+
+    index_of = {p: n for n, p in enumerate(paragraphs)}
+    for box in root.iter(w("txbxContent")):
+        if in_fallback(box):
+            continue
+        box_text = " ".join("".join(run_text(r) for r in paragraph_runs(p)) for p in box.iter(w("p"))).strip()
+        if box_text:
+            anchor = box.getparent()
+            while anchor is not None and anchor.tag != w("p"):
+                anchor = anchor.getparent()
+            index = index_of.get(anchor)
+            data.formatting.append((paragraph_pages[index] if index is not None else "N/A", "Text Frame", box_text))
+
+    data.images = sum(1 for el in root.iter(A_BLIP, V_IMAGEDATA) if not in_fallback(el))
+
+    data.footnotes = count_notes(pkg, FOOTNOTES_PART, "footnote")
+    data.endnotes = count_notes(pkg, ENDNOTES_PART, "endnote")
+
+    comments = pkg.xml(COMMENTS_PART)
+    if comments is not None:
+        for c in comments.iter(w("comment")):
+            text = "\r".join("".join(run_text(r) for r in paragraph_runs(p)) for p in c.iter(w("p")))
+            anchor = anchors.get(("comment", c.get(w("id"))))
+            data.comments.append((c.get(w("author")) or "", text, paragraph_pages[anchor] if anchor is not None else "N/A"))
+
+    for part in pkg.story_parts():
+        if part == DOCUMENT_PART:
+            continue
+        story = pkg.xml(part)
+        if story is None:
+            continue
+        kind = {FOOTNOTES_PART: "footnote", ENDNOTES_PART: "endnote", COMMENTS_PART: "comment"}.get(part)
+        for holder in story:
+            anchor = anchors.get((kind, holder.get(w("id")))) if kind else None
+            page = paragraph_pages[anchor] if anchor is not None else "N/A"
+            for p in holder.iter(w("p")):
+                found = _highlight_multilingual(p, "".join(run_text(r) for r in paragraph_runs(p)))
+                if found:
+                    data.multilingual += [(char_type, page, ch, d) for char_type, ch, d in found]
+                    data.changed_parts.add(part)
+
+    for part in data.changed_parts:
+        pkg.mark_dirty(part)
+    return data
+
+
+def formatting_html(rows):
+    """Generate_Formatting_HTML's table."""
+    return "".join(iter_formatting_html(rows))
+
+
+def iter_formatting_html(rows):
+    yield "<table><thead><tr><th>Type</th><th>Page</th><th>Category</th><th>Details</th></tr></thead><tbody>"
+    for page, category, details in rows:
+        yield (f"<tr><td>Formatting</td><td>{page}</td><td>{category}</td>"
+               f"<td>{escape_html(details)}</td></tr>")
+    yield "</tbody></table>"
+    if rows:
+        yield f"<p><b>Total Formatting Items: {len(rows)}</b></p>"
+
+
+def multilingual_html(rows):
+    """Generate_MultilingualChars_HTML's table, one row per character, with per-type totals."""
+    return "".join(iter_multilingual_html(rows))
+
+
+def iter_multilingual_html(rows):
+    yield "<table><thead><tr><th>Language/Type</th><th>Page</th><th>Character</th><th>Details</th></tr></thead><tbody>"
+    counts = {}
+    for char_type, page, ch, description in rows:
+        yield f"<tr><td>{char_type}</td><td>{page}</td><td>{escape_html(ch)}</td><td>{description}</td></tr>"
+        counts[char_type] = counts.get(char_type, 0) + 1
+    yield "</tbody></table>"
+    if rows:
+        yield (f"<p><b>Total Special/Foreign Characters: {len(rows)}</b><br>"
+               + "<br>".join(f"{char_type}: {count}" for char_type, count in counts.items()) + "</p>")
+
+
+def generate_dashboard_report(doc_path, analyst=None):
+    """
+    Native replacement for msrpre.GenerateDashboardReport. Removes
+    bookmarks and content controls, highlights multilingual characters and
+    writes <name>_Analysis_Dashboard.html beside the document using the
+    dashboard_report table builders; analyst is the requesting user. Returns
+    a list of error strings.
+    """
+    if not is_docx(doc_path):
+        return [f"Dashboard report skipped, not a .docx: {os.path.basename(doc_path)}"]
+
+    doc_name = os.path.basename(doc_path)
+    analyzer = CitationAnalyzer()
+    with DocxPackage(doc_path) as pkg:
+        remove_bookmarks_and_content_controls(pkg)
+        data = collect_dashboard_data(pkg, analyzer.is_caption_paragraph)
+        if pkg.dirty:
+            pkg.save()
+
+    dict_types = analyzer.analyze_document_citations([(t, page, cap) for t, page, cap, _ in data.paragraphs])
+    fmt_html = formatting_html(data.formatting)
+    spec_html = multilingual_html(data.multilingual)
+    com_html = build_comments_html(data.comments)
+    summary_html = build_detailed_summary_table(
+        dict_types,
+        data.images,
+        len(dict_types.get("Table", {}).get("Caption", {})),
+        data.footnotes,
+        data.endnotes,
+        fmt_html,
+        spec_html,
+        com_html,
+    )
+
+    stem = os.path.splitext(doc_name)[0]
+    write_dashboard_html(
+        os.path.join(os.path.dirname(doc_path), f"{stem}_Analysis_Dashboard.html"),
+        doc_name=doc_name,
+        pages=data.pages,
+        words=f"{data.words:,}",
+        ce_pages=-(-data.words // 250),
+        date=datetime.now().strftime("%d-%m-%Y"),
+        analyst=analyst or "Analyst",
+        detailed_summary=summary_html,
+        msr_content=analyzer.iter_citation_tables_html(dict_types, doc_name),
+        fmt_content=fmt_html,
+        spec_content=spec_html,
+        comment_content=com_html,
+        export_highlight=iter_export_highlight_html(data.paragraphs),
+        images=data.images,
+        footnotes=data.footnotes,
+        endnotes=data.endnotes,
+        css=DASHBOARD_CSS,
+        js=DASHBOARD_JS,
+        logo_path="",
+    )
+    return []
@@ -0,0 +1,304 @@
+import os
+import re
+import hashlib
+import unicodedata
+from datetime import datetime
+from lxml import etree
+from ooxml.package import (DocxPackage, is_docx, load_styles, find_style_id, w, DOCUMENT_PART,
+                           paragraph_style_id, run_style_id, run_text, paragraph_runs,
+                           run_highlight, set_run_highlight)
+
+REF_PARA_STYLE = "REF-N"
+BIB_NUMBER_STYLE = "bib_number"
+
+# Same threshold and colours as HighlightFuzzyAndExactDuplicates2
+SIMILARITY_THRESHOLD = 0.6
+ORIGINAL_COLOR = "green"   # wdBrightGreen
+DUPLICATE_COLOR = "yellow"  # wdYellow
+
+# Banded MinHash index: two references become a candidate pair when all
+# ROWS values of at least one of BANDS bands agree
+SHINGLE_SIZE = 3
+BANDS = 32
+ROWS = 3
+
+DOI_RE = re.compile(r"10\.\d{4,9}/[^\s\"<>]+", re.IGNORECASE)
+DOI_PREFIX_RE = re.compile(r"(https?://(dx\.)?doi\.org/|\bdoi\s*:?\s*)", re.IGNORECASE)
+NON_WORD_RE = re.compile(r"[^\w]+", re.UNICODE)
+
+
+class Reference:
+    def __init__(self, index, paragraph, number_runs, number, text):
+        self.index = index
+        self.paragraph = paragraph
+        self.number_runs = number_runs
+        self.number = number
+        self.text = text
+        self.doi = None
+        self.normalized = ""
+
+
+def normalize_reference(text):
+    """
+    Comparison form of a reference: (doi, text). The DOI is lower-cased and
+    stripped of resolver prefixes; the text is case- and accent-folded with
+    punctuation removed, runs of initials joined ('J. A.' and 'JA' -> 'ja')
+    and 'and'/'&' dropped from author lists.
+    """
+    doi = None
+    match = DOI_RE.search(text)
+    if match:
+        doi = match.group(0).rstrip(".,;)]").lower()
+        text = text[:match.start()] + text[match.end():]
+    text = DOI_PREFIX_RE.sub(" ", text)
+
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    tokens = [t for t in NON_WORD_RE.sub(" ", text.replace("&", " ")).split() if t != "and"]
+
+    merged = []
+    in_initials = False
+    for token in tokens:
+        initial = len(token) == 1 and token.isalpha()
+        if initial and in_initials:
+            merged[-1] += token
+        else:
+            merged.append(token)
+        in_initials = initial
+    return doi, " ".join(merged)
+
+
+def levenshtein_distance(a, b):
+    """
+    Edit distance with Myers' bit-parallel algorithm (Hyyro's formulation):
+    one column of the DP matrix is a pair of bit vectors over a, so the cost
+    is len(b) big-int steps instead of len(a) * len(b) cell updates.
+    """
+    if not a:
+        return len(b)
+    peq = {}
+    for i, ch in enumerate(a):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+    mask = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    pv, mv, score = mask, 0, len(a)
+    for ch in b:
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+    return score
+
+
+def levenshtein_ratio(a, b, threshold=0.0):
+    """1 - distance / max(len) as in the macro's FuzzyMatch; 0.0 when the lengths alone rule out the threshold."""
+    if not a and not b:
+        return 1.0
+    longest = max(len(a), len(b))
+    if abs(len(a) - len(b)) > (1.0 - threshold) * longest:
+        return 0.0
+    return 1.0 - levenshtein_distance(a, b) / longest
+
+
+def _shingle_hash(shingle, cache):
+    h = cache.get(shingle)
+    if h is None:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+        cache[shingle] = h
+    return h
+
+
+def minhash_signature(text, hash_cache):
+    """
+    One-permutation MinHash: each shingle hash goes to bin (h % K) and the bin
+    keeps its minimum, so a signature costs one hash per shingle instead of K.
+    Empty bins borrow the next filled bin (rotation densification).
+    """
+    k = BANDS * ROWS
+    padded = f" {text} "
+    shingles = {padded[i:i + SHINGLE_SIZE] for i in range(max(1, len(padded) - SHINGLE_SIZE + 1))}
+    bins = [None] * k
+    for shingle in shingles:
+        h = _shingle_hash(shingle, hash_cache)
+        b, v = h % k, h // k
+        if bins[b] is None or v < bins[b]:
+            bins[b] = v
+
+    filled = [i for i, v in enumerate(bins) if v is not None]
+    if not filled:
+        return tuple((0, 0) for _ in range(k))
+    signature = []
+    for i in range(k):
+        offset = 0
+        while bins[(i + offset) % k] is None:
+            offset += 1
+        signature.append((bins[(i + offset) % k], offset))
+    return tuple(signature)
+
+
+def candidate_pairs(references):
+    """(i, j) index pairs, i < j, that share an exact key or at least one LSH band."""
+    pairs = set()
+    exact = {}
+    for ref in references:
+        for key in filter(None, (ref.doi and ("doi", ref.doi), ref.normalized and ("text", ref.normalized))):
+            exact.setdefault(key, []).append(ref.index)
+
+    buckets = {}
+    hash_cache = {}
+    for ref in references:
+        if not ref.normalized:
+            continue
+        sig = minhash_signature(ref.normalized, hash_cache)
+        for band in range(BANDS):
+            buckets.setdefault((band, sig[band * ROWS:(band + 1) * ROWS]), []).append(ref.index)
+
+    for group in list(exact.values()) + list(buckets.values()):
+        if len(group) < 2:
+            continue
+        for a in range(len(group)):
+            for b in range(a + 1, len(group)):
+                pairs.add((group[a], group[b]) if group[a] < group[b] else (group[b], group[a]))
+    return pairs
+
+
+def _is_duplicate(a, b, threshold):
+    if a.doi and a.doi == b.doi:
+        return True
+    if a.normalized == b.normalized:
+        return True
+    return levenshtein_ratio(a.normalized, b.normalized, threshold) >= threshold
+
+
+def match_duplicates(references, threshold=SIMILARITY_THRESHOLD):
+    """
+    Returns [(original, duplicate)] in the macro's order: each reference not
+    already marked as a duplicate is compared with the later ones, so the
+    first of a group stays the original.
+    """
+    by_index = {ref.index: ref for ref in references}
+    later = {}
+    for i, j in candidate_pairs(references):
+        later.setdefault(i, []).append(j)
+
+    duplicates = set()
+    matches = []
+    for ref in references:
+        if ref.index in duplicates:
+            continue
+        for j in sorted(later.get(ref.index, [])):
+            other = by_index[j]
+            if _is_duplicate(ref, other, threshold):
+                duplicates.add(j)
+                matches.append((ref, other))
+    return matches
+
+
+def read_references(root, ref_id, bib_id):
+    references = []
+    for p in root.iter(w("p")):
+        if paragraph_style_id(p) != ref_id:
+            continue
+        runs = paragraph_runs(p)
+        number_runs = [r for r in runs if bib_id and run_style_id(r) == bib_id]
+        number = "".join(run_text(r) for r in number_runs).strip()
+        # The number differs between a reference and its duplicate, so it is left out
+        text = "".join(run_text(r) for r in runs if r not in number_runs).strip()
+        ref = Reference(len(references), p, number_runs, number, text)
+        ref.doi, ref.normalized = normalize_reference(text)
+        references.append(ref)
+    return references
+
+
+def _set_runs_text(runs, text):
+    for n, r in enumerate(runs):
+        for t in r.findall(w("t")):
+            r.remove(t)
+        if n == 0:
+            t = etree.SubElement(r, w("t"))
+            t.text = text
+            t.set("{http://www.w3.org/XML/1998/namespace}space", "preserve")
+
+
+def _highlight_paragraph(p, color):
+    for r in paragraph_runs(p):
+        set_run_highlight(r, color)
+
+
+def _write_report(doc_path, matches):
+    stem = os.path.splitext(os.path.basename(doc_path))[0]
+    report_path = os.path.join(os.path.dirname(doc_path), f"{stem}_DuplicateReference.txt")
+    # Same wording as FindAndStoreContentControlMismatches
+    lines = [f"Duplications: {os.path.basename(doc_path)} :", ""]
+    lines += [f"Orginal number: {orig.number}, Duplicate Number: {dup.number}"
+              for orig, dup in matches if orig.number and dup.number]
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n\n")
+    return report_path
+
+
+def _write_duplicate_copy(doc_path, ref_id):
+    """Like CopyMatchingContentControls: a side document with only the highlighted references."""
+    stem = os.path.splitext(os.path.basename(doc_path))[0]
+    stamp = datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
+    copy_path = os.path.join(os.path.dirname(doc_path), f"{stem}_DuplicateReference_{stamp}.docx")
+
+    with DocxPackage(doc_path) as pkg:
+        root = pkg.xml(DOCUMENT_PART)
+        body = root.find(w("body"))
+        keep = [p for p in body.iter(w("p"))
+                if paragraph_style_id(p) == ref_id
+                and any(run_highlight(r) in (ORIGINAL_COLOR, DUPLICATE_COLOR) for r in paragraph_runs(p))]
+        sect_pr = body.find(w("sectPr"))
+        for child in list(body):
+            if child is not sect_pr:
+                body.remove(child)
+        for n, p in enumerate(keep):
+            body.insert(n, p)
+        pkg.mark_dirty(DOCUMENT_PART)
+        pkg.save(copy_path)
+    return copy_path
+
+
+def find_duplicate_references(doc_path, threshold=SIMILARITY_THRESHOLD):
+    """
+    Native replacement for Copyduplicate.duplicate4. Highlights the first of
+    each group of duplicate REF-N references bright green and the later ones
+    yellow, gives the later ones the original's bib_number (as the macro's
+    content-control swap does) and writes the _DuplicateReference report and
+    side document. Returns a list of error strings.
+    """
+    if not is_docx(doc_path):
+        return [f"Duplicate check skipped, not a .docx: {os.path.basename(doc_path)}"]
+
+    with DocxPackage(doc_path) as pkg:
+        styles = load_styles(pkg)
+        ref_id = find_style_id(styles, REF_PARA_STYLE)
+        if ref_id is None:
+            return []
+        root = pkg.xml(DOCUMENT_PART)
+        references = read_references(root, ref_id, find_style_id(styles, BIB_NUMBER_STYLE))
+        matches = match_duplicates(references, threshold)
+        if not matches:
+            return []
+
+        for original, duplicate in matches:
+            _highlight_paragraph(original.paragraph, ORIGINAL_COLOR)
+            _highlight_paragraph(duplicate.paragraph, DUPLICATE_COLOR)
+            if original.number and duplicate.number_runs:
+                _set_runs_text(duplicate.number_runs, original.number)
+        pkg.mark_dirty(DOCUMENT_PART)
+        pkg.save()
+
+    _write_report(doc_path, matches)
+    _write_duplicate_copy(doc_path, ref_id)
+    return []
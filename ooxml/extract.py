@@ -0,0 +1,161 @@
+from lxml import etree
+from ooxml.package import (DocxPackage, is_docx, w, DOCUMENT_PART, APP_PROPS_PART, paragraph_runs, run_text,
+                           run_spans, run_highlight, in_text_box)
+from ooxml.comments import COMMENTS_PART
+from ooxml.preflight import EP_NS
+
+FOOTNOTES_PART = "word/footnotes.xml"
+ENDNOTES_PART = "word/endnotes.xml"
+
+MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+A_BLIP = "{http://schemas.openxmlformats.org/drawingml/2006/main}blip"
+V_IMAGEDATA = "{urn:schemas-microsoft-com:vml}imagedata"
+
+
+class Pages:
+    """
+    Page numbers without a layout engine. Word stores the page breaks it
+    rendered at the last save; when those are missing or stale the page is
+    estimated from the paragraph's character offset and the saved page count.
+    """
+
+    def __init__(self, saved_pages):
+        self.saved_pages = saved_pages
+        self.offsets = []  # characters up to the end of each paragraph
+        self.breaks = []  # page breaks up to the end of each paragraph
+        self._chars = 0
+        self._breaks = 0
+
+    def add(self, p, length):
+        rendered = sum(1 for _ in p.iter(w("lastRenderedPageBreak")))
+        manual = sum(1 for br in p.iter(w("br")) if br.get(w("type")) == "page")
+        self._chars += length + 1
+        self._breaks += max(rendered, manual)
+        self.offsets.append(self._chars)
+        self.breaks.append(self._breaks)
+
+    @property
+    def total(self):
+        return self.saved_pages or self._breaks + 1
+
+    def resolve(self):
+        """Page number of each added paragraph."""
+        total = self.total
+        if self._breaks + 1 >= total * 0.9 or not self._chars:
+            return [min(b + 1, total) for b in self.breaks]
+        return [min(total, 1 + offset * total // self._chars) for offset in self.offsets]
+
+
+def saved_pages(pkg):
+    """Page count Word recorded in docProps/app.xml at the last save, or None."""
+    if not pkg.has_part(APP_PROPS_PART):
+        return None
+    el = etree.fromstring(pkg.read_bytes(APP_PROPS_PART)).find(f"{{{EP_NS}}}Pages")
+    if el is not None and (el.text or "").strip().isdigit():
+        return int(el.text)
+    return None
+
+
+def in_fallback(el):
+    """True inside mc:Fallback, the legacy copy of content Word renders from mc:Choice."""
+    parent = el.getparent()
+    while parent is not None:
+        if parent.tag == MC_FALLBACK:
+            return True
+        parent = parent.getparent()
+    return False
+
+
+def _iterparse(pkg, part, tags, events=("end",)):
+    return etree.iterparse(pkg.open_part(part), events=events, tag=tags, huge_tree=True, resolve_entities=False)
+
+
+def _release(el):
+    """Free a finished body or table-cell paragraph and the siblings before it."""
+    parent = el.getparent()
+    if parent is not None and parent.tag in (w("body"), w("tc")):
+        el.clear()
+        while el.getprevious() is not None:
+            del parent[0]
+
+
+def count_notes(pkg, part, tag):
+    """Footnotes or endnotes in a notes part, without Word's separator and continuation notes."""
+    if not pkg.has_part(part):
+        return 0
+    count = 0
+    for _, note in _iterparse(pkg, part, w(tag)):
+        if note.get(w("type")) in (None, "normal"):
+            count += 1
+        note.clear()
+    return count
+
+
+def extract_package(pkg, caption_test):
+    """
+    (paragraphs, comments, img_count, footnotes, endnotes) as extract_with_word
+    returns them, read in one streaming pass over word/document.xml:
+
+    - paragraphs: (text, page, is_caption, is_highlighted) for the non-empty
+      paragraphs of the main story; is_highlighted when any run carries a
+      highlight
+    - comments: (author, text, page) from comments.xml, paged by their anchor
+    - img_count: pictures (DrawingML blips and VML image data)
+    - footnotes, endnotes: note counts
+    """
+    pages = Pages(saved_pages(pkg))
+    records = []  # (text, is_highlighted) per main-story paragraph
+    anchors = {}  # comment id -> index of the paragraph it starts in
+    images = 0
+    fallback_depth = 0
+
+    p_tag = w("p")
+    tags = (p_tag, w("commentRangeStart"), w("commentReference"), A_BLIP, V_IMAGEDATA, MC_FALLBACK)
+    for event, el in _iterparse(pkg, DOCUMENT_PART, tags, events=("start", "end")):
+        if el.tag == MC_FALLBACK:
+            fallback_depth += 1 if event == "start" else -1
+            continue
+        if event == "start" or fallback_depth:
+            continue
+        if el.tag == p_tag:
+            if in_text_box(el):
+                continue
+            spans = run_spans(el)
+            text = "".join(run_text(r) for r, _, _ in spans)
+            highlighted = any(e > s and run_highlight(r) not in (None, "none") for r, s, e in spans)
+            pages.add(el, len(text))
+            # Stripped as the python-docx extraction did; blank paragraphs are dropped below
+            records.append((text.strip(), highlighted))
+            _release(el)
+        elif el.tag in (A_BLIP, V_IMAGEDATA):
+            images += 1
+        else:
+            # A range start between paragraphs belongs to the next one
+            anchors.setdefault(el.get(w("id")), len(records))
+
+    paragraph_pages = pages.resolve()
+    paragraphs = [(text, paragraph_pages[n], caption_test(text), highlighted)
+                  for n, (text, highlighted) in enumerate(records) if text]
+
+    comments = []
+    if pkg.has_part(COMMENTS_PART):
+        for _, c in _iterparse(pkg, COMMENTS_PART, w("comment")):
+            text = "\r".join("".join(run_text(r) for r in paragraph_runs(p)) for p in c.iter(p_tag)).strip("\r")
+            anchor = anchors.get(c.get(w("id")))
+            if anchor is None:
+                page = "N/A"
+            else:
+                page = paragraph_pages[min(anchor, len(paragraph_pages) - 1)] if paragraph_pages else 1
+            comments.append((c.get(w("author")) or "", text, page))
+            c.clear()
+
+    return (paragraphs, comments, images, count_notes(pkg, FOOTNOTES_PART, "footnote"),
+            count_notes(pkg, ENDNOTES_PART, "endnote"))
+
+
+def extract_docx(doc_path, caption_test):
+    """extract_package for a .docx on disk; the document is only read."""
+    if not is_docx(doc_path):
+        raise ValueError(f"Not a .docx file: {doc_path}")
+    with DocxPackage(doc_path) as pkg:
+        return extract_package(pkg, caption_test)
@@ -0,0 +1,278 @@
+import re
+import json
+from ooxml.package import (DocxPackage, load_styles, find_style_id, w, DOCUMENT_PART, paragraph_style_id,
+                           paragraph_runs, run_spans, run_text, in_text_box, highlight_spans, format_spans,
+                           HIGHLIGHT_COLORS)
+
+GROUP_RE = re.compile(r"\(\?P<(\w+)>")
+
+
+def trie_pattern(literals):
+    """
+    Regex for a set of literals with shared prefixes factored out, e.g.
+    ['liter', 'liters', 'lung'] -> 'l(?:iter(?:s)?|ung)'. The regex engine then
+    rejects a position after one character comparison per branch instead of
+    trying every literal; optional tails are greedy, so the longest wins.
+    """
+    trie = {}
+    for literal in literals:
+        node = trie
+        for ch in literal:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        if "" in node:
+            return f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
+class RuleSet:
+    """
+    One rule set from a rules file, e.g. the patterns of one VBA highlight
+    procedure. Optional keys:
+      color            highlight colour (ST_HighlightColor); null to only format
+      ignore_case, whole_word
+      literals, suffixes, regex
+      exclude_styles   paragraph styles to skip
+      only_styles      paragraph styles to search (all others skipped)
+      exclude_within   regexes whose matches shield text, e.g. quoted passages
+      skip_superscript drop matches touching superscript runs
+      paragraph_color  highlight the whole paragraph when the rule applies to it
+      formats          {regex group name: run properties} for parts of a match
+      stories          "main" (body and tables, like Content.Find) or "all"
+    """
+
+    def __init__(self, spec, default_color):
+        self.name = spec["name"]
+        self.color = spec.get("color", default_color)
+        self.ignore_case = spec.get("ignore_case", False)
+        self.whole_word = spec.get("whole_word", False)
+        self.exclude_styles = tuple(spec.get("exclude_styles", []))
+        self.only_styles = tuple(spec.get("only_styles", []))
+        self.exclude_within = tuple(spec.get("exclude_within", []))
+        self.skip_superscript = spec.get("skip_superscript", False)
+        self.paragraph_color = spec.get("paragraph_color")
+        self.formats = spec.get("formats", {})
+        self.stories = spec.get("stories", "main")
+        for color in (self.color, self.paragraph_color):
+            if color is not None and color not in HIGHLIGHT_COLORS:
+                raise ValueError(f"Rule set '{self.name}' has unknown highlight colour '{color}'")
+        if self.stories not in ("main", "all"):
+            raise ValueError(f"Rule set '{self.name}' has unknown stories '{self.stories}'")
+
+        literals = {lit + suffix for lit in spec.get("literals", []) for suffix in spec.get("suffixes", [""])}
+        if self.ignore_case:
+            literals = {lit.lower() for lit in literals}
+        alternatives = [trie_pattern(literals)] if literals else []
+        alternatives += spec.get("regex", [])
+        if not alternatives:
+            raise ValueError(f"Rule set '{self.name}' has no literals or regex patterns")
+
+        pattern = "|".join(alternatives)
+        if self.whole_word:
+            pattern = rf"(?<!\w)(?:{pattern})(?!\w)"
+        self.pattern = f"(?i:{pattern})" if self.ignore_case else f"(?:{pattern})"
+        compiled = re.compile(self.pattern)  # fail on load rather than mid-batch
+        missing = set(self.formats) - set(compiled.groupindex)
+        if missing:
+            raise ValueError(f"Rule set '{self.name}' formats unknown groups {sorted(missing)}")
+
+    def scoped_pattern(self, index):
+        """The pattern with its named groups prefixed, so rule sets can share group names."""
+        return GROUP_RE.sub(lambda m: f"(?P<r{index}_{m.group(1)}>", self.pattern)
+
+    @property
+    def condition(self):
+        return self.exclude_styles, self.only_styles, self.exclude_within, self.skip_superscript, self.stories
+
+
+class Match:
+    __slots__ = ("rule", "start", "end", "groups")
+
+    def __init__(self, rule, start, end, groups):
+        self.rule = rule
+        self.start = start
+        self.end = end
+        self.groups = groups
+
+
+class HighlightMatcher:
+    """
+    Runs every rule set over a paragraph's text in one regex scan.
+
+    Rule sets are combined into a single alternation inside a lookahead, so
+    the scan skips positions where no rule can match in one pass. The
+    alternation only reports the first rule matching at a position, so
+    there the later rules of the scanner are tried on their own as well;
+    matches of different rules may overlap, as they do when the macro runs
+    its Find loops one after another. Rule sets that only apply to some
+    paragraphs (style filters, shielded text, superscript, story scope) are
+    compiled into their own scanner.
+    """
+
+    def __init__(self, rule_sets):
+        self.rule_sets = rule_sets
+        groups = {}
+        for i, rule in enumerate(rule_sets):
+            groups.setdefault(rule.condition, []).append(i)
+        self.scanners = []
+        for condition, indexes in groups.items():
+            patterns = [f"(?P<r{i}>{rule_sets[i].scoped_pattern(i)})" for i in indexes]
+            shields = [re.compile(p) for p in condition[2]]
+            rules = [(i, re.compile(p)) for i, p in zip(indexes, patterns)]
+            self.scanners.append((condition, shields, re.compile(f"(?=(?:{'|'.join(patterns)}))"), rules))
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        color = data.get("color", "yellow")
+        return cls([RuleSet(spec, color) for spec in data["rule_sets"]])
+
+    @property
+    def needs_all_stories(self):
+        return any(rule.stories == "all" for rule in self.rule_sets)
+
+    def scan(self, text, paragraph_style=None, style_ids=None, superscript_spans=None, main_story=True):
+        """
+        [Match] for one paragraph's text. style_ids maps each rule's style
+        name tuple to resolved style ids; superscript_spans is a callable,
+        only evaluated when a skip_superscript rule matches.
+        """
+        style_ids = style_ids or {}
+        superscript = None
+        matches = []
+        for (exclude_styles, only_styles, _, skip_superscript, stories), shields, regex, rules in self.scanners:
+            if not main_story and stories == "main":
+                continue
+            if exclude_styles and paragraph_style in style_ids.get(exclude_styles, ()):
+                continue
+            if only_styles and paragraph_style not in style_ids.get(only_styles, ()):
+                continue
+            shielded = [m.span() for shield in shields for m in shield.finditer(text)]
+
+            resume_at = {}
+            for hit in regex.finditer(text):
+                pos = hit.start()
+                first = int(hit.lastgroup[1:])
+                for index, rule_regex in rules:
+                    if index < first:
+                        continue
+                    m = hit if index == first else rule_regex.match(text, pos)
+                    if m is None:
+                        continue
+                    start, end = m.span(f"r{index}")
+                    # Like a Find loop, a rule resumes after the end of its previous match
+                    if end <= start or start < resume_at.get(index, 0):
+                        continue
+                    resume_at[index] = end
+                    if any(s < end and start < e for s, e in shielded):
+                        continue
+                    if skip_superscript and superscript_spans is not None:
+                        if superscript is None:
+                            superscript = superscript_spans()
+                        if any(s < end and start < e for s, e in superscript):
+                            continue
+                    groups = {}
+                    for group in self.rule_sets[index].formats:
+                        span = m.span(f"r{index}_{group}")
+                        if span[1] > span[0]:
+                            groups[group] = span
+                    matches.append(Match(index, start, end, groups))
+        return matches
+
+
+def _merge(spans):
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(s) for s in merged]
+
+
+def _superscript_spans(p):
+    spans = []
+    for r, start, end in run_spans(p):
+        va = r.find(f"{w('rPr')}/{w('vertAlign')}")
+        if va is not None and va.get(w("val")) == "superscript":
+            spans.append((start, end))
+    return spans
+
+
+def resolve_rule_styles(matcher, styles):
+    """Style name tuples used by exclude_styles/only_styles -> sets of style ids in this document."""
+    style_ids = {}
+    for rule in matcher.rule_sets:
+        for names in (rule.exclude_styles, rule.only_styles):
+            if names and names not in style_ids:
+                style_ids[names] = {find_style_id(styles, n) for n in names} - {None}
+    return style_ids
+
+
+def highlight_paragraph(p, matcher, style_ids, main_story=True, counts=None):
+    """Apply every rule to one paragraph in rule order, so later rules win where they overlap."""
+    text = "".join(run_text(r) for r in paragraph_runs(p))
+    if not text.strip():
+        return False
+    matches = matcher.scan(text, paragraph_style_id(p), style_ids, lambda: _superscript_spans(p), main_story)
+    if not matches:
+        return False
+
+    by_rule = {}
+    for match in matches:
+        by_rule.setdefault(match.rule, []).append(match)
+    for index in sorted(by_rule):
+        rule = matcher.rule_sets[index]
+        rule_matches = by_rule[index]
+        if counts is not None:
+            counts[rule.name] += len(rule_matches)
+        if rule.paragraph_color:
+            highlight_spans(p, [(0, len(text))], rule.paragraph_color)
+        if rule.color:
+            highlight_spans(p, _merge((m.start, m.end) for m in rule_matches), rule.color)
+        for group, properties in rule.formats.items():
+            spans = [m.groups[group] for m in rule_matches if group in m.groups]
+            if spans:
+                format_spans(p, _merge(spans), properties)
+    return True
+
+
+def highlight_package(pkg, matcher):
+    """
+    Highlight every rule match in an open package. Rules with stories "main"
+    search Word's main story (body and tables, not text boxes, headers or
+    notes); "all" rules also search those. Returns {rule set name: matches}.
+    """
+    counts = {rule.name: 0 for rule in matcher.rule_sets}
+    style_ids = resolve_rule_styles(matcher, load_styles(pkg))
+    parts = pkg.story_parts() if matcher.needs_all_stories else [DOCUMENT_PART]
+    for part in parts:
+        root = pkg.xml(part)
+        if root is None:
+            continue
+        changed = False
+        for p in root.iter(w("p")):
+            main_story = part == DOCUMENT_PART and not in_text_box(p)
+            if highlight_paragraph(p, matcher, style_ids, main_story, counts):
+                changed = True
+        if changed:
+            pkg.mark_dirty(part)
+    return counts
+
+
+def apply_highlights(doc_path, matcher):
+    """Highlight doc_path in place. Returns {rule set name: matches}."""
+    with DocxPackage(doc_path) as pkg:
+        counts = highlight_package(pkg, matcher)
+        if pkg.dirty:
+            pkg.save()
+    return counts
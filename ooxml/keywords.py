@@ -0,0 +1,72 @@
+import os
+import re
+import json
+from config import KEYWORD_RULES_FOLDER, KEYWORD_DEFAULT_RULES
+from ooxml.highlight import trie_pattern
+from ooxml.terminology import ISBN_RE
+
+
+class KeywordMatcher:
+    """
+    The PPD keyword highlight: each keyword of a rules file, whole-word and
+    case-insensitive, together with the token that follows it. The keywords
+    are compiled once into a single trie-shaped regex, so a paragraph is
+    scanned once however many keywords the publisher lists.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = tuple(keywords)
+        if not self.keywords:
+            raise ValueError("Keyword rules list no keywords")
+        self.pattern = re.compile(r"\b(" + trie_pattern({k.lower() for k in self.keywords}) + r")\b\s+(\S+)",
+                                  re.IGNORECASE)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)["keywords"])
+
+    def spans(self, text):
+        """(start, end) of each keyword plus its next token in text."""
+        return [m.span() for m in self.pattern.finditer(text)]
+
+
+def _rules_path(name):
+    return os.path.join(KEYWORD_RULES_FOLDER, f"{name}.json")
+
+
+def rules_for_document(doc_path):
+    """Keyword rules whose isbn_prefixes match the ISBN in the file name, else the default rules."""
+    match = ISBN_RE.search(os.path.basename(doc_path).replace("-", ""))
+    if match and os.path.isdir(KEYWORD_RULES_FOLDER):
+        for file_name in sorted(os.listdir(KEYWORD_RULES_FOLDER)):
+            if not file_name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(KEYWORD_RULES_FOLDER, file_name), encoding="utf-8") as f:
+                    prefixes = json.load(f).get("isbn_prefixes", [])
+            except (OSError, ValueError):
+                continue
+            if any(match.group(0).startswith(p) for p in prefixes):
+                return file_name[:-5]
+    return KEYWORD_DEFAULT_RULES
+
+
+_matchers = {}
+
+
+def keyword_matcher(name):
+    """Compiled matcher for a rules file, rebuilt only when the file changes."""
+    path = _rules_path(name)
+    key = (name, os.path.getmtime(path))
+    matcher = _matchers.get(key)
+    if matcher is None:
+        matcher = KeywordMatcher.from_file(path)
+        for stale in [k for k in _matchers if k[0] == name]:
+            del _matchers[stale]
+        _matchers[key] = matcher
+    return matcher
+
+
+def keyword_matcher_for(doc_path):
+    return keyword_matcher(rules_for_document(doc_path))
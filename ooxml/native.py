@@ -0,0 +1,51 @@
+from ooxml.duplicates import find_duplicate_references
+from ooxml.citations import update_citations, citation_word_steps
+from ooxml.technical import apply_technical_highlights, technical_word_steps
+from ooxml.preediting import apply_preediting_highlights
+from ooxml.spelling import check_spelling, spellcheck_available
+from ooxml.terminology import validate_terminology
+from ooxml.readability import analyze_readability
+from ooxml.style_audit import check_style_consistency
+from ooxml.dashboard import generate_dashboard_report
+
+# Route macros with a Python/OOXML implementation. Each callable takes the
+# path of a closed .docx, edits it in place and returns a list of error strings.
+NATIVE_MACROS = {
+    "Copyduplicate.duplicate4": find_duplicate_references,
+    "citationupdateonly.citationupdate": update_citations,
+    "techinal.technicalhighlight": apply_technical_highlights,
+    "Prediting.Preditinghighlight": apply_preediting_highlights,
+    "msrpre.GenerateDashboardReport": generate_dashboard_report,
+    "LanguageEdit.TerminologyValidation": validate_terminology,
+    "LanguageEdit.ReadabilityAnalysis": analyze_readability,
+    "LanguageEdit.StyleConsistency_Check": check_style_consistency,
+}
+
+# Without a base word list the Word macro keeps doing the spell check
+if spellcheck_available():
+    NATIVE_MACROS["LanguageEdit.SpellCheck_Advanced"] = check_spelling
+
+# Native macros that name the requesting user in their output
+ANALYST_MACROS = {"msrpre.GenerateDashboardReport"}
+
+# Partially ported macros: procedures that still have to run in Word after
+# the native part, in order
+WORD_STEPS = {
+    "techinal.technicalhighlight": technical_word_steps,
+    "citationupdateonly.citationupdate": citation_word_steps,
+}
+
+
+def is_native(macro_name):
+    return macro_name in NATIVE_MACROS
+
+
+def word_steps(macro_name):
+    steps = WORD_STEPS.get(macro_name)
+    return list(steps()) if steps else []
+
+
+def run_native_macro(macro_name, doc_path, user=None):
+    if macro_name in ANALYST_MACROS:
+        return NATIVE_MACROS[macro_name](doc_path, analyst=user)
+    return NATIVE_MACROS[macro_name](doc_path)
@@ -0,0 +1,423 @@
+import os
+import copy
+import re
+import shutil
+import zipfile
+import tempfile
+from lxml import etree
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+NS = {"w": W_NS}
+
+DOCUMENT_PART = "word/document.xml"
+STYLES_PART = "word/styles.xml"
+APP_PROPS_PART = "docProps/app.xml"
+CONTENT_TYPES_PART = "[Content_Types].xml"
+
+CT_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+STORY_PART_RE = re.compile(r"^word/(document|header\d*|footer\d*|footnotes|endnotes|comments)\.xml$")
+
+
+def w(tag: str) -> str:
+    """Clark-notation name for a WordprocessingML tag, e.g. w('p')."""
+    return f"{{{W_NS}}}{tag}"
+
+
+def is_docx(path: str) -> bool:
+    return path.lower().endswith(".docx") and zipfile.is_zipfile(path)
+
+
+class DocxPackage:
+    """
+    Minimal read/modify/write access to the XML parts of a .docx.
+
+    Parts are parsed lazily with lxml (which keeps namespace prefixes intact,
+    so Word accepts the result) and only parts passed to mark_dirty() are
+    re-serialized on save(); everything else is copied through unchanged.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._zip = zipfile.ZipFile(path)
+        self._names = set(self._zip.namelist())
+        self._trees = {}
+        self._dirty = set()
+        self._added = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+    def has_part(self, name: str) -> bool:
+        return name in self._names
+
+    def read_bytes(self, name: str) -> bytes:
+        return self._zip.read(name)
+
+    def open_part(self, name: str):
+        """Binary stream of a part straight from the zip, for iterparse over large parts."""
+        return self._zip.open(name)
+
+    def xml(self, name: str):
+        """Parsed root element of a part, or None if the part does not exist."""
+        if name not in self._trees:
+            if name not in self._names:
+                return None
+            parser = etree.XMLParser(remove_blank_text=False, resolve_entities=False, huge_tree=True)
+            self._trees[name] = etree.fromstring(self._zip.read(name), parser)
+        return self._trees[name]
+
+    def set_bytes(self, name: str, data: bytes):
+        """Replace a part with raw bytes (for streaming rewrites that bypass the tree)."""
+        self._trees[name] = data
+        self._dirty.add(name)
+
+    def mark_dirty(self, name: str):
+        self._dirty.add(name)
+
+    def add_part(self, name: str, root, content_type: str):
+        """Add a new XML part and register its content type."""
+        self._trees[name] = root
+        self._names.add(name)
+        self._added.append(name)
+        self._dirty.add(name)
+
+        types = self.xml(CONTENT_TYPES_PART)
+        override = etree.SubElement(types, f"{{{CT_NS}}}Override")
+        override.set("PartName", "/" + name)
+        override.set("ContentType", content_type)
+        self.mark_dirty(CONTENT_TYPES_PART)
+
+    def add_relationship(self, source: str, rel_type: str, target: str) -> str:
+        """Add a relationship from source (e.g. word/document.xml) and return its rId."""
+        folder, filename = os.path.split(source)
+        rels_name = f"{folder}/_rels/{filename}.rels" if folder else f"_rels/{filename}.rels"
+        rels = self.xml(rels_name)
+        if rels is None:
+            rels = etree.Element(f"{{{PKG_REL_NS}}}Relationships", nsmap={None: PKG_REL_NS})
+            self._trees[rels_name] = rels
+            self._names.add(rels_name)
+            self._added.append(rels_name)
+
+        ids = {el.get("Id") for el in rels}
+        n = len(ids) + 1
+        while f"rId{n}" in ids:
+            n += 1
+        rel = etree.SubElement(rels, f"{{{PKG_REL_NS}}}Relationship")
+        rel.set("Id", f"rId{n}")
+        rel.set("Type", rel_type)
+        rel.set("Target", target)
+        self.mark_dirty(rels_name)
+        return f"rId{n}"
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._dirty)
+
+    def story_parts(self):
+        """Names of the parts that hold document text (body, headers, footers, notes, comments)."""
+        return sorted(n for n in self._names if STORY_PART_RE.match(n))
+
+    def save(self, out_path: str = None):
+        out_path = out_path or self.path
+        fd, tmp_path = tempfile.mkstemp(suffix=".docx", dir=os.path.dirname(os.path.abspath(out_path)))
+        os.close(fd)
+        try:
+            with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as out:
+                for info in self._zip.infolist():
+                    if info.filename in self._dirty:
+                        tree = self._trees[info.filename]
+                        data = tree if isinstance(tree, bytes) else etree.tostring(
+                            tree, xml_declaration=True, encoding="UTF-8", standalone=True)
+                        out.writestr(info, data, compress_type=zipfile.ZIP_DEFLATED)
+                    else:
+                        out.writestr(info, self._zip.read(info.filename))
+                for name in self._added:
+                    out.writestr(name, etree.tostring(self._trees[name], xml_declaration=True,
+                                                      encoding="UTF-8", standalone=True))
+            same_file = os.path.abspath(out_path) == os.path.abspath(self.path)
+            if same_file:
+                self.close()
+            shutil.move(tmp_path, out_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def load_styles(pkg: DocxPackage) -> dict:
+    """styleId -> {'name': ..., 'type': ...} from styles.xml."""
+    styles = {}
+    root = pkg.xml(STYLES_PART)
+    if root is None:
+        return styles
+    for st in root.iter(w("style")):
+        style_id = st.get(w("styleId"))
+        name_el = st.find(w("name"))
+        styles[style_id] = {
+            "name": name_el.get(w("val")) if name_el is not None else style_id,
+            "type": st.get(w("type")),
+        }
+    return styles
+
+
+def find_style_id(styles: dict, name: str):
+    """Resolve a style by display name or id (case-insensitive); Word often drops '_' from ids."""
+    wanted = name.lower()
+    for style_id, info in styles.items():
+        if (info["name"] or "").lower() == wanted:
+            return style_id
+    for style_id in styles:
+        if style_id and style_id.lower() in (wanted, wanted.replace("_", "")):
+            return style_id
+    return None
+
+
+def paragraph_style_id(p):
+    ps = p.find(f"{w('pPr')}/{w('pStyle')}")
+    return ps.get(w("val")) if ps is not None else None
+
+
+def run_style_id(r):
+    rs = r.find(f"{w('rPr')}/{w('rStyle')}")
+    return rs.get(w("val")) if rs is not None else None
+
+
+def run_text(r) -> str:
+    parts = []
+    for el in r:
+        if el.tag == w("t"):
+            parts.append(el.text or "")
+        elif el.tag == w("tab"):
+            parts.append("\t")
+        elif el.tag in (w("br"), w("cr")):
+            parts.append("\n")
+        elif el.tag == w("noBreakHyphen"):
+            parts.append("-")
+    return "".join(parts)
+
+
+def _owning_paragraph(el):
+    parent = el.getparent()
+    while parent is not None and parent.tag != w("p"):
+        parent = parent.getparent()
+    return parent
+
+
+def paragraph_runs(p):
+    """
+    Runs of a paragraph in order, including those nested in hyperlinks, smart
+    tags and field results, but not runs of text boxes anchored inside it.
+    """
+    return [r for r in p.iter(w("r"))
+            if r.getparent().tag != w("del") and _owning_paragraph(r) is p]
+
+
+def paragraph_text(p) -> str:
+    return "".join(run_text(r) for r in paragraph_runs(p))
+
+
+def iter_paragraphs(root):
+    return root.iter(w("p"))
+
+
+# CT_RPr child order from the schema; Word rejects run properties out of sequence
+RPR_ORDER = [
+    "rStyle", "rFonts", "b", "bCs", "i", "iCs", "caps", "smallCaps", "strike", "dstrike",
+    "outline", "shadow", "emboss", "imprint", "noProof", "snapToGrid", "vanish", "webHidden",
+    "color", "spacing", "w", "kern", "position", "sz", "szCs", "highlight", "u", "effect",
+    "bdr", "shd", "fitText", "vertAlign", "rtl", "cs", "em", "lang", "eastAsianLayout",
+    "specVanish", "oMath",
+]
+_RPR_RANK = {w(tag): i for i, tag in enumerate(RPR_ORDER)}
+
+
+def set_run_property(r, tag: str, val: str = None):
+    """Create or update w:rPr/w:<tag> on a run, inserted in schema order."""
+    rpr = r.find(w("rPr"))
+    if rpr is None:
+        rpr = etree.Element(w("rPr"))
+        r.insert(0, rpr)
+    el = rpr.find(w(tag))
+    if el is None:
+        el = etree.Element(w(tag))
+        rank = _RPR_RANK.get(w(tag), len(RPR_ORDER))
+        pos = len(rpr)
+        for i, child in enumerate(rpr):
+            if _RPR_RANK.get(child.tag, len(RPR_ORDER)) > rank:
+                pos = i
+                break
+        rpr.insert(pos, el)
+    if val is not None:
+        el.set(w("val"), val)
+    return el
+
+
+# ST_HighlightColor values; Word's wdTurquoise is 'cyan' and wdBrightGreen is 'green'
+HIGHLIGHT_COLORS = {
+    "black", "blue", "cyan", "green", "magenta", "red", "yellow", "white", "darkBlue", "darkCyan",
+    "darkGreen", "darkMagenta", "darkRed", "darkYellow", "darkGray", "lightGray", "none",
+}
+
+
+def run_highlight(r):
+    hl = r.find(f"{w('rPr')}/{w('highlight')}")
+    return hl.get(w("val")) if hl is not None else None
+
+
+def set_run_highlight(r, color: str):
+    set_run_property(r, "highlight", color)
+
+
+def clear_run_highlight(r):
+    hl = r.find(f"{w('rPr')}/{w('highlight')}")
+    if hl is not None:
+        hl.getparent().remove(hl)
+
+
+XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+
+def _piece_length(el) -> int:
+    """Characters a run child contributes to run_text()."""
+    if el.tag == w("t"):
+        return len(el.text or "")
+    if el.tag in (w("tab"), w("br"), w("cr"), w("noBreakHyphen")):
+        return 1
+    return 0
+
+
+def in_text_box(p) -> bool:
+    """True for paragraphs of a text box, which Word's main-story Find does not search."""
+    parent = p.getparent()
+    while parent is not None:
+        if parent.tag == w("txbxContent"):
+            return True
+        parent = parent.getparent()
+    return False
+
+
+def run_spans(p):
+    """[(run, start, end)] character offsets of each run within paragraph_text(p)."""
+    spans = []
+    pos = 0
+    for r in paragraph_runs(p):
+        length = sum(_piece_length(el) for el in r)
+        spans.append((r, pos, pos + length))
+        pos += length
+    return spans
+
+
+def split_run(r, offset: int):
+    """
+    Split a run at a character offset into two sibling runs with the same
+    properties; a w:t straddling the offset is cut in two. Returns the right
+    half, or None when the offset falls on the run's edge.
+    """
+    pieces = [el for el in r if el.tag != w("rPr")]
+    total = sum(_piece_length(el) for el in pieces)
+    if offset <= 0 or offset >= total:
+        return None
+
+    right = etree.Element(r.tag, attrib=dict(r.attrib))
+    rpr = r.find(w("rPr"))
+    if rpr is not None:
+        right.append(copy.deepcopy(rpr))
+
+    pos = 0
+    for el in pieces:
+        length = _piece_length(el)
+        if pos >= offset:
+            right.append(el)  # moves el out of r
+        elif pos + length > offset:
+            cut = offset - pos
+            tail = etree.SubElement(right, w("t"))
+            tail.text = el.text[cut:]
+            tail.set(XML_SPACE, "preserve")
+            el.text = el.text[:cut]
+            el.set(XML_SPACE, "preserve")
+        pos += length
+
+    r.addnext(right)
+    return right
+
+
+def runs_in_spans(p, spans):
+    """
+    Runs covering [start, end) character ranges of a paragraph, after
+    splitting runs at the range edges so nothing outside the ranges is
+    included.
+    """
+    if not spans:
+        return []
+    edges = sorted({edge for span in spans for edge in span})
+    for r, start, end in run_spans(p):
+        # Split from the right so the offsets of the left part stay valid
+        for edge in reversed([e for e in edges if start < e < end]):
+            split_run(r, edge - start)
+
+    return [r for r, start, end in run_spans(p)
+            if end > start and any(s <= start and end <= e for s, e in spans)]
+
+
+def highlight_spans(p, spans, color: str) -> int:
+    """Highlight character ranges of a paragraph. Returns runs highlighted."""
+    runs = runs_in_spans(p, spans)
+    for r in runs:
+        set_run_highlight(r, color)
+    return len(runs)
+
+
+def format_spans(p, spans, properties: dict) -> int:
+    """
+    Apply run properties to character ranges, e.g. {'smallCaps': True,
+    'vertAlign': 'subscript'}; True writes a bare toggle element.
+    """
+    runs = runs_in_spans(p, spans)
+    for r in runs:
+        for tag, val in properties.items():
+            set_run_property(r, tag, None if val is True else str(val))
+    return len(runs)
+
+
+def replace_text_span(p, start: int, end: int, text: str):
+    """
+    Replace characters [start, end) of a paragraph with text, keeping the
+    formatting of the first run in the range. Returns the run holding text.
+    """
+    runs = runs_in_spans(p, [(start, end)])
+    if not runs:
+        return None
+    first = runs[0]
+    for el in [el for el in first if el.tag != w("rPr")]:
+        first.remove(el)
+    t = etree.SubElement(first, w("t"))
+    t.text = text
+    t.set(XML_SPACE, "preserve")
+    for r in runs[1:]:
+        r.getparent().remove(r)
+    return first
+
+
+def delete_text_spans(p, spans) -> int:
+    """
+    Delete character ranges of a paragraph. Only the text of the runs in the
+    ranges goes; their properties stay with the text around them, and runs
+    left with nothing but properties are removed. Returns runs touched.
+    """
+    runs = runs_in_spans(p, spans)
+    for r in runs:
+        for el in [el for el in r if _piece_length(el)]:
+            r.remove(el)
+        if all(el.tag == w("rPr") for el in r):
+            r.getparent().remove(r)
+    return len(runs)
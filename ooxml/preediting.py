@@ -0,0 +1,197 @@
+import os
+import re
+import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from ooxml.package import (DocxPackage, is_docx, w, DOCUMENT_PART, paragraph_runs, run_text, in_text_box,
+                           runs_in_spans, highlight_spans, replace_text_span, run_highlight, set_run_highlight,
+                           clear_run_highlight)
+from ooxml.highlight import HighlightMatcher, highlight_package
+from ooxml.comments import add_comment
+
+PREEDITING_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules", "preediting_highlight.json")
+
+# Options.DefaultHighlightColorIndex while the procedures below run
+MARK_COLOR = "green"          # wdBrightGreen
+REPLACED_COLOR = "darkGray"   # wdGray50, ReplaceAbbreviationsWithHighlight1
+
+TRADEMARK = "™"
+
+# HighlightAbbreviations5: case-insensitive, whole word
+ABBREVIATIONS = ["e.g.", "i.e.", "vs.", "etc.", "et al.", "Dr.", "Mr.", "Mrs.", "Ms.", "M.D.", "Prof.",
+                 "M.A.", "M.S.", "Bsc.", "MSc.", "Blvd.", "St.", "Ste."]
+ABBREVIATION_RE = re.compile(
+    r"(?<!\w)(?:%s)(?!\w)" % "|".join(re.escape(a) for a in sorted(ABBREVIATIONS, key=len, reverse=True)),
+    re.IGNORECASE)
+
+# ReplaceAbbreviationsWithHighlight1: case-sensitive, whole word, highlighted text only
+REPLACEMENTS = {
+    "e.g.": "eg", "i.e.": "ie", "vs.": "vs", "etc.": "etc", "et al.": "et al", "Dr.": "Dr", "Drs.": "Drs",
+    "Mr.": "Mr", "Mrs.": "Mrs", "Ms.": "Ms", "M.D.": "MD", "Prof.": "Prof", "M.A.": "MA", "M.S.": "MS",
+    "Bsc.": "Bsc", "MSc.": "MSc", "Blvd.": "Blvd", " St ": " St. ", " Ste ": " Ste. ",
+}
+REPLACEMENT_RE = re.compile(
+    r"(?<!\w)(?:%s)(?!\w)|%s" % (
+        "|".join(re.escape(a) for a in sorted(REPLACEMENTS, key=len, reverse=True) if not a.startswith(" ")),
+        "|".join(re.escape(a) for a in REPLACEMENTS if a.startswith(" "))))
+
+# Word's wildcard \(*\): the shortest run of text between brackets
+PARENTHETICAL_RE = re.compile(r"\(.*?\)")
+
+HEADING_MARKUP_RE = re.compile(r"<H(\d+)>", re.IGNORECASE)
+HEADING_COMMENT = "CE/TE: The heading levels are not in the correct hierarchy "
+
+
+@lru_cache(maxsize=1)
+def preediting_matcher():
+    return HighlightMatcher.from_file(PREEDITING_RULES_PATH)
+
+
+def _main_story_paragraphs(root):
+    return [p for p in root.iter(w("p")) if not in_text_box(p)]
+
+
+def _paragraph_text(p):
+    return "".join(run_text(r) for r in paragraph_runs(p))
+
+
+def convert_superscript_tm(paragraphs):
+    """TMchangetosymbol: superscript 'TM' becomes the trademark sign, highlighted. Returns replacements."""
+    count = 0
+    for p in paragraphs:
+        for r in paragraph_runs(p):
+            va = r.find(f"{w('rPr')}/{w('vertAlign')}")
+            if va is None or va.get(w("val")) != "superscript":
+                continue
+            changed = False
+            for t in r.findall(w("t")):
+                if t.text and re.search("tm", t.text, re.IGNORECASE):
+                    t.text, n = re.subn("tm", TRADEMARK, t.text, flags=re.IGNORECASE)
+                    count += n
+                    changed = True
+            if changed:
+                set_run_highlight(r, MARK_COLOR)
+    return count
+
+
+def _all_highlighted(p, start, end, color=None):
+    runs = runs_in_spans(p, [(start, end)])
+    if not runs:
+        return False
+    if color is None:
+        return all(run_highlight(r) not in (None, "none") for r in runs)
+    return all(run_highlight(r) == color for r in runs)
+
+
+def highlight_abbreviations(p):
+    """
+    HighlightAbbreviations for one paragraph: mark parentheticals and
+    abbreviations, replace the dotted forms that are now highlighted, then
+    clear parentheticals that are still uniformly marked, so only those
+    holding a replacement stay highlighted. Returns True if p was changed.
+    """
+    text = _paragraph_text(p)
+    if "(" not in text and not ABBREVIATION_RE.search(text):
+        return False
+    marked = [m.span() for m in PARENTHETICAL_RE.finditer(text)]
+    marked += [m.span() for m in ABBREVIATION_RE.finditer(text)]
+    if not marked:
+        return False
+    highlight_spans(p, marked, MARK_COLOR)
+
+    # Right to left, so the offsets of earlier matches stay valid
+    for m in reversed(list(REPLACEMENT_RE.finditer(text))):
+        if not _all_highlighted(p, m.start(), m.end()):
+            continue
+        run = replace_text_span(p, m.start(), m.end(), REPLACEMENTS[m.group(0)])
+        if run is not None:
+            set_run_highlight(run, REPLACED_COLOR)
+
+    text = _paragraph_text(p)
+    for m in PARENTHETICAL_RE.finditer(text):
+        if _all_highlighted(p, m.start(), m.end(), MARK_COLOR):
+            for r in runs_in_spans(p, [m.span()]):
+                clear_run_highlight(r)
+    return True
+
+
+def validate_heading_markup(pkg, paragraphs):
+    """ValidateHeadingMarkup_withcommnet: comment on <Hn> tags that skip a level. Returns comments added."""
+    last_level = 0
+    comments = 0
+    for p in paragraphs:
+        match = HEADING_MARKUP_RE.search(_paragraph_text(p))
+        if not match:
+            continue
+        level = int(match.group(1))
+        if level > last_level + 1:
+            add_comment(pkg, p, HEADING_COMMENT)
+            comments += 1
+        last_level = level
+    return comments
+
+
+def apply_preediting_highlights(doc_path):
+    """
+    Native replacement for Prediting.Preditinghighlight. Runs the macro's
+    steps in order on the package XML and saves doc_path once. Returns a
+    list of error strings.
+    """
+    if not is_docx(doc_path):
+        return [f"Pre-editing highlight skipped, not a .docx: {os.path.basename(doc_path)}"]
+
+    with DocxPackage(doc_path) as pkg:
+        root = pkg.xml(DOCUMENT_PART)
+        paragraphs = _main_story_paragraphs(root)
+        changed = convert_superscript_tm(paragraphs) > 0
+        for p in paragraphs:
+            changed = highlight_abbreviations(p) or changed
+        if changed:
+            pkg.mark_dirty(DOCUMENT_PART)
+        highlight_package(pkg, preediting_matcher())
+        validate_heading_markup(pkg, paragraphs)
+        if pkg.dirty:
+            pkg.save()
+    return []
+
+
+def _preedit_one(doc_path):
+    try:
+        return apply_preediting_highlights(doc_path)
+    except Exception as e:
+        return [f"Pre-editing highlight failed for {os.path.basename(doc_path)}: {e}"]
+
+
+def preedit_documents(doc_paths, workers=None):
+    """
+    Apply the pre-editing highlights to many documents on a process pool;
+    the work is CPU-bound XML processing, so threads would serialise on the
+    GIL. Returns {path: errors}.
+    """
+    doc_paths = list(doc_paths)
+    if not doc_paths:
+        return {}
+    if workers == 1 or len(doc_paths) == 1:
+        return {path: _preedit_one(path) for path in doc_paths}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(doc_paths, pool.map(_preedit_one, doc_paths)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply the Preditinghighlight pre-editing highlights to a folder of .docx files.")
+    parser.add_argument("folder")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    paths = [os.path.join(args.folder, name) for name in sorted(os.listdir(args.folder))
+             if name.lower().endswith(".docx") and not name.startswith("~$")]
+    failed = 0
+    for path, errors in preedit_documents(paths, args.workers).items():
+        print(f"{os.path.basename(path)}: {'; '.join(errors) if errors else 'ok'}")
+        failed += bool(errors)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
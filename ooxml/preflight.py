@@ -0,0 +1,178 @@
+import re
+import zipfile
+from lxml import etree
+from ooxml.package import (DocxPackage, is_docx, load_styles, find_style_id, w,
+                           DOCUMENT_PART, APP_PROPS_PART, paragraph_style_id, run_style_id, run_text,
+                           paragraph_runs)
+
+CITE_STYLE = "cite_bib"
+REF_PARA_STYLE = "REF-N"
+
+EP_NS = "http://schemas.openxmlformats.org/officeDocument/2006/extended-properties"
+
+
+def extract_citation_numbers(text):
+    """Same expansion as ReferenceValidator._extract_numbers: '2-4,7' -> [2, 3, 4, 7]."""
+    numbers = []
+    for match in re.finditer(r'(\d+)-(\d+)', text):
+        start, end = int(match.group(1)), int(match.group(2))
+        if end - start > 999:
+            numbers.extend([start, end])
+        elif end >= start:
+            numbers.extend(range(start, end + 1))
+    text_no_ranges = re.sub(r'\d+-\d+', '', text)
+    numbers.extend(int(m.group()) for m in re.finditer(r'\b\d+\b', text_no_ranges))
+    return numbers
+
+
+def citations_in_sequence(numbers):
+    seen = set()
+    unique = []
+    for n in numbers:
+        if n not in seen:
+            seen.add(n)
+            unique.append(n)
+    return unique == sorted(unique)
+
+
+class DocumentProbe:
+    """
+    Facts about one document gathered in a single pass over styles.xml,
+    document.xml and app.xml, used to decide which route macros can have any
+    effect before Word is involved.
+    """
+
+    def __init__(self):
+        self.words = 0
+        self.pages = 0
+        self.paragraphs = 0
+        self.text_paragraphs = 0
+        self.cite_style_defined = False
+        self.citation_texts = []
+        self.reference_paragraphs = 0
+
+    @property
+    def citation_numbers(self):
+        numbers = []
+        for text in self.citation_texts:
+            numbers.extend(extract_citation_numbers(text))
+        return numbers
+
+
+def probe_document(doc_path):
+    """Return a DocumentProbe, or None when the file is not a readable .docx."""
+    if not is_docx(doc_path):
+        return None
+
+    probe = DocumentProbe()
+    with DocxPackage(doc_path) as pkg:
+        styles = load_styles(pkg)
+        cite_id = find_style_id(styles, CITE_STYLE)
+        ref_id = find_style_id(styles, REF_PARA_STYLE)
+        probe.cite_style_defined = cite_id is not None
+
+        if pkg.has_part(APP_PROPS_PART):
+            app = etree.fromstring(pkg.read_bytes(APP_PROPS_PART))
+            for field in ("Words", "Pages"):
+                el = app.find(f"{{{EP_NS}}}{field}")
+                if el is not None and (el.text or "").strip().isdigit():
+                    setattr(probe, field.lower(), int(el.text))
+
+        root = pkg.xml(DOCUMENT_PART)
+        if root is None:
+            return probe
+
+        body_words = 0
+        for p in root.iter(w("p")):
+            probe.paragraphs += 1
+            if ref_id and paragraph_style_id(p) == ref_id:
+                probe.reference_paragraphs += 1
+
+            current = []
+            text_parts = []
+            for r in paragraph_runs(p):
+                text = run_text(r)
+                text_parts.append(text)
+                # Adjacent cite_bib runs form one citation; Word splits runs freely
+                if cite_id and run_style_id(r) == cite_id:
+                    current.append(text)
+                elif current:
+                    probe.citation_texts.append("".join(current))
+                    current = []
+            if current:
+                probe.citation_texts.append("".join(current))
+
+            para_text = "".join(text_parts)
+            if para_text.strip():
+                probe.text_paragraphs += 1
+                body_words += len(para_text.split())
+
+        # app.xml is only refreshed when Word saves; trust the body when they disagree
+        probe.words = max(probe.words, body_words)
+
+    return probe
+
+
+def _has_text(probe):
+    return probe.words > 0
+
+
+def _has_citations(probe):
+    return bool(probe.citation_numbers)
+
+
+def _needs_validation(probe):
+    return probe.cite_style_defined and (_has_citations(probe) or probe.reference_paragraphs > 0)
+
+
+def _needs_renumber(probe):
+    numbers = probe.citation_numbers
+    return bool(numbers) and not citations_in_sequence(numbers)
+
+
+def _has_duplicate_candidates(probe):
+    return probe.reference_paragraphs > 1
+
+
+# macro name -> (predicate, reason shown when the macro is skipped)
+APPLICABILITY_RULES = {
+    "Referencevalidation.ValidateBWNumCite_WithErrorHandling":
+        (_needs_validation, "no cite_bib citations or REF-N references"),
+    "ReferenceRenumber.Reorderbasedonseq":
+        (_needs_renumber, "citations already in sequence"),
+    "Copyduplicate.duplicate4":
+        (_has_duplicate_candidates, "fewer than two REF-N references"),
+    "citationupdateonly.citationupdate":
+        (_has_citations, "no cite_bib citations"),
+    "techinal.technicalhighlight": (_has_text, "document has no text"),
+    "Prediting.Preditinghighlight": (_has_text, "document has no text"),
+    "LanguageEdit.GrammarCheck_WithErrorHandling": (_has_text, "document has no text"),
+    "LanguageEdit.SpellCheck_Advanced": (_has_text, "document has no text"),
+    "LanguageEdit.StyleConsistency_Check": (_has_text, "document has no text"),
+    "LanguageEdit.ReadabilityAnalysis": (_has_text, "document has no text"),
+    "LanguageEdit.TerminologyValidation": (_has_text, "document has no text"),
+}
+
+
+def applicable_macros(doc_path, macro_names):
+    """
+    Split macro_names into (to_run, not_applicable) where not_applicable is a
+    list of (macro_name, reason). Unknown macros and unreadable files always run.
+    """
+    try:
+        probe = probe_document(doc_path)
+    except (OSError, zipfile.BadZipFile, etree.XMLSyntaxError, KeyError, ValueError):
+        probe = None
+
+    if probe is None:
+        return list(macro_names), []
+
+    to_run = []
+    skipped = []
+    for name in macro_names:
+        rule = APPLICABILITY_RULES.get(name)
+        if rule is None or rule[0](probe):
+            to_run.append(name)
+        else:
+            skipped.append((name, rule[1]))
+    return to_run, skipped
@@ -0,0 +1,167 @@
+import os
+import re
+import json
+from functools import lru_cache
+import numpy as np
+from ooxml.package import (DocxPackage, is_docx, load_styles, find_style_id, w, DOCUMENT_PART, paragraph_style_id,
+                           paragraph_text, in_text_box)
+
+# Reference lists are not prose and would drag every score down
+EXCLUDED_STYLES = ("REF-N", "REF-U")
+HEADING_STYLE_RE = re.compile(r"^(?:heading\s*[12]|h[12]a?|ct)$", re.IGNORECASE)
+HEADING_MARKUP_RE = re.compile(r"^\s*<(?:H[12]|CT)>", re.IGNORECASE)
+
+WORSTS = 10
+MIN_WORDS_FOR_WORST = 20
+
+WORD_RE = re.compile(r"[A-Za-z]+(?:['’-][A-Za-z]+)*")
+SENTENCE_END_RE = re.compile(r"[.!?]+(?=[\s\"'”’)\]]|$)")
+VOWEL_GROUP_RE = re.compile(r"[aeiouy]+")
+
+
+@lru_cache(maxsize=65536)
+def syllables(word):
+    """Vowel-group syllable estimate with the usual silent-e and -le/-es/-ed corrections."""
+    word = word.lower().replace("’", "'")
+    if len(word) <= 3:
+        return 1
+    count = len(VOWEL_GROUP_RE.findall(word))
+    if word.endswith("e") and not word.endswith(("le", "ee", "ye")):
+        count -= 1
+    elif word.endswith(("es", "ed")) and not word.endswith(("ies", "ted", "ded", "ses", "zes", "ches", "shes")):
+        count -= 1
+    return max(1, count)
+
+
+def count_arrays(texts):
+    """
+    Per-paragraph (sentences, words, syllables, polysyllables) as an (n, 4)
+    array. The paragraphs are tokenized in one pass over their joined text
+    and the counts are binned by paragraph with numpy.
+    """
+    n = len(texts)
+    if not n:
+        return np.zeros((0, 4), dtype=np.int64)
+    joined = "\n".join(texts)
+    starts = np.cumsum([0] + [len(t) + 1 for t in texts[:-1]])
+
+    words = [(m.start(), m.group(0)) for m in WORD_RE.finditer(joined)]
+    word_para = np.searchsorted(starts, np.fromiter((pos for pos, _ in words), np.int64, len(words)), "right") - 1
+    word_syllables = np.fromiter((syllables(word) for _, word in words), np.int64, len(words))
+    ends = np.fromiter((m.start() for m in SENTENCE_END_RE.finditer(joined)), np.int64)
+    end_para = np.searchsorted(starts, ends, "right") - 1
+
+    word_count = np.bincount(word_para, minlength=n)
+    sentences = np.where(word_count > 0, np.maximum(np.bincount(end_para, minlength=n), 1), 0)
+    return np.column_stack([
+        sentences,
+        word_count,
+        np.bincount(word_para, weights=word_syllables, minlength=n).astype(np.int64),
+        np.bincount(word_para, weights=word_syllables >= 3, minlength=n).astype(np.int64),
+    ])
+
+
+def scores(sentences, words, syllable_total, polysyllables):
+    """
+    Flesch reading ease, Gunning fog and SMOG for count arrays (or scalars).
+    Entries without words come back as NaN.
+    """
+    sentences = np.asarray(sentences, dtype=float)
+    words = np.asarray(words, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        words_per_sentence = words / sentences
+        syllables_per_word = np.asarray(syllable_total, dtype=float) / words
+        complex_share = np.asarray(polysyllables, dtype=float) / words
+        flesch = 206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word
+        fog = 0.4 * (words_per_sentence + 100.0 * complex_share)
+        smog = 1.0430 * np.sqrt(np.asarray(polysyllables, dtype=float) * 30.0 / sentences) + 3.1291
+    empty = words == 0
+    return tuple(np.where(empty, np.nan, s) for s in (flesch, fog, smog))
+
+
+def _round(value):
+    value = float(value)
+    return None if np.isnan(value) else round(value, 1)
+
+
+def _summary(counts, mask):
+    totals = counts[mask].sum(axis=0)
+    flesch, fog, smog = scores(*totals)
+    return {
+        "paragraphs": int(mask.sum()),
+        "sentences": int(totals[0]),
+        "words": int(totals[1]),
+        "flesch_reading_ease": _round(flesch),
+        "gunning_fog": _round(fog),
+        "smog": _round(smog),
+    }
+
+
+def analyze_package(pkg):
+    """Document, per-section and worst-paragraph readability of the main story."""
+    styles = load_styles(pkg)
+    excluded = {find_style_id(styles, name) for name in EXCLUDED_STYLES} - {None}
+    root = pkg.xml(DOCUMENT_PART)
+
+    texts = []
+    section_titles = ["(before first heading)"]
+    section_of = []
+    for p in root.iter(w("p")):
+        if in_text_box(p):
+            continue
+        style_id = paragraph_style_id(p)
+        if style_id in excluded:
+            continue
+        text = paragraph_text(p)
+        style_name = styles.get(style_id, {}).get("name") or style_id or ""
+        if HEADING_STYLE_RE.match(style_name) or HEADING_MARKUP_RE.match(text):
+            section_titles.append(re.sub(r"<[^>]+>", "", text).strip() or style_name)
+            continue
+        if text.strip():
+            texts.append(text)
+            section_of.append(len(section_titles) - 1)
+
+    counts = count_arrays(texts)
+    keep = counts[:, 1] > 0
+    counts = counts[keep]
+    texts = [t for t, k in zip(texts, keep) if k]
+    sections_index = np.array(section_of, dtype=np.int64)[keep]
+    report = {"document": _summary(counts, np.ones(len(counts), dtype=bool)), "sections": [], "worst_paragraphs": []}
+    if not len(counts):
+        return report
+
+    for index in np.unique(sections_index):
+        summary = _summary(counts, sections_index == index)
+        report["sections"].append(dict(title=section_titles[index], **summary))
+
+    flesch, fog, smog = scores(counts[:, 0], counts[:, 1], counts[:, 2], counts[:, 3])
+    candidates = np.flatnonzero(counts[:, 1] >= MIN_WORDS_FOR_WORST)
+    worst = candidates[np.argsort(flesch[candidates], kind="stable")[:WORSTS]]
+    for i in worst:
+        report["worst_paragraphs"].append({
+            "section": section_titles[sections_index[i]],
+            "words": int(counts[i, 1]),
+            "flesch_reading_ease": _round(flesch[i]),
+            "gunning_fog": _round(fog[i]),
+            "smog": _round(smog[i]),
+            "text": texts[i][:300],
+        })
+    return report
+
+
+def analyze_readability(doc_path):
+    """
+    Native replacement for LanguageEdit.ReadabilityAnalysis. Writes
+    <name>_Readability.json; the document is not changed. Returns a list
+    of error strings.
+    """
+    if not is_docx(doc_path):
+        return [f"Readability analysis skipped, not a .docx: {os.path.basename(doc_path)}"]
+    with DocxPackage(doc_path) as pkg:
+        report = analyze_package(pkg)
+
+    stem = os.path.splitext(os.path.basename(doc_path))[0]
+    report_path = os.path.join(os.path.dirname(doc_path), f"{stem}_Readability.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(dict(file=os.path.basename(doc_path), **report), f, ensure_ascii=False, indent=2)
+    return []
@@ -0,0 +1,102 @@
+import os
+import re
+import json
+from functools import lru_cache
+from ooxml.package import HIGHLIGHT_COLORS
+
+SCRIPTS_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules", "scripts.json")
+
+
+class Script:
+    __slots__ = ("name", "description", "ranges", "color")
+
+    def __init__(self, name, description, ranges, color):
+        self.name = name
+        self.description = description
+        self.ranges = ranges  # [(low, high)] inclusive code points
+        self.color = color
+
+
+def _parse_range(text):
+    low, _, high = text.partition("-")
+    low = int(low, 16)
+    high = int(high, 16) if high else low
+    if not 0 <= low <= high <= 0x10FFFF:
+        raise ValueError(f"Bad code point range '{text}'")
+    return low, high
+
+
+class ScriptTable:
+    """
+    Code point -> script lookup for the multilingual report.
+
+    Text is scanned by one compiled character class holding every range, so
+    ordinary text costs the same however many scripts are listed. Characters
+    it stops at are classified through a table per 256-code-point block,
+    built once; where ranges overlap the earlier script wins.
+    """
+
+    def __init__(self, scripts):
+        if len(scripts) > 255:
+            raise ValueError("At most 255 scripts are supported")
+        self.scripts = scripts
+        blocks = {}
+        for index, script in enumerate(scripts, start=1):
+            for low, high in script.ranges:
+                for code in range(low, high + 1):
+                    table = blocks.setdefault(code >> 8, bytearray(256))
+                    if not table[code & 0xFF]:
+                        table[code & 0xFF] = index
+        self._blocks = {block: bytes(table) for block, table in blocks.items()}
+
+        ranges = sorted(r for script in scripts for r in script.ranges)
+        merged = []
+        for low, high in ranges:
+            if merged and low <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], high)
+            else:
+                merged.append([low, high])
+        self._pattern = re.compile("[" + "".join(f"\\U{low:08x}-\\U{high:08x}" for low, high in merged) + "]+")
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as f:
+            specs = json.load(f)["scripts"]
+        scripts = []
+        for spec in specs:
+            color = spec.get("color", "yellow")
+            if color not in HIGHLIGHT_COLORS:
+                raise ValueError(f"Script '{spec['name']}' has unknown highlight colour '{color}'")
+            scripts.append(Script(spec["name"], spec.get("description", spec["name"]),
+                                  [_parse_range(r) for r in spec["ranges"]], color))
+        return cls(scripts)
+
+    def script_of(self, ch):
+        """The Script ch belongs to, or None."""
+        code = ord(ch)
+        table = self._blocks.get(code >> 8)
+        index = table[code & 0xFF] if table else 0
+        return self.scripts[index - 1] if index else None
+
+    def spans(self, text):
+        """(start, end, Script) for each run of characters of one script in text, in order."""
+        blocks = self._blocks
+        found = []
+        for m in self._pattern.finditer(text):
+            start = m.start()
+            current = 0
+            for i in range(start, m.end()):
+                code = ord(text[i])
+                index = blocks[code >> 8][code & 0xFF]
+                if index != current:
+                    if current:
+                        found.append((start, i, self.scripts[current - 1]))
+                    start = i
+                    current = index
+            found.append((start, m.end(), self.scripts[current - 1]))
+        return found
+
+
+@lru_cache(maxsize=1)
+def script_table():
+    return ScriptTable.from_file(SCRIPTS_RULES_PATH)
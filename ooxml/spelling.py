@@ -0,0 +1,292 @@
+import os
+import re
+import gzip
+from functools import lru_cache
+from config import SPELLCHECK_DICTIONARY, SPELLCHECK_CUSTOM_LISTS
+from ooxml.package import DocxPackage, is_docx, w, paragraph_runs, run_text, run_spans, highlight_spans
+from ooxml.comments import add_comment, COMMENTS_PART
+from ooxml.duplicates import levenshtein_distance
+
+FLAG_COLOR = "red"
+MAX_SUGGESTIONS = 3
+
+# SymSpell-style index: deletes of up to MAX_EDIT_DISTANCE characters from
+# the first PREFIX_LENGTH characters of each word. Lookups delete up to
+# LOOKUP_EDIT_DISTANCE characters from the misspelling's prefix.
+MAX_EDIT_DISTANCE = 1
+LOOKUP_EDIT_DISTANCE = 2
+PREFIX_LENGTH = 7
+
+# Comments are not allowed in headers and footers, only flagged there
+COMMENTABLE_PART_RE = re.compile(r"^word/(document|footnotes|endnotes)\.xml$")
+
+WORD_RE = re.compile(r"[A-Za-zÀ-ɏ]+(?:['’][A-Za-z]+)*")
+# Whole tokens, so "REF-12", "HbA1c" or "IL-6" are judged as one identifier
+TOKEN_RE = re.compile(r"[\w'’-]+")
+SKIP_CONTEXT_RE = re.compile(r"\S*(?:https?://|www\.|@)\S*")
+
+
+class Dawg:
+    """
+    Minimal acyclic word automaton (Daciuk et al.): words sharing a suffix
+    share its states, so a 100k-word list needs a fraction of a trie's
+    nodes. Each state is (edges dict, final flag); words are added in
+    sorted order and finished branches are merged with equivalent ones.
+    """
+
+    def __init__(self, words):
+        self.root = [{}, False]
+        self._register = {}
+        self._unchecked = []  # (parent, char, child) not yet minimized
+        self._previous = ""
+        self.size = 0
+        for word in sorted(set(words)):
+            self._insert(word)
+        self._minimize(0)
+        self._register = None
+
+    def _insert(self, word):
+        common = 0
+        for a, b in zip(word, self._previous):
+            if a != b:
+                break
+            common += 1
+        self._minimize(common)
+        node = self._unchecked[-1][2] if self._unchecked else self.root
+        for ch in word[common:]:
+            child = [{}, False]
+            node[0][ch] = child
+            self._unchecked.append((node, ch, child))
+            node = child
+        node[1] = True
+        self._previous = word
+        self.size += 1
+
+    def _minimize(self, down_to):
+        while len(self._unchecked) > down_to:
+            parent, ch, child = self._unchecked.pop()
+            key = (child[1], tuple((c, id(n)) for c, n in sorted(child[0].items())))
+            existing = self._register.get(key)
+            if existing is not None:
+                parent[0][ch] = existing
+            else:
+                self._register[key] = child
+
+    def __contains__(self, word):
+        node = self.root
+        for ch in word:
+            node = node[0].get(ch)
+            if node is None:
+                return False
+        return node[1]
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        stack = [(self.root, "")]
+        while stack:
+            node, prefix = stack.pop()
+            if node[1]:
+                yield prefix
+            for ch, child in node[0].items():
+                stack.append((child, prefix + ch))
+
+
+def _deletes(word, distance):
+    variants = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {v[:i] + v[i + 1:] for v in frontier for i in range(len(v))}
+        variants |= frontier
+    return variants
+
+
+def read_word_list(path):
+    """
+    Words of a plain list (optionally gzipped) or a Hunspell .dic; affix
+    flags after '/' and the count line are ignored.
+    """
+    words = []
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", errors="ignore") as f:
+        for n, line in enumerate(f):
+            line = line.strip()
+            if not line or line.startswith("#") or (n == 0 and line.isdigit()):
+                continue
+            words.append(line.split("/", 1)[0].lower())
+    return words
+
+
+class SpellChecker:
+    """
+    Dictionary lookups against a Dawg of the base and custom word lists,
+    with suggestions from a precomputed-deletion index built on first use.
+    """
+
+    def __init__(self, words):
+        self.words = Dawg(words)
+        self._deletes = None
+
+    @classmethod
+    def from_files(cls, dictionary_path, custom_paths=()):
+        words = read_word_list(dictionary_path)
+        for path in custom_paths:
+            if os.path.exists(path):
+                words += read_word_list(path)
+        return cls(words)
+
+    def known(self, word):
+        lower = word.lower()
+        if lower in self.words:
+            return True
+        if lower.endswith(("'s", "’s")) and lower[:-2] in self.words:
+            return True
+        return False
+
+    def _index(self):
+        if self._deletes is None:
+            index = {}
+            for word in self.words:
+                for variant in _deletes(word[:PREFIX_LENGTH], MAX_EDIT_DISTANCE):
+                    index.setdefault(variant, []).append(word)
+            self._deletes = index
+        return self._deletes
+
+    def suggestions(self, word, limit=MAX_SUGGESTIONS):
+        """
+        Dictionary words within edit distance 2 of word, closest first.
+
+        Candidates are the words whose first PREFIX_LENGTH letters match a
+        prefix of word after up to one deletion on the dictionary side and
+        two on word's side. That finds extra and missing letters,
+        transpositions and a substitution in the prefix plus anything after
+        it, but not two substitutions or two missing letters in the prefix.
+        """
+        lower = word.lower()
+        index = self._index()
+        candidates = set()
+        for variant in _deletes(lower[:PREFIX_LENGTH], LOOKUP_EDIT_DISTANCE):
+            candidates.update(index.get(variant, ()))
+        scored = []
+        for candidate in candidates:
+            if abs(len(candidate) - len(lower)) > 2:
+                continue
+            distance = levenshtein_distance(lower, candidate)
+            if distance <= 2:
+                scored.append((distance, candidate))
+        scored.sort()
+        return [_match_case(word, c) for _, c in scored[:limit]]
+
+
+def _match_case(original, suggestion):
+    if original.isupper():
+        return suggestion.upper()
+    if original[:1].isupper():
+        return suggestion[:1].upper() + suggestion[1:]
+    return suggestion
+
+
+def spellcheck_available():
+    return os.path.exists(SPELLCHECK_DICTIONARY)
+
+
+@lru_cache(maxsize=1)
+def spell_checker():
+    return SpellChecker.from_files(SPELLCHECK_DICTIONARY, tuple(SPELLCHECK_CUSTOM_LISTS))
+
+
+def _should_check_token(token):
+    # Word's proofing defaults: words with numbers (reference and figure
+    # labels such as "REF-12", "HbA1c", "CYP3A4") are ignored
+    return not any(ch.isdigit() for ch in token)
+
+
+def _should_check(word):
+    # Uppercase words (acronyms, gene and drug codes), mixed-case identifiers
+    # such as "mRNA", "NaCl" or "mmHg" and single letters are left to the editors
+    return len(word) > 1 and not word.isupper() and not any(ch.isupper() for ch in word[1:])
+
+
+def misspellings(text, checker):
+    """
+    [(start, end, word)] of unknown words in text, skipping URLs, e-mail
+    addresses, uppercase and mixed-case words and tokens containing digits.
+    """
+    skipped = [m.span() for m in SKIP_CONTEXT_RE.finditer(text)] if ("@" in text or "/" in text or "www" in text) else []
+    found = []
+    for t in TOKEN_RE.finditer(text):
+        if not _should_check_token(t.group(0)):
+            continue
+        if any(s <= t.start() < e for s, e in skipped):
+            continue
+        for m in WORD_RE.finditer(text, t.start(), t.end()):
+            word = m.group(0)
+            if not _should_check(word) or checker.known(word):
+                continue
+            found.append((m.start(), m.end(), word))
+    return found
+
+
+def check_package(pkg, checker):
+    """
+    Flag unknown words in every story part and comment the first occurrence
+    of each with suggestions. Returns {word: occurrences}.
+    """
+    occurrences = {}
+    commented = set()
+    for part in pkg.story_parts():
+        if part == COMMENTS_PART:
+            continue
+        root = pkg.xml(part)
+        if root is None:
+            continue
+        commentable = bool(COMMENTABLE_PART_RE.match(part))
+        changed = False
+        for p in root.iter(w("p")):
+            text = "".join(run_text(r) for r in paragraph_runs(p))
+            found = misspellings(text, checker)
+            if not found:
+                continue
+            first_seen = []
+            for start, end, word in found:
+                key = word.lower()
+                occurrences[key] = occurrences.get(key, 0) + 1
+                if commentable and key not in commented:
+                    commented.add(key)
+                    first_seen.append((start, end, word))
+            highlight_spans(p, [(s, e) for s, e, _ in found], FLAG_COLOR)
+            # Highlighting split the runs at every word edge
+            spans = run_spans(p) if first_seen else []
+            for start, end, word in first_seen:
+                runs = [r for r, s, e in spans if start <= s and e <= end and e > s]
+                if not runs:
+                    continue
+                suggestions = checker.suggestions(word)
+                note = f"Spelling: '{word}' is not in the dictionary."
+                if suggestions:
+                    note += f" Suggestions: {', '.join(suggestions)}"
+                add_comment(pkg, p, note, start_run=runs[0], end_run=runs[-1])
+            changed = True
+        if changed:
+            pkg.mark_dirty(part)
+    return occurrences
+
+
+def check_spelling(doc_path):
+    """
+    Native replacement for LanguageEdit.SpellCheck_Advanced: highlights
+    unknown words red and comments each distinct one once. Returns a list
+    of error strings.
+    """
+    if not is_docx(doc_path):
+        return [f"Spell check skipped, not a .docx: {os.path.basename(doc_path)}"]
+    if not spellcheck_available():
+        return [f"Spell check skipped, dictionary not found: {SPELLCHECK_DICTIONARY}"]
+
+    checker = spell_checker()
+    with DocxPackage(doc_path) as pkg:
+        check_package(pkg, checker)
+        if pkg.dirty:
+            pkg.save()
+    return []
@@ -0,0 +1,252 @@
+import os
+import json
+from collections import Counter
+from lxml import etree
+from ooxml.package import DocxPackage, is_docx, w, DOCUMENT_PART, STYLES_PART, paragraph_runs, run_text
+
+# Run properties compared with the style in effect; toggles are on/off,
+# the others compare their w:val (w:ascii for fonts)
+TOGGLE_PROPERTIES = ("b", "i", "caps", "smallCaps", "strike")
+VALUE_PROPERTIES = ("sz", "color", "vertAlign")
+FONT_PROPERTY = "rFonts"
+PARAGRAPH_PROPERTIES = ("jc",)
+
+OFF_VALUES = ("0", "false", "off")
+MAX_FLAGS = 500
+
+
+def _toggle(el):
+    if el is None:
+        return None
+    return el.get(w("val"), "true").lower() not in OFF_VALUES
+
+
+def _run_properties(rpr):
+    """{property: value} set directly in a w:rPr (or a style's rPr)."""
+    props = {}
+    if rpr is None:
+        return props
+    for tag in TOGGLE_PROPERTIES:
+        value = _toggle(rpr.find(w(tag)))
+        if value is not None:
+            props[tag] = value
+    for tag in VALUE_PROPERTIES:
+        el = rpr.find(w(tag))
+        if el is not None and el.get(w("val")) is not None:
+            props[tag] = el.get(w("val"))
+    fonts = rpr.find(w(FONT_PROPERTY))
+    if fonts is not None and fonts.get(w("ascii")):
+        props[FONT_PROPERTY] = fonts.get(w("ascii"))
+    return props
+
+
+def _paragraph_properties(ppr):
+    props = {}
+    if ppr is None:
+        return props
+    for tag in PARAGRAPH_PROPERTIES:
+        el = ppr.find(w(tag))
+        if el is not None and el.get(w("val")) is not None:
+            props[tag] = el.get(w("val"))
+    return props
+
+
+class StyleSheet:
+    """styles.xml with each style's run and paragraph properties resolved through basedOn."""
+
+    def __init__(self, root):
+        self.styles = {}
+        self.defaults = {"paragraph": None, "character": None}
+        self.doc_run = {}
+        self.doc_paragraph = {}
+        if root is None:
+            return
+        doc_defaults = root.find(w("docDefaults"))
+        if doc_defaults is not None:
+            self.doc_run = _run_properties(doc_defaults.find(f"{w('rPrDefault')}/{w('rPr')}"))
+            self.doc_paragraph = _paragraph_properties(doc_defaults.find(f"{w('pPrDefault')}/{w('pPr')}"))
+        for st in root.iter(w("style")):
+            style_id = st.get(w("styleId"))
+            name = st.find(w("name"))
+            based_on = st.find(w("basedOn"))
+            self.styles[style_id] = {
+                "name": name.get(w("val")) if name is not None else style_id,
+                "type": st.get(w("type")),
+                "custom": st.get(w("customStyle")) in ("1", "true"),
+                "linked": st.find(w("link")) is not None,
+                "based_on": based_on.get(w("val")) if based_on is not None else None,
+                "run": _run_properties(st.find(w("rPr"))),
+                "paragraph": _paragraph_properties(st.find(w("pPr"))),
+            }
+            if st.get(w("default")) in ("1", "true") and st.get(w("type")) in self.defaults:
+                self.defaults[st.get(w("type"))] = style_id
+        self._resolved = {}
+
+    def name(self, style_id):
+        style = self.styles.get(style_id)
+        return style["name"] if style else style_id
+
+    def resolved(self, style_id, kind):
+        """Properties of kind ('run' or 'paragraph') a style sets, including inherited ones."""
+        key = (style_id, kind)
+        if key not in self._resolved:
+            chain = []
+            seen = set()
+            while style_id in self.styles and style_id not in seen:
+                seen.add(style_id)
+                chain.append(self.styles[style_id][kind])
+                style_id = self.styles[style_id]["based_on"]
+            props = {}
+            for level in reversed(chain):
+                props.update(level)
+            self._resolved[key] = props
+        return self._resolved[key]
+
+
+class StyleAudit:
+    def __init__(self, sheet):
+        self.sheet = sheet
+        self.paragraph_styles = Counter()
+        self.character_styles = Counter()
+        self.run_overrides = Counter()
+        self.paragraph_overrides = Counter()
+        self.used = set()
+        self.unknown = Counter()
+        self.flags = []
+        self.flag_count = 0
+        self.paragraphs = 0
+
+    def _use(self, style_id):
+        self.used.add(style_id)
+        if style_id not in self.sheet.styles:
+            self.unknown[style_id] += 1
+
+    def _flag(self, p_index, style_id, prop, style_value, direct_value, text):
+        self.flag_count += 1
+        if len(self.flags) < MAX_FLAGS:
+            self.flags.append({
+                "paragraph": p_index,
+                "style": self.sheet.name(style_id),
+                "property": prop,
+                "style_value": style_value,
+                "direct_value": direct_value,
+                "text": text[:120],
+            })
+
+    def add_paragraph(self, p):
+        index = self.paragraphs
+        self.paragraphs += 1
+        sheet = self.sheet
+        ppr = p.find(w("pPr"))
+        ps = ppr.find(w("pStyle")) if ppr is not None else None
+        style_id = ps.get(w("val")) if ps is not None else sheet.defaults["paragraph"]
+        if ps is not None:
+            self._use(style_id)
+        self.paragraph_styles[sheet.name(style_id)] += 1
+
+        style_paragraph = dict(sheet.doc_paragraph, **sheet.resolved(style_id, "paragraph"))
+        direct_paragraph = _paragraph_properties(ppr)
+        for prop, value in direct_paragraph.items():
+            self.paragraph_overrides[prop] += 1
+            if prop in style_paragraph and style_paragraph[prop] != value:
+                self._flag(index, style_id, prop, style_paragraph[prop], value, "")
+
+        style_run = dict(sheet.doc_run, **sheet.resolved(style_id, "run"))
+        # property -> (style value, direct value) shared by every text run so far
+        contradictions = None
+        text_parts = []
+        for r in paragraph_runs(p):
+            text = run_text(r)
+            if not text.strip():
+                continue
+            text_parts.append(text)
+            rpr = r.find(w("rPr"))
+            rs = rpr.find(w("rStyle")) if rpr is not None else None
+            in_effect = style_run
+            if rs is not None:
+                char_id = rs.get(w("val"))
+                self._use(char_id)
+                self.character_styles[sheet.name(char_id)] += 1
+                in_effect = dict(style_run, **sheet.resolved(char_id, "run"))
+            direct = _run_properties(rpr)
+            for prop in direct:
+                self.run_overrides[prop] += 1
+
+            # Only an override that covers every text run contradicts the
+            # style; partial emphasis is ordinary markup
+            differing = {}
+            for prop, value in direct.items():
+                expected = in_effect.get(prop, False if prop in TOGGLE_PROPERTIES else None)
+                if expected is not None and expected != value:
+                    differing[prop] = (expected, value)
+            if contradictions is None:
+                contradictions = differing
+            else:
+                contradictions = {k: v for k, v in contradictions.items()
+                                  if k in differing and differing[k][1] == v[1]}
+
+        if contradictions:
+            text = "".join(text_parts)
+            for prop, (expected, value) in sorted(contradictions.items()):
+                self._flag(index, style_id, prop, expected, value, text)
+
+    def unused_custom_styles(self):
+        # Linked "... Char" styles are applied by Word through their paragraph style
+        return sorted(info["name"] for style_id, info in self.sheet.styles.items()
+                      if info["custom"] and info["type"] in ("paragraph", "character") and style_id not in self.used
+                      and not (info["type"] == "character" and info["linked"]))
+
+    def report(self):
+        return {
+            "paragraphs": self.paragraphs,
+            "paragraph_styles": dict(self.paragraph_styles.most_common()),
+            "character_styles": dict(self.character_styles.most_common()),
+            "direct_run_formatting": dict(self.run_overrides.most_common()),
+            "direct_paragraph_formatting": dict(self.paragraph_overrides.most_common()),
+            "unknown_styles": dict(self.unknown.most_common()),
+            "unused_custom_styles": self.unused_custom_styles(),
+            "contradictions": self.flag_count,
+            "flags": self.flags,
+        }
+
+
+def audit_package(pkg):
+    """
+    Style audit of the main document. styles.xml is parsed as a tree;
+    document.xml is read with iterparse, each paragraph audited when it
+    closes and then cleared, so memory stays flat on large chapters.
+    """
+    sheet = StyleSheet(pkg.xml(STYLES_PART))
+    audit = StyleAudit(sheet)
+    if not pkg.has_part(DOCUMENT_PART):
+        return audit.report()
+
+    with pkg.open_part(DOCUMENT_PART) as stream:
+        context = etree.iterparse(stream, events=("end",), tag=w("p"), huge_tree=True, resolve_entities=False)
+        for _, p in context:
+            audit.add_paragraph(p)
+            parent = p.getparent()
+            # Paragraphs nested in text boxes are cleared with their container
+            if parent is not None and parent.tag in (w("body"), w("tc")):
+                p.clear()
+                while p.getprevious() is not None:
+                    del parent[0]
+    return audit.report()
+
+
+def check_style_consistency(doc_path):
+    """
+    Native replacement for LanguageEdit.StyleConsistency_Check. Writes
+    <name>_StyleAudit.json; the document is not changed. Returns a list of
+    error strings.
+    """
+    if not is_docx(doc_path):
+        return [f"Style audit skipped, not a .docx: {os.path.basename(doc_path)}"]
+    with DocxPackage(doc_path) as pkg:
+        report = audit_package(pkg)
+
+    stem = os.path.splitext(os.path.basename(doc_path))[0]
+    report_path = os.path.join(os.path.dirname(doc_path), f"{stem}_StyleAudit.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(dict(file=os.path.basename(doc_path), **report), f, ensure_ascii=False, indent=2)
+    return []
@@ -0,0 +1,92 @@
+import os
+import re
+from ooxml.package import DocxPackage, is_docx, w, paragraph_runs, run_text, delete_text_spans
+
+# RemoveTagsKeepFormatting's eight tag searches all match '<' + a run of
+# characters other than space and '>' + '>'. They are folded into one pass
+# with its space cleanup: a run of tags takes the spaces around it along
+# (leaving one space if there were any), a run of spaces becomes one, and
+# whitespace that starts a paragraph goes.
+TAG_CLEANUP_RE = re.compile(r"^[ \t]*(?:<[^ >]+>[ \t]*)*|[ ]*(?:<[^ >]+>[ ]*)+| {2,}")
+
+# Paragraph children that carry no content of their own
+_EMPTY_PARAGRAPH_CHILDREN = {w("pPr"), w("r"), w("proofErr")}
+
+
+def _cleanup_spans(text):
+    """Character ranges of text to delete."""
+    spans = []
+    for m in TAG_CLEANUP_RE.finditer(text):
+        start, end = m.span()
+        if start == end:
+            continue
+        kept = -1 if start == 0 else text.find(" ", start, end)
+        if kept < 0:
+            spans.append((start, end))
+        else:
+            # Keep one of the spaces (and its formatting)
+            spans += [s for s in ((start, kept), (kept + 1, end)) if s[0] < s[1]]
+    return spans
+
+
+def _removable(p):
+    """A paragraph emptied by the cleanup that can go without breaking its container."""
+    if p.find(f"{w('pPr')}/{w('sectPr')}") is not None:
+        return False
+    if any(el.tag not in _EMPTY_PARAGRAPH_CHILDREN for el in p):
+        return False
+    if any(el.tag != w("rPr") for r in p.iter(w("r")) for el in r):
+        return False
+    # Table cells, notes and comments must keep a paragraph
+    return any(sibling.tag == w("p") for sibling in p.itersiblings()) or \
+        any(sibling.tag == w("p") for sibling in p.itersiblings(preceding=True))
+
+
+def strip_paragraph_tags(p):
+    """Clean one paragraph. Returns (changed, emptied)."""
+    text = "".join(run_text(r) for r in paragraph_runs(p))
+    if "<" not in text and "  " not in text and not text[:1].isspace():
+        return False, False
+    spans = _cleanup_spans(text)
+    if not spans:
+        return False, False
+    delete_text_spans(p, spans)
+    return True, sum(e - s for s, e in spans) == len(text)
+
+
+def strip_tags(pkg):
+    """
+    Remove <tags> and stray spaces from every story part (body, headers,
+    footers, footnotes, endnotes, comments); paragraphs that held nothing
+    else are removed. Returns paragraphs changed.
+    """
+    changed = 0
+    for part in pkg.story_parts():
+        root = pkg.xml(part)
+        if root is None:
+            continue
+        part_changed = False
+        for p in list(root.iter(w("p"))):
+            touched, emptied = strip_paragraph_tags(p)
+            if not touched:
+                continue
+            changed += 1
+            part_changed = True
+            if emptied and _removable(p):
+                p.getparent().remove(p)
+        if part_changed:
+            pkg.mark_dirty(part)
+    return changed
+
+
+def remove_tags_keep_formatting(doc_path):
+    """
+    Native RemoveTagsKeepFormatting: strip_tags on the package, saved in
+    place only when something changed. Returns a list of error strings.
+    """
+    if not is_docx(doc_path):
+        return [f"Tag cleanup skipped, not a .docx: {os.path.basename(doc_path)}"]
+    with DocxPackage(doc_path) as pkg:
+        if strip_tags(pkg):
+            pkg.save()
+    return []
@@ -0,0 +1,27 @@
+import os
+import json
+from functools import lru_cache
+from ooxml.package import is_docx
+from ooxml.highlight import HighlightMatcher, apply_highlights
+
+TECHNICAL_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules", "technical_highlight.json")
+
+
+@lru_cache(maxsize=1)
+def technical_matcher():
+    return HighlightMatcher.from_file(TECHNICAL_RULES_PATH)
+
+
+@lru_cache(maxsize=1)
+def technical_word_steps():
+    """Procedures of techinal.technicalhighlight that are not ported yet and still run in Word."""
+    with open(TECHNICAL_RULES_PATH, encoding="utf-8") as f:
+        return tuple(json.load(f).get("word_steps", []))
+
+
+def apply_technical_highlights(doc_path):
+    """Native part of techinal.technicalhighlight. Returns a list of error strings."""
+    if not is_docx(doc_path):
+        return [f"Technical highlight skipped, not a .docx: {os.path.basename(doc_path)}"]
+    apply_highlights(doc_path, technical_matcher())
+    return []
@@ -0,0 +1,261 @@
+import os
+import re
+import json
+import gc
+import marshal
+import hashlib
+import tempfile
+from collections import deque
+from config import TERMINOLOGY_FOLDER, TERMINOLOGY_DEFAULT_BANK, TERMINOLOGY_CACHE_FOLDER, TERMINOLOGY_COMMENTS
+from ooxml.package import DocxPackage, is_docx, w, paragraph_runs, run_text, runs_in_spans
+from ooxml.comments import add_comment, COMMENTS_PART
+
+# Bump when the cached automaton layout changes
+AUTOMATON_VERSION = 1
+
+COMMENTABLE_PART_RE = re.compile(r"^word/(document|footnotes|endnotes)\.xml$")
+ISBN_RE = re.compile(r"97[89]\d{10}")
+
+
+class TermAutomaton:
+    """
+    Aho-Corasick automaton over the lower-cased variants of a term bank.
+    Scanning a paragraph visits each character once, however many terms
+    the bank holds. States are list indexes: goto[s] maps a character to
+    the next state, fail[s] is the longest proper suffix state and out[s]
+    lists the (length, entry index) of the variants ending at s.
+    """
+
+    def __init__(self, entries=()):
+        self.preferred = [e["preferred"] for e in entries]
+        self.notes = [e["note"] for e in entries]
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        for index, entry in enumerate(entries):
+            for variant in entry["variants"]:
+                self._add(variant.lower(), index)
+        self._link()
+
+    def dumps(self):
+        return marshal.dumps((AUTOMATON_VERSION, self.preferred, self.notes, self.goto, self.fail, self.out))
+
+    @classmethod
+    def loads(cls, data):
+        # marshal rebuilds the tables far faster than recompiling, as long as
+        # the cyclic GC does not rescan them while they are being allocated
+        gc.disable()
+        try:
+            version, preferred, notes, goto, fail, out = marshal.loads(data)
+        finally:
+            gc.enable()
+        if version != AUTOMATON_VERSION:
+            raise ValueError(f"cached automaton has version {version}")
+        automaton = cls()
+        automaton.preferred, automaton.notes = preferred, notes
+        automaton.goto, automaton.fail, automaton.out = goto, fail, out
+        return automaton
+
+    def _add(self, word, index):
+        state = 0
+        for ch in word:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            state = nxt
+        self.out[state].append((len(word), index))
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def find(self, text):
+        """
+        [(start, end, entry index)] of whole-word variant matches, leftmost
+        and longest first, not overlapping.
+        """
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            lowered = "".join(ch if len(ch.lower()) != 1 else ch.lower() for ch in text)
+        goto, fail, out = self.goto, self.fail, self.out
+        hits = []
+        state = 0
+        for i, ch in enumerate(lowered):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, index in out[state]:
+                start = i + 1 - length
+                if (start == 0 or not text[start - 1].isalnum()) and (i + 1 == len(text) or not text[i + 1].isalnum()):
+                    hits.append((start, i + 1, index))
+
+        hits.sort(key=lambda h: (h[0], h[0] - h[1]))
+        matches = []
+        last_end = 0
+        for start, end, index in hits:
+            if start >= last_end:
+                matches.append((start, end, index))
+                last_end = end
+        return matches
+
+
+def _bank_path(name):
+    return os.path.join(TERMINOLOGY_FOLDER, f"{name}.json")
+
+
+def load_bank(name):
+    with open(_bank_path(name), encoding="utf-8") as f:
+        bank = json.load(f)
+    entries = []
+    for term in bank["terms"]:
+        variants = [v for v in term.get("variants", []) if v.lower() != term["preferred"].lower()]
+        if variants:
+            entries.append({"preferred": term["preferred"], "variants": variants, "note": term.get("note", "")})
+    return bank, entries
+
+
+def bank_for_document(doc_path):
+    """Term bank whose isbn_prefixes match the ISBN in the file name, else the default bank."""
+    match = ISBN_RE.search(os.path.basename(doc_path).replace("-", ""))
+    if match and os.path.isdir(TERMINOLOGY_FOLDER):
+        for file_name in sorted(os.listdir(TERMINOLOGY_FOLDER)):
+            if not file_name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(TERMINOLOGY_FOLDER, file_name), encoding="utf-8") as f:
+                    prefixes = json.load(f).get("isbn_prefixes", [])
+            except (OSError, ValueError):
+                continue
+            if any(match.group(0).startswith(p) for p in prefixes):
+                return file_name[:-5]
+    return TERMINOLOGY_DEFAULT_BANK
+
+
+_automata = {}
+
+
+def bank_automaton(name):
+    """
+    Compiled automaton for a term bank: from memory, else from the on-disk
+    cache keyed by the bank's content hash, else compiled and cached.
+    """
+    with open(_bank_path(name), "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    key = (name, digest)
+    automaton = _automata.get(key)
+    if automaton is not None:
+        return automaton
+
+    cache_path = os.path.join(TERMINOLOGY_CACHE_FOLDER, f"{name}-{digest[:16]}-v{AUTOMATON_VERSION}.bin")
+    try:
+        with open(cache_path, "rb") as f:
+            automaton = TermAutomaton.loads(f.read())
+    except (OSError, ValueError, EOFError, TypeError):
+        _, entries = load_bank(name)
+        automaton = TermAutomaton(entries)
+        os.makedirs(TERMINOLOGY_CACHE_FOLDER, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=TERMINOLOGY_CACHE_FOLDER)
+        with os.fdopen(fd, "wb") as f:
+            f.write(automaton.dumps())
+        os.replace(tmp_path, cache_path)
+
+    for stale in list(_automata):
+        if stale[0] == name:
+            del _automata[stale]
+    _automata[key] = automaton
+    return automaton
+
+
+def find_violations(pkg, automaton, comments=False):
+    """
+    Non-preferred terms in every story part, one automaton pass per
+    paragraph. Comments the first occurrence of each variant when asked.
+    Returns a list of violation dicts.
+    """
+    violations = []
+    commented = set()
+    for part in pkg.story_parts():
+        if part == COMMENTS_PART:
+            continue
+        root = pkg.xml(part)
+        if root is None:
+            continue
+        commentable = comments and bool(COMMENTABLE_PART_RE.match(part))
+        for n, p in enumerate(root.iter(w("p"))):
+            text = "".join(run_text(r) for r in paragraph_runs(p))
+            if not text:
+                continue
+            for start, end, index in automaton.find(text):
+                preferred, note = automaton.preferred[index], automaton.notes[index]
+                found = text[start:end]
+                violations.append({
+                    "part": part,
+                    "paragraph": n,
+                    "offset": start,
+                    "found": found,
+                    "preferred": preferred,
+                    "note": note,
+                    "context": text[max(0, start - 40):end + 40],
+                })
+                if commentable and found.lower() not in commented:
+                    commented.add(found.lower())
+                    runs = runs_in_spans(p, [(start, end)])
+                    if runs:
+                        comment = f"Terminology: use '{preferred}' instead of '{found}'."
+                        if note:
+                            comment += f" {note}"
+                        add_comment(pkg, p, comment, start_run=runs[0], end_run=runs[-1])
+                        pkg.mark_dirty(part)
+    return violations
+
+
+def _write_report(doc_path, bank_name, violations):
+    stem = os.path.splitext(os.path.basename(doc_path))[0]
+    report_path = os.path.join(os.path.dirname(doc_path), f"{stem}_Terminology.json")
+    counts = {}
+    for v in violations:
+        key = f"{v['found'].lower()} -> {v['preferred']}"
+        counts[key] = counts.get(key, 0) + 1
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "document": os.path.basename(doc_path),
+            "bank": bank_name,
+            "total": len(violations),
+            "counts": counts,
+            "violations": violations,
+        }, f, ensure_ascii=False, indent=2)
+    return report_path
+
+
+def validate_terminology(doc_path, comments=TERMINOLOGY_COMMENTS):
+    """
+    Native replacement for LanguageEdit.TerminologyValidation. Writes
+    <name>_Terminology.json and, when comments is set, comments the first
+    use of each non-preferred term. Returns a list of error strings.
+    """
+    if not is_docx(doc_path):
+        return [f"Terminology validation skipped, not a .docx: {os.path.basename(doc_path)}"]
+    bank_name = bank_for_document(doc_path)
+    if not os.path.exists(_bank_path(bank_name)):
+        return [f"Terminology validation skipped, term bank not found: {bank_name}"]
+
+    automaton = bank_automaton(bank_name)
+    with DocxPackage(doc_path) as pkg:
+        violations = find_violations(pkg, automaton, comments)
+        if pkg.dirty:
+            pkg.save()
+    _write_report(doc_path, bank_name, violations)
+    return []
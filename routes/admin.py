@@ -1,13 +1,17 @@
 import os
+import math
 import json
 import traceback
 import sqlite3
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
 from werkzeug.security import generate_password_hash
 from database import get_db
 from utils import log_activity, log_errors
 from config import ROUTE_MACROS, UPLOAD_FOLDER, REPORT_FOLDER
 from auth_utils import admin_required
+from word_scheduler import word_scheduler
+from jobs import job_manager
+from worker_hub import worker_hub
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -323,12 +327,88 @@ def admin_macro_stats():
             daily_stats[date][route_type] = 0
         daily_stats[date][route_type] += 1
 
+    timing_stats, size_stats = _macro_timing_stats()
+
     return render_template("admin_macro_stats.html",
                            route_stats=route_stats,
                            error_stats=error_stats,
                            daily_stats=daily_stats,
+                           timing_stats=timing_stats,
+                           size_stats=size_stats,
                            route_macros=ROUTE_MACROS)
 
+SIZE_BUCKETS = [
+    ('< 100 KB', 100 * 1024),
+    ('100 KB - 500 KB', 500 * 1024),
+    ('500 KB - 1 MB', 1024 * 1024),
+    ('1 MB - 5 MB', 5 * 1024 * 1024),
+    ('> 5 MB', None),
+]
+
+def _percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def _size_bucket(size_bytes):
+    for label, upper in SIZE_BUCKETS:
+        if upper is None or (size_bytes or 0) < upper:
+            return label
+    return SIZE_BUCKETS[-1][0]
+
+def _macro_timing_stats(limit=50000):
+    """p50/p95/p99 per (route, macro) and per-document duration by document size."""
+    try:
+        with get_db() as db:
+            rows = db.execute('''SELECT token, route_type, document, size_bytes, macro_name, phase, duration_ms
+                                 FROM macro_timings
+                                 ORDER BY recorded_at DESC LIMIT ?''', (limit,)).fetchall()
+    except sqlite3.OperationalError as e:
+        log_errors([f"Macro timing query failed: {e}"])
+        return [], []
+
+    per_macro = {}
+    per_document = {}
+    for r in rows:
+        if r['phase'] == 'run':
+            per_macro.setdefault((r['route_type'] or 'unknown', r['macro_name']), []).append(r['duration_ms'])
+        doc_key = (r['token'], r['document'])
+        entry = per_document.setdefault(doc_key, {'size_bytes': r['size_bytes'], 'total_ms': 0.0})
+        entry['total_ms'] += r['duration_ms']
+
+    timing_stats = []
+    for (route_type, macro_name), values in sorted(per_macro.items()):
+        values.sort()
+        timing_stats.append({
+            'route_type': route_type,
+            'macro_name': macro_name,
+            'runs': len(values),
+            'p50': _percentile(values, 50) / 1000.0,
+            'p95': _percentile(values, 95) / 1000.0,
+            'p99': _percentile(values, 99) / 1000.0,
+        })
+
+    buckets = {label: [] for label, _ in SIZE_BUCKETS}
+    for entry in per_document.values():
+        buckets[_size_bucket(entry['size_bytes'])].append(entry['total_ms'])
+
+    size_stats = []
+    for label, _ in SIZE_BUCKETS:
+        values = sorted(buckets[label])
+        if not values:
+            continue
+        size_stats.append({
+            'bucket': label,
+            'documents': len(values),
+            'mean': sum(values) / len(values) / 1000.0,
+            'p50': _percentile(values, 50) / 1000.0,
+            'p95': _percentile(values, 95) / 1000.0,
+        })
+
+    return timing_stats, size_stats
+
 @admin_bp.route("/admin/macro-history")
 @admin_required
 def admin_macro_history():
@@ -351,3 +431,13 @@ def admin_macro_history():
                            page=page,
                            total_pages=total_pages,
                            macro_names=ROUTE_MACROS.get('macro_processing', {}).get('macros', []))
+
+@admin_bp.route("/admin/word-queue")
+@admin_required
+def admin_word_queue():
+    snapshot = word_scheduler.snapshot()
+    snapshot['remote'] = worker_hub.snapshot()
+    if request.args.get('format') == 'json':
+        return jsonify(snapshot)
+    return render_template("admin_word_queue.html", snapshot=snapshot, route_macros=ROUTE_MACROS,
+                           active_jobs=job_manager.active_jobs())
@@ -0,0 +1,53 @@
+from flask import Blueprint, request, jsonify, redirect, url_for, flash, session
+from jobs import job_manager
+from utils import log_activity
+
+jobs_bp = Blueprint('jobs', __name__)
+
+
+def _owned_job(job_id):
+    """The journalled job if the session user started it or is an admin, else None."""
+    if 'user_id' not in session:
+        return None
+    job = job_manager.job(job_id)
+    if job is None:
+        return None
+    if job['user_id'] != session['user_id'] and not session.get('is_admin') and session.get('role') != 'ADMIN':
+        return None
+    return job
+
+
+@jobs_bp.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = _owned_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    files = job_manager.files(job_id)
+    return jsonify({
+        'id': job['id'],
+        'kind': job['kind'],
+        'route_type': job['route_type'],
+        'status': job['status'],
+        'created_at': job['created_at'],
+        'updated_at': job['updated_at'],
+        'files': [{'position': f['position'], 'status': f['status'], 'errors': f['errors']} for f in files],
+        'download_url': (url_for('macros.macro_download', token=job_id) if job['kind'] == 'macro'
+                         else url_for('ppd.download_zip', job_id=job_id))
+        if job['status'] in ('completed', 'cancelled') else None,
+    })
+
+
+@jobs_bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    job = _owned_job(job_id)
+    cancelled = job is not None and job_manager.cancel(job_id)
+    if cancelled:
+        log_activity(session.get('username', 'unknown'), f"JOB_CANCEL_{job['kind'].upper()}", details=job_id)
+
+    if request.is_json or request.accept_mimetypes.best == 'application/json':
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify({'cancelled': cancelled})
+
+    flash("Job cancelled; it stops after the file in progress." if cancelled else "Job is not running.")
+    return redirect(request.referrer or url_for('main.dashboard'))
@@ -9,8 +9,9 @@ from database import get_db
 from utils import log_activity, log_errors, allowed_file, save_uploaded_file
 from routes.ppd import html_to_excel_no_images
 from config import ROUTE_MACROS, UPLOAD_FOLDER, TOKEN_TTL
-from shared_state import download_tokens, download_tokens_lock, WORD_LOCK
-from word_processor import OptimizedDocumentProcessor
+from shared_state import download_tokens, download_tokens_lock
+from word_processor import process_documents_parallel
+from jobs import job_manager
 import sys
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
@@ -23,6 +24,7 @@ def process_macro_request(route_type, redirect_endpoint):
     selected_tasks = request.form.getlist('tasks[]')
     user_id = session.get('user_id')
     username = session.get('username', 'unknown')
+    role = session.get('role')
 
     if not word_files or not selected_tasks:
         flash("Please upload files and select at least one task.")
@@ -59,26 +61,85 @@ def process_macro_request(route_type, redirect_endpoint):
         flash("No valid Word files uploaded.")
         return redirect(url_for(redirect_endpoint))
 
-    all_errors = []
+    job_manager.create(token, 'macro', unique_folder, word_paths, user_id=user_id, username=username, role=role,
+                       route_type=route_type,
+                       params={'selected_tasks': selected_tasks, 'original_filenames': original_filenames})
+    with job_manager.running(token):
+        status, all_errors, not_applicable = run_macro_job(token)
+
+    route_name = ROUTE_MACROS.get(route_type, {}).get('name', 'Processing')
+    if status == 'interrupted':
+        flash(f"{route_name} was interrupted by a server restart. "
+              "The remaining files will be processed when the server is back.")
+        return redirect(url_for(redirect_endpoint))
+    if not_applicable:
+        flash(f"{len(not_applicable)} macro run(s) skipped as not applicable: " +
+              "; ".join(f"{doc}: {name} ({reason})" for doc, name, reason in not_applicable[:5]) +
+              (" ..." if len(not_applicable) > 5 else ""))
+    if status == 'cancelled':
+        flash(f"{route_name} was cancelled. Files processed before the cancel are included in the download.")
+    elif all_errors:
+        flash(f"{route_name} completed with some errors. Check log for details.")
+        log_errors(all_errors)
+    else:
+        flash(f"{route_name} completed successfully!")
+
+    return redirect(url_for(redirect_endpoint, download_token=token))
+
+
+def run_macro_job(job_id):
+    """
+    Run the pending files of a macro job and journal each as it finishes.
+    Unless the run was interrupted by a shutdown, the batch is then recorded
+    in macro_processing. Returns (status, errors, not_applicable).
+    """
+    job = job_manager.job(job_id)
+    route_type = job['route_type']
+    username = job['username'] or 'unknown'
+    selected_tasks = job['params'].get('selected_tasks', [])
+    original_filenames = job['params'].get('original_filenames', [])
+    unique_folder = job['folder']
+
+    # Errors of files finished before a restart come from the journal
+    all_errors = [f"{os.path.basename(f['path'])}: {e}"
+                  for f in job_manager.files(job_id) if f['status'] == 'done' for e in f['errors']]
+    pending = job_manager.pending_files(job_id)
+    word_paths = [path for _, path in pending]
+    timings = []
+    not_applicable = []
+    failed = False
+
+    def on_document(index, doc_errors):
+        job_manager.file_finished(job_id, pending[index][0], 'done', doc_errors)
+        log_activity(username, f"MACRO_PROCESS_{route_type.upper()}", details=os.path.basename(word_paths[index]))
 
     try:
-        with WORD_LOCK:
-            with OptimizedDocumentProcessor() as processor:
-                try:
-                    batch_errors = processor.process_documents_batch(word_paths, selected_tasks, route_type)
-                    if batch_errors:
-                        all_errors.extend(batch_errors)
-                except Exception as e:
-                    all_errors.append(f"Batch processing failed: {str(e)}")
-                    log_errors([traceback.format_exc()])
-
-                for doc_path in word_paths:
-                    log_activity(username, f"MACRO_PROCESS_{route_type.upper()}",
-                                 details=os.path.basename(doc_path))
+        batch_errors, timings, not_applicable = process_documents_parallel(
+            word_paths, selected_tasks, route_type, username, job['role'],
+            stop=lambda: job_manager.stop_requested(job_id), on_document=on_document)
+        all_errors.extend(batch_errors)
 
     except Exception as e:
         all_errors.append(f"Processing failed: {str(e)}")
         log_errors([traceback.format_exc()])
+        failed = True
+
+    if timings:
+        try:
+            recorded_at = datetime.utcnow().isoformat(sep=' ')
+            with get_db() as db:
+                db.executemany('''INSERT INTO macro_timings
+                                  (token, route_type, document, size_bytes, macro_name, phase, duration_ms, recorded_at)
+                                  VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                               [(job_id, route_type, document, size_bytes, macro_name, phase, duration_ms, recorded_at)
+                                for document, size_bytes, macro_name, phase, duration_ms in timings])
+                db.commit()
+        except Exception as e:
+            log_errors([f"Error saving macro timings: {str(e)}"])
+
+    status = job_manager.finish(job_id, failed=failed)
+    if status == 'interrupted':
+        return status, all_errors, not_applicable
 
     # PPD-specific processing
     if route_type.lower() == 'ppd':
@@ -122,13 +183,17 @@ def process_macro_request(route_type, redirect_endpoint):
             db.execute('''INSERT INTO macro_processing 
                           (user_id, token, original_filenames, processed_filenames, selected_tasks, errors, route_type)
                           VALUES (?, ?, ?, ?, ?, ?, ?)''',
-                       (user_id, token,
+                       (job['user_id'], job_id,
                         json.dumps(original_filenames),
                         json.dumps(processed_filenames),
                         json.dumps({
                             'route_type': route_type,
                             'task_indices': selected_tasks,
-                            'macro_names': selected_macro_names
+                            'macro_names': selected_macro_names,
+                            'not_applicable': [
+                                {'document': doc, 'macro_name': name, 'reason': reason}
+                                for doc, name, reason in not_applicable
+                            ]
                         }),
                         json.dumps(all_errors) if all_errors else None,
                         route_type))
@@ -136,14 +201,28 @@ def process_macro_request(route_type, redirect_endpoint):
     except Exception as e:
         log_errors([f"Error saving macro processing: {str(e)}"])
 
-    route_name = ROUTE_MACROS.get(route_type, {}).get('name', 'Processing')
-    if all_errors:
-        flash(f"{route_name} completed with some errors. Check log for details.")
-        log_errors(all_errors)
-    else:
-        flash(f"{route_name} completed successfully!")
+    return status, all_errors, not_applicable
 
-    return redirect(url_for(redirect_endpoint, download_token=token))
+
+def resume_macro_job(app, job_id):
+    """Job runner for macro batches resumed after a restart; re-registers the download token when done."""
+    with app.app_context():
+        status, all_errors, _ = run_macro_job(job_id)
+        if status == 'interrupted':
+            return
+        job = job_manager.job(job_id)
+        with download_tokens_lock:
+            download_tokens[job_id] = {
+                'path': job['folder'],
+                'expires': datetime.now() + TOKEN_TTL,
+                'user': job['username'],
+                'route_type': job['route_type']
+            }
+        if all_errors:
+            log_errors(all_errors)
+
+
+job_manager.register_runner('macro', resume_macro_job)
 
 def handle_macro_route(route_type, template_name, redirect_endpoint):
     if 'user_id' not in session:
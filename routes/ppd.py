@@ -1,8 +1,10 @@
 import os
 import time
+import uuid
 import zipfile
 import shutil
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
@@ -15,10 +17,12 @@ from flask import (
     render_template,
     session,
 )
-from config import ROUTE_PERMISSIONS, UPLOAD_FOLDER
+from config import ROUTE_PERMISSIONS, UPLOAD_FOLDER, PPD_WORKERS
 from auth_utils import role_required
-from jinja2 import Template
 from utils import log_errors      # ✅ REQUIRED FIX
+from word_scheduler import word_scheduler
+from jobs import job_manager
+from routes.jobs import _owned_job
 import chardet
 import re
 
@@ -28,6 +32,15 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 ppd_bp = Blueprint("ppd", __name__)
 
+# Journal status -> label shown by the progress poller
+JOURNAL_STATUS = {
+    "running": "Resuming",
+    "interrupted": "Interrupted",
+    "completed": "Completed",
+    "failed": "Failed",
+    "cancelled": "Cancelled",
+}
+
 
 # ---------------------------------------------------------
 #   GLOBAL FUNCTION (importable)
@@ -98,8 +111,11 @@ def ppd_route():
         return jsonify({"error": "No valid .doc/.docx files uploaded"}), 400
 
     username = session.get("username", "Analyst")
+    role = session.get("role")
 
-    job_id = str(int(time.time() * 1000))
+    job_id = uuid.uuid4().hex
+    job_manager.create(job_id, "ppd", tmpdir, saved, user_id=session.get("user_id"), username=username, role=role,
+                       route_type="ppd")
     current_app.config.setdefault("PROGRESS_DATA", {})
     current_app.config["PROGRESS_DATA"][job_id] = {
         "total": len(saved),
@@ -107,150 +123,253 @@ def ppd_route():
         "status": "Starting",
     }
 
-    # ---------------------------------------------------------
-    #   BACKGROUND PROCESSOR (THREAD)
-    # ---------------------------------------------------------
-    app = current_app._get_current_object()
+    # Start thread
+    job_manager.start(current_app._get_current_object(), job_id, "ppd")
+    return jsonify({"job_id": job_id})
 
-    def process_job(app, username):
-        with app.app_context():
-            try:
-                from word_analyzer import (
-                    CitationAnalyzer,
-                    extract_with_word,
-                    extract_with_docx,
-                    generate_formatting_html,
-                    generate_multilingual_html,
-                    build_comments_html,
-                    build_export_highlight_html,
-                    build_detailed_summary_table,
-                    DASHBOARD_CSS,
-                    DASHBOARD_JS,
-                    HTML_WRAPPER,
-                    HAS_WIN32COM,
-                )
-            except Exception as e:
-                log_errors([f"Import Error in word_analyzer: {e}"])
-                current_app.config["PROGRESS_DATA"][job_id]["status"] = "Failed"
-                return
 
+# ---------------------------------------------------------
+#   BACKGROUND PROCESSOR (JOB RUNNER)
+# ---------------------------------------------------------
+def _file_entries(files):
+    """Per-file progress entries from the journal; every key is present from the start."""
+    return [{
+        "name": os.path.basename(f["path"]),
+        "status": f["status"],
+        "error": f["errors"][0] if f["errors"] else None,
+        "seconds": None,
+    } for f in files]
+
+
+def _running_status(entries):
+    names = [e["name"] for e in entries if e["status"] == "processing"]
+    return f"Processing {', '.join(names)}" if names else "Processing"
+
+
+def run_ppd_job(app, job_id):
+    """
+    Build the dashboards for a PPD job's pending files on a pool of up to
+    PPD_WORKERS threads, journalling each file's outputs as it finishes. A
+    file that fails is recorded with its error and the others carry on.
+    Runs in the job thread, both for new uploads and for jobs resumed after
+    a restart.
+    """
+    with app.app_context():
+        job = job_manager.job(job_id)
+        tmpdir = job["folder"]
+        username = job["username"] or "Analyst"
+        role = job["role"]
+        files = job_manager.files(job_id)
+        saved = [f["path"] for f in files]
+        pending = [(f["position"], f["path"]) for f in files if f["status"] == "pending"]
+        progress_data = current_app.config.setdefault("PROGRESS_DATA", {})
+        progress_data.setdefault(job_id, {"total": len(saved), "current": 0, "status": "Starting"})
+        progress = progress_data[job_id]
+        entries = _file_entries(files)
+        progress.update({"files": entries, "current": len(saved) - len(pending)})
+        lock = threading.Lock()
+
+        try:
+            from word_analyzer import (
+                CitationAnalyzer,
+                extract_with_word,
+                extract_with_docx,
+                remove_tags_keep_formatting_docx,
+                generate_formatting_html,
+                generate_multilingual_html,
+                build_comments_html,
+                iter_export_highlight_html,
+                build_detailed_summary_table,
+                write_dashboard_html,
+                DASHBOARD_CSS,
+                DASHBOARD_JS,
+                HAS_WIN32COM,
+            )
+        except Exception as e:
+            log_errors([f"Import Error in word_analyzer: {e}"])
+            progress["status"] = "Failed"
+            job_manager.finish(job_id, failed=True)
+            return
+
+        def process_file(position, path):
+            # Files not started before a cancel or shutdown stay pending
+            if job_manager.stop_requested(job_id):
+                return
+            fname = os.path.basename(path)
+            entry = entries[position]
+            with lock:
+                entry["status"] = "processing"
+                progress["status"] = _running_status(entries)
+            started = time.monotonic()
             results = []
 
-            for i, path in enumerate(saved, 1):
+            try:
+                # Only the Word (COM) calls hold a scheduler slot; each starts and
+                # quits a private Word instance, so files holding parallel
+                # slots never share one
+                used_word = os.name == "nt" and HAS_WIN32COM
+                if used_word:
+                    with word_scheduler.slot(username, role, "ppd"):
+                        paras, comments, imgs, foot, end = extract_with_word(path)
+                else:
+                    paras, comments, imgs, foot, end = extract_with_docx(path)
+
+                tag_errors = remove_tags_keep_formatting_docx(path)
+                if tag_errors:
+                    log_errors(tag_errors)
+                # extract_with_word already made the keyword highlight pass
+                with word_scheduler.slot(username, role, "ppd"):
+                    spec_html = generate_multilingual_html(path, highlight_keywords=not used_word)
+
+                analyzer = CitationAnalyzer()
+
+                doc_data = [(t, p, c) for (t, p, c, _) in paras]
+                dtypes = analyzer.analyze_document_citations(doc_data)
+                table_count = len(dtypes.get("Table", {}).get("Caption", {}))
+
+                fmt_html = generate_formatting_html(path, used_word=False)
+                com_html = build_comments_html(comments)
+
+                summary_html = build_detailed_summary_table(
+                    dtypes,
+                    imgs,
+                    table_count,
+                    foot,
+                    end,
+                    fmt_html,
+                    spec_html,
+                    com_html,
+                )
+
+                wc = sum(len(t.split()) for (t, _, _, _) in paras)
 
-                fname = os.path.basename(path)
-                current_app.config["PROGRESS_DATA"][job_id].update(
-                    {"current": i, "status": f"Processing {fname}"}
+                # Render the dashboard straight to disk; the citation and
+                # highlight tables are streamed a row at a time
+                out_html = os.path.join(
+                    tmpdir, Path(path).stem + "_Dashboard.html"
+                )
+                write_dashboard_html(
+                    out_html,
+                    doc_name=fname,
+                    pages=(len(paras) // 40) + 1,
+                    words=wc,
+                    ce_pages=(wc // 250) + 1,
+                    date=datetime.now().strftime("%d-%m-%Y"),
+                    analyst=username,
+                    detailed_summary=summary_html,
+                    msr_content=analyzer.iter_citation_tables_html(dtypes, fname),
+                    fmt_content=fmt_html,
+                    spec_content=spec_html,
+                    comment_content=com_html,
+                    export_highlight=iter_export_highlight_html(paras),
+                    images=imgs,
+                    footnotes=foot,
+                    endnotes=end,
+                    css=DASHBOARD_CSS,
+                    js=DASHBOARD_JS,
+                    logo_path="",
                 )
 
-                try:
-                    # Extract doc data
-                    if os.name == "nt" and HAS_WIN32COM:
-                        paras, comments, imgs, foot, end = extract_with_word(path)
-                    else:
-                        paras, comments, imgs, foot, end = extract_with_docx(path)
-
-                    CitationAnalyzer().remove_tags_keep_formatting_docx(path)
-                    analyzer = CitationAnalyzer()
-
-                    doc_data = [(t, p, c) for (t, p, c, _) in paras]
-                    dtypes = analyzer.analyze_document_citations(doc_data)
-                    table_count = len(dtypes.get("Table", {}).get("Caption", {}))
-
-                    fmt_html = generate_formatting_html(path, used_word=False)
-                    spec_html = generate_multilingual_html(path)
-                    com_html = build_comments_html(comments)
-
-                    summary_html = build_detailed_summary_table(
-                        dtypes,
-                        imgs,
-                        table_count,
-                        foot,
-                        end,
-                        fmt_html,
-                        spec_html,
-                        com_html,
-                    )
+                results.append(out_html)
 
-                    msr_html = analyzer.build_citation_tables_html(dtypes, fname)
-                    exp_html = build_export_highlight_html(paras)
-
-                    wc = sum(len(t.split()) for (t, _, _, _) in paras)
-
-                    # Render dashboard HTML
-                    template = Template(HTML_WRAPPER)
-                    html = template.render(
-                        doc_name=fname,
-                        pages=(len(paras) // 40) + 1,
-                        words=wc,
-                        ce_pages=(wc // 250) + 1,
-                        date=datetime.now().strftime("%d-%m-%Y"),
-                        analyst=username,
-                        detailed_summary=summary_html,
-                        msr_content=msr_html,
-                        fmt_content=fmt_html,
-                        spec_content=spec_html,
-                        comment_content=com_html,
-                        export_highlight=exp_html,
-                        images=imgs,
-                        footnotes=foot,
-                        endnotes=end,
-                        css=DASHBOARD_CSS,
-                        js=DASHBOARD_JS,
-                        logo_path="",
+                # Excel Output
+                excel_output = html_to_excel_no_images(out_html, tmpdir)
+                if excel_output:
+                    results.append(excel_output)
+                else:
+                    log_errors(
+                        [f"Excel conversion FAILED for file: {out_html}"]
                     )
 
-                    out_html = os.path.join(
-                        tmpdir, Path(path).stem + "_Dashboard.html"
-                    )
-                    with open(out_html, "w", encoding="utf-8") as f:
-                        f.write(html)
-
-                    results.append(out_html)
-
-                    # Excel Output
-                    excel_output = html_to_excel_no_images(out_html, tmpdir)
-                    if excel_output:
-                        results.append(excel_output)
-                    else:
-                        log_errors(
-                            [f"Excel conversion FAILED for file: {out_html}"]
-                        )
-
-                except Exception as e:
-                    current_app.logger.error(f"Failed processing {fname}: {e}")
-                    log_errors([f"Exception PPD processing {fname}: {e}"])
-                    current_app.config["PROGRESS_DATA"][job_id][
-                        "status"
-                    ] = f"Failed: {e}"
-                    break
-
-            # ZIP results
-            zip_path = os.path.join(tmpdir, "PPD_Results.zip")
-            with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as z:
-                for f in results + saved:
-                    z.write(f, arcname=os.path.basename(f))
-
-            current_app.config["PROGRESS_DATA"][job_id].update(
-                {"status": "Completed", "zip_path": zip_path, "current": len(saved)}
-            )
+                job_manager.file_finished(job_id, position, "done", outputs=results)
+                status, error = "done", None
 
-    # Start thread
-    threading.Thread(target=process_job, args=(app, username,), daemon=True).start()
-    return jsonify({"job_id": job_id})
+            except Exception as e:
+                current_app.logger.error(f"Failed processing {fname}: {e}")
+                log_errors([f"Exception PPD processing {fname}: {e}"])
+                job_manager.file_finished(job_id, position, "failed", errors=[str(e)], outputs=results)
+                status, error = "failed", str(e)
+
+            with lock:
+                entry.update({"status": status, "error": error, "seconds": round(time.monotonic() - started, 1)})
+                progress["current"] += 1
+                progress["status"] = _running_status(entries)
+
+        def run_file(position, path):
+            with app.app_context():
+                process_file(position, path)
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(PPD_WORKERS, len(pending)),
+                                    thread_name_prefix=f"ppd-{job_id}") as pool:
+                futures = [pool.submit(run_file, position, path) for position, path in pending]
+                for future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        log_errors([f"PPD worker failed in job {job_id}: {e}"])
+
+        if job_manager.stop_requested(job_id) and not job_manager.cancelled(job_id) and \
+                job_manager.pending_files(job_id):
+            progress["status"] = "Interrupted"
+            job_manager.finish(job_id)
+            return
+
+        # ZIP results of every finished file, including those from before a restart
+        finished = job_manager.files(job_id)
+        results = [out for f in finished for out in f["outputs"] if os.path.exists(out)]
+        failed = sum(1 for f in finished if f["status"] == "failed")
+        zip_path = os.path.join(tmpdir, "PPD_Results.zip")
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as z:
+            for f in results + saved:
+                z.write(f, arcname=os.path.basename(f))
+
+        status = job_manager.finish(job_id, result={"zip_path": zip_path, "failed": failed})
+        progress.update(
+            {"status": "Cancelled" if status == "cancelled" else "Completed", "zip_path": zip_path,
+             "current": len(saved), "failed": failed}
+        )
+
+
+job_manager.register_runner("ppd", run_ppd_job)
 
 
 # ---------------------------------------------------------
 #   STATUS ENDPOINTS
 # ---------------------------------------------------------
+def _journal_progress(job_id):
+    """Progress of a job this process did not start (e.g. before a restart), from the job journal."""
+    job = job_manager.job(job_id)
+    if job is None:
+        return {}
+    files = job_manager.files(job_id)
+    data = {
+        "total": len(files),
+        "current": sum(1 for f in files if f["status"] != "pending"),
+        "status": JOURNAL_STATUS.get(job["status"], job["status"]),
+        "files": _file_entries(files),
+    }
+    if "zip_path" in job["result"]:
+        data["zip_path"] = job["result"]["zip_path"]
+        data["failed"] = job["result"].get("failed", 0)
+    return data
+
+
 @ppd_bp.route("/progress/<job_id>")
 def progress(job_id):
-    return jsonify(current_app.config.get("PROGRESS_DATA", {}).get(job_id, {}))
+    if _owned_job(job_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+    data = current_app.config.get("PROGRESS_DATA", {}).get(job_id)
+    if data is None:
+        data = _journal_progress(job_id)
+    return jsonify(data)
 
 
 @ppd_bp.route("/download_zip/<job_id>")
 def download_zip(job_id):
-    data = current_app.config.get("PROGRESS_DATA", {}).get(job_id)
+    if _owned_job(job_id) is None:
+        return "Not found", 404
+    data = current_app.config.get("PROGRESS_DATA", {}).get(job_id) or _journal_progress(job_id)
     if not data or "zip_path" not in data:
         return "Not ready", 404
     return send_file(
@@ -0,0 +1,130 @@
+import os
+import hmac
+import tempfile
+from functools import wraps
+from flask import Blueprint, request, jsonify, send_file
+from werkzeug.utils import secure_filename
+from config import WORKER_AGENT_TOKEN, WORKER_HEARTBEAT_SECONDS, WORKER_POLL_SECONDS, WORKER_LEASE_SECONDS
+from worker_hub import worker_hub
+from utils import is_output_of
+
+# Endpoints polled by worker_agent.py; authenticated by the shared worker
+# token, so the blueprint is exempt from CSRF
+workers_bp = Blueprint('workers', __name__, url_prefix='/workers')
+
+
+def worker_token_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not WORKER_AGENT_TOKEN:
+            return jsonify({'error': 'Remote workers are disabled'}), 404
+        token = request.headers.get('X-Worker-Token', '')
+        if not hmac.compare_digest(token, WORKER_AGENT_TOKEN):
+            return jsonify({'error': 'Invalid worker token'}), 403
+        return f(*args, **kwargs)
+
+    return decorated_function
+
+
+def _lease_lost():
+    return jsonify({'error': 'Lease lost'}), 409
+
+
+@workers_bp.route('/register', methods=['POST'])
+@worker_token_required
+def register():
+    data = request.get_json(silent=True) or {}
+    worker_id = worker_hub.register(data.get('name') or request.remote_addr, data.get('capacity', 1))
+    return jsonify({
+        'worker_id': worker_id,
+        'heartbeat_seconds': WORKER_HEARTBEAT_SECONDS,
+        'poll_seconds': WORKER_POLL_SECONDS,
+        'lease_seconds': WORKER_LEASE_SECONDS,
+    })
+
+
+@workers_bp.route('/<worker_id>/heartbeat', methods=['POST'])
+@worker_token_required
+def heartbeat(worker_id):
+    data = request.get_json(silent=True) or {}
+    drop = worker_hub.heartbeat(worker_id, data.get('tasks', []))
+    if drop is None:
+        return jsonify({'error': 'Unknown worker'}), 410
+    return jsonify({'drop': drop})
+
+
+@workers_bp.route('/<worker_id>/lease', methods=['POST'])
+@worker_token_required
+def lease(worker_id):
+    if worker_hub.heartbeat(worker_id, []) is None:
+        return jsonify({'error': 'Unknown worker'}), 410
+    task = worker_hub.lease(worker_id)
+    if task is None:
+        return '', 204
+    return jsonify({
+        'task_id': task.id,
+        'filename': os.path.basename(task.path),
+        'route_type': task.route_type,
+        'macro_names': task.macro_names,
+        'user': task.user,
+    })
+
+
+@workers_bp.route('/<worker_id>/tasks/<task_id>/input')
+@worker_token_required
+def task_input(worker_id, task_id):
+    task = worker_hub.leased_task(worker_id, task_id)
+    if task is None:
+        return _lease_lost()
+    return send_file(task.path, as_attachment=True, download_name=os.path.basename(task.path))
+
+
+@workers_bp.route('/<worker_id>/tasks/<task_id>/files/<filename>', methods=['PUT'])
+@worker_token_required
+def task_file(worker_id, task_id, filename):
+    """
+    Store one result file next to the input. Only the document itself and
+    side files named "<stem>_*" or "<stem>.*" are accepted, so an agent
+    cannot write over "ch10.docx" or its outputs while running "ch1.docx".
+    """
+    task = worker_hub.leased_task(worker_id, task_id)
+    if task is None:
+        return _lease_lost()
+    filename = secure_filename(filename)
+    stem = os.path.splitext(os.path.basename(task.path))[0]
+    if not filename or not is_output_of(filename, stem):
+        return jsonify({'error': 'Unexpected result file'}), 400
+
+    folder = os.path.dirname(task.path)
+    fd, tmp_path = tempfile.mkstemp(suffix=".part", dir=folder)
+    with os.fdopen(fd, 'wb') as f:
+        while True:
+            chunk = request.stream.read(1024 * 1024)
+            if not chunk:
+                break
+            f.write(chunk)
+    # The lease may have moved on while the body was uploading
+    if worker_hub.leased_task(worker_id, task_id) is None:
+        os.remove(tmp_path)
+        return _lease_lost()
+    os.replace(tmp_path, os.path.join(folder, filename))
+    return jsonify({'stored': filename})
+
+
+@workers_bp.route('/<worker_id>/tasks/<task_id>/complete', methods=['POST'])
+@worker_token_required
+def task_complete(worker_id, task_id):
+    data = request.get_json(silent=True) or {}
+    if not worker_hub.complete(worker_id, task_id, data.get('errors', []), data.get('timings', []),
+                               data.get('not_applicable', [])):
+        return _lease_lost()
+    return jsonify({'ok': True})
+
+
+@workers_bp.route('/<worker_id>/tasks/<task_id>/fail', methods=['POST'])
+@worker_token_required
+def task_fail(worker_id, task_id):
+    data = request.get_json(silent=True) or {}
+    if not worker_hub.fail(worker_id, task_id, data.get('error', 'unknown error')):
+        return _lease_lost()
+    return jsonify({'ok': True})
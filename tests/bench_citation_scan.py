@@ -0,0 +1,161 @@
+"""
+Benchmark CitationAnalyzer.analyze_document_citations: the fused
+single-scan engine against the previous three finditer passes with
+per-hit re.search normalization, on a 3,000-paragraph chapter.
+
+    python tests/bench_citation_scan.py [chapter.docx] [--paragraphs 3000] [--repeat 5]
+
+Paragraphs are taken from the chapter (repeated up to the requested count)
+or generated when no .docx is given. Both engines must produce identical
+results, including the order items were found in.
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dashboard_report import CitationAnalyzer  # noqa: E402
+
+
+def legacy_normalize_type(label):
+    # 'appendi' rather than the old 'appendix', which filed "Appendices" under
+    # Figure; with that one fix the two engines must agree exactly
+    if not label:
+        return "Figure"
+    lbl = label.lower()
+    for prefix, name in (('fig', "Figure"), ('tab', "Table"), ('box', "Box"), ('exhibit', "Exhibit"),
+                         ('appendi', "Appendix"), ('case', "Case Study")):
+        if lbl.startswith(prefix):
+            return name
+    return "Figure"
+
+
+def legacy_normalize_fig_number(fig_ref):
+    if not fig_ref:
+        return ""
+    fig_ref = fig_ref.strip()
+    fig_ref = fig_ref.replace('--', '-').replace('–', '-').replace('—', '-')
+    for ch in ['[', ']', '°']:
+        fig_ref = fig_ref.replace(ch, '')
+    m = re.search(r'([0-9]+(?:[.\-][0-9]+)*)([A-Za-z]?)', fig_ref)
+    if m:
+        base = m.group(1).replace('-', '.')
+        if base.endswith('.'):
+            base = base[:-1]
+        return base + m.group(2)
+    return fig_ref
+
+
+def legacy_analyze(analyzer, document_content):
+    """The three-pass implementation the fused scanner replaced."""
+    dict_types = {t: {"Caption": {}, "Citation": {}, "CaptionPage": {}, "CitationPage": {}}
+                  for t in analyzer.supported_types}
+    patterns = analyzer.regex_patterns
+    for text, page_no, is_caption in document_content:
+        txt = text.replace('–', '-').replace('—', '-').replace('\xa0', ' ')
+        for m in patterns['range'].finditer(txt):
+            label = legacy_normalize_type(m.group(1))
+            start_num = legacy_normalize_fig_number(m.group(2))
+            end_num = legacy_normalize_fig_number(m.group(4))
+            try:
+                sp = start_num.split('.')
+                ep = end_num.split('.')
+                if int(sp[0]) == int(ep[0]) and len(sp) > 1 and len(ep) > 1:
+                    for n in range(int(sp[1]), int(ep[1]) + 1):
+                        analyzer._store(dict_types, label, f"{label} {sp[0]}.{n}", page_no, is_caption)
+                else:
+                    analyzer._store(dict_types, label, f"{label} {start_num}", page_no, is_caption)
+                    analyzer._store(dict_types, label, f"{label} {end_num}", page_no, is_caption)
+            except Exception:
+                analyzer._store(dict_types, label, f"{label} {start_num}", page_no, is_caption)
+                analyzer._store(dict_types, label, f"{label} {end_num}", page_no, is_caption)
+        for m in patterns['and'].finditer(txt):
+            label = legacy_normalize_type(m.group(1))
+            analyzer._store(dict_types, label, f"{label} {legacy_normalize_fig_number(m.group(2))}", page_no, is_caption)
+            analyzer._store(dict_types, label, f"{label} {legacy_normalize_fig_number(m.group(4))}", page_no, is_caption)
+        for m in patterns['single'].finditer(txt):
+            label = legacy_normalize_type(m.group(1))
+            item_id = f"{label} {legacy_normalize_fig_number(m.group(2) + (m.group(3) or ''))}"
+            analyzer._store(dict_types, label, item_id, page_no, is_caption)
+    return dict_types
+
+
+def synthetic_paragraphs(count, seed=7):
+    rng = random.Random(seed)
+    words = ("the patient presented with chronic symptoms and the results were consistent with earlier "
+             "studies of lipid metabolism in primary care settings").split()
+    labels = ["Figure", "Fig.", "Figures", "Table", "Tables", "Box", "Exhibit", "Appendix", "Appendices",
+              "Case Study", "Case Studies"]
+    paragraphs = []
+    for n in range(count):
+        parts = [" ".join(rng.choices(words, k=rng.randint(20, 80)))]
+        for _ in range(rng.randint(0, 4)):
+            label = rng.choice(labels)
+            chapter = rng.randint(1, 30)
+            form = rng.random()
+            if form < 0.5:
+                ref = f"{label} {chapter}.{rng.randint(1, 20)}{rng.choice(['', 'a', 'B'])}"
+            elif form < 0.75:
+                ref = f"{label} {chapter}.{rng.randint(1, 5)}–{chapter}.{rng.randint(5, 9)}"
+            else:
+                ref = f"{label} {chapter}.{rng.randint(1, 5)} and {chapter}.{rng.randint(6, 9)}"
+            parts.append(f"({ref})" if rng.random() < 0.5 else ref)
+            parts.append(" ".join(rng.choices(words, k=rng.randint(5, 20))))
+        text = " ".join(parts)
+        is_caption = rng.random() < 0.03
+        if is_caption:
+            text = f"Figure {rng.randint(1, 30)}.{rng.randint(1, 20)} {text}"
+        paragraphs.append((text, n // 12 + 1, is_caption))
+    return paragraphs
+
+
+def chapter_paragraphs(path, count):
+    from ooxml.extract import extract_docx
+    analyzer = CitationAnalyzer()
+    paragraphs = [(t, page, cap) for t, page, cap, _ in extract_docx(path, analyzer.is_caption_paragraph)[0]]
+    return [paragraphs[n % len(paragraphs)] for n in range(count)]
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return min(times), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("docx", nargs="?")
+    parser.add_argument("--paragraphs", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    paragraphs = (chapter_paragraphs(args.docx, args.paragraphs) if args.docx
+                  else synthetic_paragraphs(args.paragraphs))
+    analyzer = CitationAnalyzer()
+
+    legacy_time, legacy = best_of(lambda: legacy_analyze(analyzer, paragraphs), args.repeat)
+    fused_time, fused = best_of(lambda: analyzer.analyze_document_citations(paragraphs), args.repeat)
+
+    mismatched = [t for t in analyzer.supported_types
+                  if [list(fused[t][k].items()) for k in fused[t]] != [list(legacy[t][k].items()) for k in legacy[t]]]
+
+    chars = sum(len(t) for t, _, _ in paragraphs)
+    items = sum(len(fused[t]["Caption"]) + len(fused[t]["Citation"]) for t in fused)
+    print(f"{len(paragraphs)} paragraphs, {chars:,} characters, {items} distinct items")
+    print(f"three passes: {legacy_time * 1000:8.1f} ms  ({len(paragraphs) / legacy_time:,.0f} paragraphs/s)")
+    print(f"fused scan:   {fused_time * 1000:8.1f} ms  ({len(paragraphs) / fused_time:,.0f} paragraphs/s)")
+    print(f"speed-up:     {legacy_time / fused_time:8.2f}x")
+    if mismatched:
+        print(f"RESULTS DIFFER for: {', '.join(mismatched)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dashboard_report import CitationAnalyzer, build_detailed_summary_table  # noqa: E402
+
+PARAGRAPHS = [
+    ("Figure 2.1 Anatomy of the heart.", 1, True),
+    ("Figure 2.2 Coronary arteries.", 1, True),
+    ("Figure 2.3 Conduction system.", 2, True),
+    ("Table 4.1a Drugs used in heart failure.", 3, True),
+    ("The chambers are shown in Figures 2.1–2.3 (see also Figure 2.4).", 1, False),
+    ("Doses are listed in Table 4.1A.", 3, False),
+]
+
+
+def _summary_missing(html):
+    """(missing captions, missing citations) per row title of the summary table."""
+    rows = {}
+    for row in re.findall(r"<tr>\s*<td><strong>(\w+)</strong></td>(.*?)</tr>", html, re.S):
+        caps = re.search(r"Missing (\d+) caption", row[1])
+        cits = re.search(r"Missing (\d+) citation", row[1])
+        rows[row[0]] = (int(caps.group(1)) if caps else 0, int(cits.group(1)) if cits else 0)
+    return rows
+
+
+def test_summary_and_missing_tables_agree_on_ranges_and_suffixes():
+    analyzer = CitationAnalyzer()
+    dict_types = analyzer.analyze_document_citations(PARAGRAPHS)
+    missing = analyzer.find_missing(dict_types)
+
+    # The en dash range covers 2.1 to 2.3; only 2.4 has no caption
+    assert missing["Figure"] == (["Figure 2.4"], [])
+    # "4.1A" and "4.1a" are the same table
+    assert missing["Table"] == ([], [])
+
+    html = build_detailed_summary_table(dict_types, 0, 1, 0, 0, "", "", "")
+    summary = _summary_missing(html)
+    for type_key, title in (("Figure", "Figures"), ("Table", "Tables")):
+        no_caption, no_citation = missing[type_key]
+        assert summary[title] == (len(no_caption), len(no_citation))
@@ -0,0 +1,72 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import macro_cache  # noqa: E402
+from macro_cache import MacroOutputCache  # noqa: E402
+
+
+def _rules(tmp_path, monkeypatch):
+    rules = tmp_path / "rules"
+    (rules / "spelling").mkdir(parents=True)
+    (rules / "terminology").mkdir()
+    (rules / "keywords").mkdir()
+    (rules / "technical_highlight.json").write_text('{"rules": []}', encoding="utf-8")
+    (rules / "spelling" / "base.txt").write_text("aspirin\n", encoding="utf-8")
+    monkeypatch.setattr(macro_cache, "NATIVE_RULES_FOLDER", str(rules))
+    monkeypatch.setattr(macro_cache, "TERMINOLOGY_FOLDER", str(rules / "terminology"))
+    monkeypatch.setattr(macro_cache, "KEYWORD_RULES_FOLDER", str(rules / "keywords"))
+    monkeypatch.setattr(macro_cache, "SPELLCHECK_DICTIONARY", str(rules / "spelling" / "base.txt"))
+    monkeypatch.setattr(macro_cache, "SPELLCHECK_CUSTOM_LISTS", [])
+    return rules
+
+
+def _cached_run(cache, doc):
+    key = cache.make_key(str(doc), ["msrpre.TechnicalHighlight"])
+    hit = cache.restore(key, str(doc))
+    if hit is None:
+        cache.store(key, str(doc), [])
+    return key, hit
+
+
+def test_changing_a_rules_file_invalidates_the_entry(tmp_path, monkeypatch):
+    rules = _rules(tmp_path, monkeypatch)
+    cache = MacroOutputCache(folder=str(tmp_path / "cache"), max_bytes=10 ** 9)
+    doc = tmp_path / "ch1.docx"
+    doc.write_bytes(b"document")
+
+    first_key, hit = _cached_run(cache, doc)
+    assert hit is None
+    assert _cached_run(cache, doc) == (first_key, [str(doc)])
+
+    (rules / "technical_highlight.json").write_text('{"rules": [{"pattern": "mg"}]}', encoding="utf-8")
+    key, hit = _cached_run(cache, doc)
+    assert key != first_key
+    assert hit is None
+
+
+def test_word_lists_and_new_rule_files_are_part_of_the_key(tmp_path, monkeypatch):
+    rules = _rules(tmp_path, monkeypatch)
+    cache = MacroOutputCache(folder=str(tmp_path / "cache"), max_bytes=10 ** 9)
+    doc = tmp_path / "ch1.docx"
+    doc.write_bytes(b"document")
+    keys = {cache.make_key(str(doc), ["msrpre.SpellCheck"])}
+
+    (rules / "spelling" / "base.txt").write_text("aspirin\nibuprofen\n", encoding="utf-8")
+    keys.add(cache.make_key(str(doc), ["msrpre.SpellCheck"]))
+
+    (rules / "terminology" / "acme.json").write_text("{}", encoding="utf-8")
+    keys.add(cache.make_key(str(doc), ["msrpre.SpellCheck"]))
+
+    assert len(keys) == 3
+
+
+def test_analyst_is_part_of_the_key(tmp_path, monkeypatch):
+    _rules(tmp_path, monkeypatch)
+    cache = MacroOutputCache(folder=str(tmp_path / "cache"), max_bytes=10 ** 9)
+    doc = tmp_path / "ch1.docx"
+    doc.write_bytes(b"document")
+    macros = ["msrpre.GenerateDashboardReport"]
+
+    assert cache.make_key(str(doc), macros, "alice") != cache.make_key(str(doc), macros, "bob")
+    assert cache.make_key(str(doc), macros, "alice") == cache.make_key(str(doc), macros, "alice")
@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+pytest.importorskip("pythoncom")
+import worker_hub  # noqa: E402
+import word_processor  # noqa: E402
+from worker_hub import WorkerHub  # noqa: E402
+from word_processor import OptimizedDocumentProcessor, process_documents_parallel  # noqa: E402
+
+
+def test_local_workers_take_back_documents_from_a_stalled_remote_worker(tmp_path, monkeypatch):
+    hub = WorkerHub()
+    # Registered with free slots but never leases anything
+    hub.register("stalled", 2)
+    monkeypatch.setattr(word_processor, "worker_hub", hub)
+    monkeypatch.setattr(worker_hub, "WORKER_RECLAIM_SECONDS", 0.2)
+
+    remote_outcomes = []
+    run = hub.run
+
+    def recording_run(*args, **kwargs):
+        outcome = run(*args, **kwargs)
+        remote_outcomes.append(outcome)
+        return outcome
+    monkeypatch.setattr(hub, "run", recording_run)
+
+    processed = []
+
+    def process_document(self, path, macro_names, user=None):
+        time.sleep(0.3)
+        processed.append((os.path.basename(path), threading.current_thread().name))
+        return [], True
+
+    monkeypatch.setattr(OptimizedDocumentProcessor, "__enter__", lambda self: self)
+    monkeypatch.setattr(OptimizedDocumentProcessor, "__exit__", lambda self, *exc: None)
+    monkeypatch.setattr(OptimizedDocumentProcessor, "_resolve_macro_names",
+                        lambda self, selected_tasks, route_type, errors: ["msrpre.GenerateDashboardReport"])
+    monkeypatch.setattr(OptimizedDocumentProcessor, "_split_native", lambda self, names: [(True, list(names))])
+    monkeypatch.setattr(OptimizedDocumentProcessor, "process_document", process_document)
+
+    paths = []
+    for n in range(4):
+        path = tmp_path / f"ch{n}.docx"
+        path.write_bytes(b"document")
+        paths.append(str(path))
+
+    started = time.monotonic()
+    errors, _, _ = process_documents_parallel(paths, ["0"], "ppd", "alice", "USER", workers=2)
+    elapsed = time.monotonic() - started
+
+    assert errors == []
+    assert sorted(name for name, _ in processed) == [f"ch{n}.docx" for n in range(4)]
+    # The stalled worker's documents were taken back, not left until it was declared dead
+    assert remote_outcomes and all(outcome is None for outcome in remote_outcomes)
+    assert all(thread.startswith("word-worker") for _, thread in processed)
+    assert elapsed < 10
+    assert hub.snapshot()["queued"] == 0
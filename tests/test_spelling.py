@@ -0,0 +1,23 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ooxml.spelling import spell_checker, misspellings  # noqa: E402
+
+CHAPTER_PARAGRAPH = (
+    "Serum creatinine rose to 2.4 mg/dL and systolic pressure exceeded 160 mmHg (REF-12, REF-13). "
+    "HbA1c was 7.2%; IL-6 and TNF-α levels were measured by ELISA in 5 mL samples at 37°C, "
+    "as described previously (Smith et al., 2019; Fig. 3A). Patients received 500 μg/kg/min of "
+    "CYP3A4 inhibitors; the 18F-FDG PET/CT scan showed a 2.5-cm lesion in segment IVb, and "
+    "mRNA expression fell by 40% within 12 hrs."
+)
+
+
+def test_references_identifiers_and_units_are_not_flagged():
+    assert misspellings(CHAPTER_PARAGRAPH, spell_checker()) == []
+
+
+def test_misspellings_next_to_skipped_tokens_are_still_flagged():
+    text = "The pateint (REF-7) recieved 5 mg of HbA1c-lowering therapy."
+    found = [word for _, _, word in misspellings(text, spell_checker())]
+    assert found == ["pateint", "recieved"]
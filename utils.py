@@ -37,6 +37,12 @@ def log_errors(error_list):
 def allowed_file(filename):
     return any(filename.lower().endswith(ext) for ext in ALLOWED_EXTENSIONS)
 
+def is_output_of(filename, stem):
+    """True for the document named stem or a side file named after it ("<stem>_*" or "<stem>.*")."""
+    if filename.startswith("~$"):
+        return False
+    return filename == stem or filename.startswith((stem + "_", stem + "."))
+
 def setup_logging(app):
     if not app.debug:
         file_handler = RotatingFileHandler('logs/s4c.log', maxBytes=10240000, backupCount=10)
@@ -1,21 +1,82 @@
 import os
+import csv
 import time
+import queue
+import shutil
+import tempfile
+import threading
 import subprocess
+from contextlib import ExitStack, contextmanager
 import pythoncom
 import win32com.client as win32
 import pywintypes
-from config import COMMON_MACRO_FOLDER, DEFAULT_MACRO_NAME, WORD_START_RETRIES, ROUTE_MACROS
+from config import (COMMON_MACRO_FOLDER, DEFAULT_MACRO_NAME, WORD_START_RETRIES, ROUTE_MACROS, MACRO_CACHE_ENABLED,
+                    MACRO_PREFLIGHT_ENABLED, NATIVE_MACROS_ENABLED, WORD_BATCH_WORKERS)
 from utils import log_errors
+from macro_cache import macro_output_cache
+from word_scheduler import word_scheduler
+from worker_hub import worker_hub
+from ooxml.preflight import applicable_macros
+from ooxml.native import is_native, run_native_macro, word_steps, ANALYST_MACROS
+
+# Serializes Word start-up so each processor can tell which winword.exe is its own
+_word_start_lock = threading.Lock()
+
+
+def _word_pids():
+    result = subprocess.run(["tasklist", "/fi", "imagename eq winword.exe", "/fo", "csv", "/nh"],
+                            capture_output=True, text=True, check=False)
+    return {int(row[1]) for row in csv.reader(result.stdout.splitlines()) if len(row) > 1 and row[1].isdigit()}
+
+
+def _dispatch_private_word():
+    """Start a private Word instance and return (word, pid); pid is None if it could not be told apart."""
+    # DispatchEx starts a private instance; Dispatch would attach to
+    # a Word that another worker is driving
+    with _word_start_lock:
+        before = _word_pids()
+        word = win32.DispatchEx("Word.Application")
+        started = _word_pids() - before
+    return word, (started.pop() if len(started) == 1 else None)
+
+
+def _kill_word_pid(pid):
+    if pid:
+        subprocess.run(["taskkill", "/f", "/pid", str(pid)], capture_output=True, check=False)
+
+
+@contextmanager
+def private_word():
+    """Word instance for one-off automation, quit on exit (or killed by pid if Quit fails).
+
+    The caller must have called pythoncom.CoInitialize() on this thread.
+    """
+    word, pid = _dispatch_private_word()
+    try:
+        word.Visible = False
+        word.DisplayAlerts = False
+        yield word
+    finally:
+        try:
+            word.Quit()
+        except Exception:
+            _kill_word_pid(pid)
+
 
 class OptimizedDocumentProcessor:
     def __init__(self):
         self.word = None
+        self.word_pid = None
         self.docs = []
         self.macro_template_loaded = False
+        # (document, size_bytes, macro_name, phase, duration_ms) rows for the macro_timings table
+        self.timings = []
+        # (document, macro_name, reason) for macros the preflight found not applicable
+        self.not_applicable = []
 
     def __enter__(self):
+        # Word is started lazily so fully cached batches never launch it
         pythoncom.CoInitialize()
-        self.word = self._start_word_optimized()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -24,10 +85,8 @@ class OptimizedDocumentProcessor:
     def _start_word_optimized(self):
         for attempt in range(WORD_START_RETRIES):
             try:
-                subprocess.run(["taskkill", "/f", "/im", "winword.exe"],
-                               capture_output=True, check=False)
+                word, self.word_pid = _dispatch_private_word()
 
-                word = win32.Dispatch("Word.Application")
                 word.Visible = False
                 word.DisplayAlerts = False
                 word.AutomationSecurity = 1
@@ -36,6 +95,7 @@ class OptimizedDocumentProcessor:
                 word.Options.ConfirmConversions = False
                 return word
             except Exception as e:
+                self._kill_word()
                 if attempt == WORD_START_RETRIES - 1:
                     raise RuntimeError(f"Failed to start Word: {e}")
                 time.sleep(1)
@@ -65,67 +125,425 @@ class OptimizedDocumentProcessor:
             log_errors([f"Failed to load macro template: {str(e)}"])
             return False
 
-    def process_documents_batch(self, file_paths, selected_tasks, route_type):
+    def _resolve_macro_names(self, selected_tasks, route_type, errors):
+        route_macros = ROUTE_MACROS.get(route_type, {}).get('macros', [])
+        macro_names = []
+        for task_index in selected_tasks:
+            try:
+                idx = int(task_index)
+                if 0 <= idx < len(route_macros):
+                    macro_names.append(route_macros[idx])
+                else:
+                    errors.append(f"Invalid task index {idx} for route {route_type}")
+            except ValueError:
+                errors.append(f"Invalid task index: {task_index}")
+        return macro_names
+
+    def _kill_word(self):
+        """Force-kill this processor's own Word instance; other workers' instances are left alone."""
+        _kill_word_pid(self.word_pid)
+        self.word_pid = None
+
+    def _quit_word(self):
+        if self.word:
+            try:
+                self.word.Quit()
+                self.word_pid = None
+            except:
+                self._kill_word()
+        self.word = None
+
+    def _shutdown_word(self):
+        self._cleanup_documents()
+        self._quit_word()
+        self.macro_template_loaded = False
+
+    def process_documents_batch(self, file_paths, selected_tasks, route_type, ticket=None):
         errors = []
+        macro_names = self._resolve_macro_names(selected_tasks, route_type, errors)
 
-        if not self._load_macro_template():
-            errors.append("Failed to load macro template")
-            return errors
+        for i, doc_path in enumerate(file_paths):
+            # Let a higher-priority job take the Word slot between documents
+            if ticket is not None and i > 0:
+                word_scheduler.checkpoint(ticket, on_yield=self._shutdown_word)
 
-        route_macros = ROUTE_MACROS.get(route_type, {}).get('macros', [])
+            doc_errors, usable = self.process_document(doc_path, macro_names)
+            errors.extend(doc_errors)
+            if not usable:
+                break
+
+        return errors
 
-        for doc_path in file_paths:
+    def process_document(self, doc_path, macro_names, user=None):
+        """
+        Run macro_names on one document for user (named in native reports).
+        Returns (errors, usable); usable is False when this processor's Word
+        cannot take further documents.
+        """
+        errors = []
+        abs_path = os.path.abspath(doc_path)
+        if not os.path.exists(abs_path):
+            return [f"File not found: {abs_path}"], True
+
+        size_bytes = os.path.getsize(abs_path)
+        cache_key = None
+        if MACRO_CACHE_ENABLED:
             try:
-                abs_path = os.path.abspath(doc_path)
-                if not os.path.exists(abs_path):
-                    errors.append(f"File not found: {abs_path}")
-                    continue
+                started = time.perf_counter()
+                # A report naming its analyst must not be served to another user
+                analyst = user if any(name in ANALYST_MACROS for name in macro_names) else None
+                cache_key = macro_output_cache.make_key(abs_path, macro_names, analyst)
+                hit = macro_output_cache.restore(cache_key, abs_path)
+                if hit is not None:
+                    self._record_timing(abs_path, size_bytes, None, 'cache', started)
+                    return [], True
+            except Exception as e:
+                log_errors([f"Macro cache lookup failed for {abs_path}: {e}"])
+                cache_key = None
 
-                doc = self.word.Documents.Open(abs_path, ReadOnly=False, AddToRecentFiles=False)
-                self.docs.append(doc)
+        to_run = macro_names
+        if MACRO_PREFLIGHT_ENABLED:
+            to_run, skipped = applicable_macros(abs_path, macro_names)
+            for macro_name, reason in skipped:
+                self.not_applicable.append((os.path.basename(abs_path), macro_name, reason))
+                self._record_timing(abs_path, size_bytes, macro_name, 'skipped', time.perf_counter())
+            if not to_run:
+                return errors, True
 
-                for task_index in selected_tasks:
-                    try:
-                        idx = int(task_index)
-                        if 0 <= idx < len(route_macros):
-                            macro_name = route_macros[idx]
-                            try:
-                                self.word.Run(macro_name)
-                            except pywintypes.com_error as ce:
-                                errors.append(f"COM error running '{macro_name}': {ce}")
-                            except Exception as me:
-                                errors.append(f"Macro '{macro_name}' failed: {me}")
-                        else:
-                            errors.append(f"Invalid task index {idx} for route {route_type}")
-                    except ValueError:
-                        errors.append(f"Invalid task index: {task_index}")
+        # Macros write their side files next to the document and the rest of
+        # the batch shares its folder, so the macros run on a copy in a folder
+        # of its own; everything that folder ends up holding is this document's
+        folder = os.path.dirname(abs_path)
+        workdir = tempfile.mkdtemp(prefix=".macros-", dir=folder)
+        try:
+            work_path = os.path.join(workdir, os.path.basename(abs_path))
+            shutil.copy2(abs_path, work_path)
+            saved, usable = self._run_macros(work_path, size_bytes, to_run, user, errors)
+            # A document left open by a failed save would stay locked in workdir
+            self._cleanup_documents()
+            extras = _move_outputs(workdir, folder, abs_path, errors)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
 
-                try:
-                    doc.Save()
-                    doc.Close(SaveChanges=False)
-                    self.docs.remove(doc)
-                except Exception as se:
-                    errors.append(f"Failed to save document: {se}")
+        # A run that hit a COM or macro error may not fail the same way
+        # next time, so only clean runs are cached
+        if cache_key and saved and not errors:
+            macro_output_cache.store(cache_key, abs_path, extras)
+
+        return errors, usable
+
+    def _run_macros(self, doc_path, size_bytes, macro_names, user, errors):
+        """Run macro_names on doc_path, appending to errors. Returns (saved, usable)."""
+        for native, segment in self._split_native(macro_names):
+            if native:
+                errors.extend(self._run_native_macros(doc_path, size_bytes, segment, user))
+                continue
 
-            except Exception as doc_err:
-                errors.append(f"Document processing failed: {doc_err}")
+            if self.word is None:
+                self.word = self._start_word_optimized()
 
+            if not self._load_macro_template():
+                errors.append("Failed to load macro template")
+                return False, False
+
+            segment_errors, segment_saved = self._process_single_document(doc_path, size_bytes, segment)
+            errors.extend(segment_errors)
+            if not segment_saved:
+                return False, True
+        return True, True
+
+    def _split_native(self, macro_names):
+        """
+        Group macro_names into consecutive (native, [names]) segments, keeping
+        their order, so Word only opens the document around Word-only runs.
+        A partially ported macro becomes its native part followed by the
+        procedures that still run in Word.
+        """
+        steps = []
+        for name in macro_names:
+            if NATIVE_MACROS_ENABLED and is_native(name):
+                steps.append((True, name))
+                steps.extend((False, step) for step in word_steps(name))
+            else:
+                steps.append((False, name))
+
+        segments = []
+        for native, name in steps:
+            if segments and segments[-1][0] == native:
+                segments[-1][1].append(name)
+            else:
+                segments.append((native, [name]))
+        return segments
+
+    def _run_native_macros(self, abs_path, size_bytes, macro_names, user=None):
+        errors = []
+        for macro_name in macro_names:
+            started = time.perf_counter()
+            try:
+                errors.extend(run_native_macro(macro_name, abs_path, user))
+            except Exception as e:
+                errors.append(f"Macro '{macro_name}' failed: {e}")
+            self._record_timing(abs_path, size_bytes, macro_name, 'run', started)
         return errors
 
-    def _cleanup(self):
-        for doc in self.docs:
+    def _record_timing(self, abs_path, size_bytes, macro_name, phase, started):
+        duration_ms = (time.perf_counter() - started) * 1000.0
+        self.timings.append((os.path.basename(abs_path), size_bytes, macro_name, phase, duration_ms))
+
+    def _process_single_document(self, abs_path, size_bytes, macro_names):
+        errors = []
+        try:
+            started = time.perf_counter()
+            doc = self.word.Documents.Open(abs_path, ReadOnly=False, AddToRecentFiles=False)
+            self.docs.append(doc)
+            self._record_timing(abs_path, size_bytes, None, 'open', started)
+
+            for macro_name in macro_names:
+                started = time.perf_counter()
+                try:
+                    self.word.Run(macro_name)
+                except pywintypes.com_error as ce:
+                    errors.append(f"COM error running '{macro_name}': {ce}")
+                except Exception as me:
+                    errors.append(f"Macro '{macro_name}' failed: {me}")
+                self._record_timing(abs_path, size_bytes, macro_name, 'run', started)
+
             try:
+                started = time.perf_counter()
+                doc.Save()
                 doc.Close(SaveChanges=False)
-            except:
-                pass
+                self.docs.remove(doc)
+                self._record_timing(abs_path, size_bytes, None, 'save', started)
+                return errors, True
+            except Exception as se:
+                errors.append(f"Failed to save document: {se}")
 
-        if self.word:
+        except Exception as doc_err:
+            errors.append(f"Document processing failed: {doc_err}")
+
+        return errors, False
+
+    def _cleanup_documents(self):
+        for doc in self.docs:
             try:
-                self.word.Quit()
+                doc.Close(SaveChanges=False)
             except:
                 pass
+        self.docs = []
+
+    def _cleanup(self):
+        self._cleanup_documents()
+        self._quit_word()
 
         try:
             pythoncom.CoUninitialize()
         except:
             pass
+
+
+def _move_outputs(workdir, folder, doc_path, errors):
+    """
+    Move the processed document and its side files from workdir back into
+    folder. Returns the side files' new paths.
+    """
+    extras = []
+    for fn in sorted(os.listdir(workdir)):
+        if fn.startswith("~$"):
+            continue
+        target = os.path.join(folder, fn)
+        try:
+            os.replace(os.path.join(workdir, fn), target)
+        except OSError as e:
+            errors.append(f"Failed to move output '{fn}': {e}")
+            continue
+        if target != doc_path:
+            extras.append(target)
+    return extras
+
+
+def _process_locally(path, macro_names, route_type, user, role, needs_word=True):
+    """One document on a Word instance of its own; returns (errors, timings, not_applicable)."""
+    with ExitStack() as stack:
+        if needs_word:
+            stack.enter_context(word_scheduler.slot(user, role, route_type, 1))
+        processor = stack.enter_context(OptimizedDocumentProcessor())
+        doc_errors, _ = processor.process_document(path, macro_names, user)
+        return doc_errors, processor.timings, processor.not_applicable
+
+
+def process_documents_parallel(file_paths, selected_tasks, route_type, user, role, workers=WORD_BATCH_WORKERS,
+                               stop=None, on_document=None):
+    """
+    Spread a batch over up to `workers` Word instances. Each worker thread
+    holds its own scheduler slot and OptimizedDocumentProcessor and pulls the
+    next document from a shared queue, so one long chapter does not hold up
+    the rest. Returns (errors, timings, not_applicable); errors are grouped
+    by document in upload order and prefixed with the file name.
+
+    Registered remote worker agents take part through one extra thread per
+    remote slot, which hands documents to the worker hub; a document the hub
+    cannot place is processed locally instead. Local workers that run out of
+    documents wait while remote documents are outstanding, and take back
+    any that has gone WORKER_RECLAIM_SECONDS without a remote lease.
+
+    stop() is checked before each document is taken; once it returns True
+    the remaining documents are left unprocessed. on_document(index, errors)
+    is called as each document finishes.
+
+    A batch whose macros all run natively never starts Word, so its workers
+    take no scheduler slot and do not count against Word capacity.
+    """
+    resolve_errors = []
+    planner = OptimizedDocumentProcessor()
+    macro_names = planner._resolve_macro_names(selected_tasks, route_type, resolve_errors)
+    needs_word = any(not native for native, _ in planner._split_native(macro_names))
+
+    pending = queue.Queue()
+    for index, path in enumerate(file_paths):
+        pending.put((index, path))
+    workers = max(1, min(workers, len(file_paths)))
+    share = -(-len(file_paths) // workers)
+
+    results = {}
+    timings = []
+    not_applicable = []
+    lock = threading.Lock()
+    # Documents taken back from the hub for idle local workers
+    reclaimed = queue.Queue()
+    # Documents handed to the hub and not yet finished or taken back
+    remote_outstanding = [0]
+    idle_workers = [0]
+
+    def finished(index, path, doc_errors):
+        with lock:
+            results[index] = doc_errors
+        if on_document is not None:
+            try:
+                on_document(index, doc_errors)
+            except Exception as e:
+                log_errors([f"Document callback failed for {path}: {e}"])
+
+    def reclaim():
+        # One document per idle local worker not already given one
+        with lock:
+            return idle_workers[0] > reclaimed.qsize()
+
+    def remote_worker():
+        while True:
+            if stop is not None and stop():
+                break
+            with lock:
+                try:
+                    index, path = pending.get_nowait()
+                except queue.Empty:
+                    break
+                remote_outstanding[0] += 1
+            try:
+                outcome = worker_hub.run(path, macro_names, route_type, stop=stop, user=user, reclaim=reclaim)
+                if outcome is None:
+                    if stop is not None and stop():
+                        break
+                    if reclaim():
+                        reclaimed.put((index, path))
+                        continue
+                    outcome = _process_locally(path, macro_names, route_type, user, role, needs_word)
+                doc_errors, doc_timings, doc_not_applicable = outcome
+            except Exception as e:
+                doc_errors, doc_timings, doc_not_applicable = [f"Document processing failed: {e}"], [], []
+            finally:
+                with lock:
+                    remote_outstanding[0] -= 1
+            with lock:
+                timings.extend(doc_timings)
+                not_applicable.extend(doc_not_applicable)
+            finished(index, path, doc_errors)
+
+    def next_document():
+        """The next document for a local worker, or None once the batch has nothing left for it."""
+        try:
+            return pending.get_nowait()
+        except queue.Empty:
+            pass
+        with lock:
+            idle_workers[0] += 1
+        try:
+            while not (stop is not None and stop()):
+                with lock:
+                    if not remote_outstanding[0] and reclaimed.empty():
+                        return None
+                try:
+                    return reclaimed.get(timeout=1.0)
+                except queue.Empty:
+                    pass
+            return None
+        finally:
+            with lock:
+                idle_workers[0] -= 1
+
+    def worker():
+        processor = None
+        try:
+            with ExitStack() as stack:
+                # Take the slot before claiming a document, so documents are
+                # not parked behind a worker that is still queued
+                ticket = None
+                if needs_word:
+                    ticket = stack.enter_context(word_scheduler.slot(user, role, route_type, share))
+                processor = stack.enter_context(OptimizedDocumentProcessor())
+                first = True
+                while True:
+                    if stop is not None and stop():
+                        break
+                    document = next_document()
+                    if document is None:
+                        break
+                    index, path = document
+                    if ticket is not None and not first:
+                        word_scheduler.checkpoint(ticket, on_yield=processor._shutdown_word)
+                    first = False
+                    try:
+                        doc_errors, usable = processor.process_document(path, macro_names, user)
+                    except Exception as e:
+                        doc_errors, usable = [f"Document processing failed: {e}"], False
+                    finished(index, path, doc_errors)
+                    if not usable:
+                        break
+                # Unwinding closes the processor, and with it Word, before the slot is released
+        except Exception as e:
+            log_errors([f"Word worker failed: {e}"])
+        finally:
+            if processor is not None:
+                with lock:
+                    timings.extend(processor.timings)
+                    not_applicable.extend(processor.not_applicable)
+
+    remote = min(worker_hub.capacity(), len(file_paths))
+    threads = [threading.Thread(target=worker, name=f"word-worker-{n}", daemon=True) for n in range(workers)]
+    threads += [threading.Thread(target=remote_worker, name=f"remote-worker-{n}", daemon=True) for n in range(remote)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Taken back for a local worker that then gave up on its Word instance
+    while not reclaimed.empty() and not (stop is not None and stop()):
+        index, path = reclaimed.get_nowait()
+        try:
+            doc_errors, doc_timings, doc_not_applicable = _process_locally(path, macro_names, route_type, user, role,
+                                                                           needs_word)
+        except Exception as e:
+            doc_errors, doc_timings, doc_not_applicable = [f"Document processing failed: {e}"], [], []
+        timings.extend(doc_timings)
+        not_applicable.extend(doc_not_applicable)
+        finished(index, path, doc_errors)
+
+    stopped = stop is not None and stop()
+    errors = list(resolve_errors)
+    for index, path in enumerate(file_paths):
+        name = os.path.basename(path)
+        if index not in results:
+            if not stopped:
+                errors.append(f"{name}: not processed, no Word worker was available")
+            continue
+        errors.extend(f"{name}: {e}" for e in results[index])
+    return errors, timings, not_applicable
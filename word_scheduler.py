@@ -0,0 +1,197 @@
+import time
+import itertools
+import threading
+from collections import deque
+from contextlib import contextmanager
+from config import (ROUTE_PERMISSIONS, WORD_WORKERS, WORD_ROLE_PRIORITY, WORD_PRIORITY_STEP_SECONDS,
+                    WORD_FAIR_SHARE_SECONDS, WORD_AGING_RATE, ADMISSION_DEFAULT_DOC_SECONDS)
+
+
+class WordTicket:
+    def __init__(self, ticket_id, user, role, route_type, documents, priority_class):
+        self.id = ticket_id
+        self.user = user
+        self.role = role
+        self.route_type = route_type
+        self.documents = documents
+        self.priority_class = priority_class
+        self.enqueued_at = time.monotonic()
+        self.queued_at = self.enqueued_at  # start of the current wait
+        self.waited_seconds = 0.0  # earlier waits, before checkpoint() yields
+        self.granted_at = None
+        self.service_seconds = 0.0
+
+
+class WordScheduler:
+    """
+    Grants Word worker slots by priority class, per-user fair share and aging.
+
+    A waiting ticket's score is
+        class * WORD_PRIORITY_STEP_SECONDS
+        + (user's running + earlier queued tickets) * WORD_FAIR_SHARE_SECONDS
+        - seconds spent queued * WORD_AGING_RATE
+    and the lowest score gets the next free slot. Long batches call
+    checkpoint() between documents so they can step aside for a better
+    ticket instead of holding the slot for the whole upload; the time they
+    already waited keeps counting towards their aging when they re-queue.
+    """
+
+    def __init__(self, workers=WORD_WORKERS):
+        self.workers = workers
+        self._cond = threading.Condition()
+        self._ids = itertools.count(1)
+        self._waiting = []
+        self._running = []
+        self._waits = {}  # priority_class -> deque of recent wait seconds
+        self._doc_seconds = deque(maxlen=200)  # recent Word time per document
+
+    def priority_class(self, role, route_type):
+        lowest = max(WORD_ROLE_PRIORITY.values(), default=0)
+        role = str(role or '').upper()
+        if role != 'ADMIN' and role not in ROUTE_PERMISSIONS.get(route_type, [role]):
+            return lowest
+        return WORD_ROLE_PRIORITY.get(role, lowest)
+
+    def _user_load(self, ticket):
+        load = sum(1 for t in self._running if t.user == ticket.user and t is not ticket)
+        load += sum(1 for t in self._waiting if t.user == ticket.user and t.enqueued_at < ticket.enqueued_at)
+        return load
+
+    def _score(self, ticket, now, waited=None):
+        if waited is None:
+            waited = ticket.waited_seconds + (now - ticket.queued_at)
+        return (ticket.priority_class * WORD_PRIORITY_STEP_SECONDS
+                + self._user_load(ticket) * WORD_FAIR_SHARE_SECONDS
+                - waited * WORD_AGING_RATE)
+
+    def _next_ticket(self, now):
+        if not self._waiting:
+            return None
+        return min(self._waiting, key=lambda t: (self._score(t, now), t.enqueued_at))
+
+    def _acquire(self, ticket):
+        with self._cond:
+            self._waiting.append(ticket)
+            self._cond.notify_all()
+            while True:
+                now = time.monotonic()
+                if len(self._running) < self.workers and self._next_ticket(now) is ticket:
+                    break
+                # Wake up periodically: aging changes scores while nobody releases
+                self._cond.wait(timeout=1.0)
+
+            self._waiting.remove(ticket)
+            ticket.granted_at = now
+            ticket.waited_seconds += now - ticket.queued_at
+            self._running.append(ticket)
+            self._waits.setdefault(ticket.priority_class, deque(maxlen=200)).append(now - ticket.queued_at)
+
+    def _release(self, ticket):
+        with self._cond:
+            if ticket in self._running:
+                self._running.remove(ticket)
+                ticket.service_seconds += time.monotonic() - ticket.granted_at
+            self._cond.notify_all()
+
+    def should_yield(self, ticket):
+        """True when a waiting ticket would be scheduled ahead of this one if it re-queued now."""
+        with self._cond:
+            if len(self._running) < self.workers or not self._waiting:
+                return False
+            now = time.monotonic()
+            best = self._next_ticket(now)
+            return self._score(best, now) < self._score(ticket, now, waited=0.0)
+
+    def checkpoint(self, ticket, on_yield=None):
+        """
+        Called by batch jobs between documents. If a better ticket is waiting,
+        runs on_yield (e.g. to shut Word down), gives up the slot and blocks
+        until re-granted. Returns True if the job yielded.
+        """
+        if not self.should_yield(ticket):
+            return False
+        if on_yield:
+            on_yield()
+        self._release(ticket)
+        ticket.queued_at = time.monotonic()
+        self._acquire(ticket)
+        return True
+
+    @contextmanager
+    def slot(self, user, role, route_type, documents=1):
+        ticket = WordTicket(next(self._ids), user, role, route_type, documents,
+                            self.priority_class(role, route_type))
+        self._acquire(ticket)
+        try:
+            yield ticket
+        finally:
+            self._release(ticket)
+            with self._cond:
+                self._doc_seconds.append(ticket.service_seconds / max(1, ticket.documents))
+
+    def _seconds_per_document(self):
+        if not self._doc_seconds:
+            return ADMISSION_DEFAULT_DOC_SECONDS
+        return sum(self._doc_seconds) / len(self._doc_seconds)
+
+    def estimate_wait_seconds(self, role=None, route_type=None):
+        """
+        Expected time before a newly queued job gets a Word slot. Only queued
+        jobs of the same or a better class count, since worse ones are overtaken.
+        """
+        with self._cond:
+            cls = self.priority_class(role, route_type) if route_type else None
+            return self._estimate_wait_locked(time.monotonic(), cls)
+
+    def _estimate_wait_locked(self, now, priority_class=None):
+        if len(self._running) < self.workers and not self._waiting:
+            return 0.0
+        per_doc = self._seconds_per_document()
+        ahead = [t for t in self._waiting if priority_class is None or t.priority_class <= priority_class]
+        backlog = sum(t.documents for t in ahead) * per_doc
+        for t in self._running:
+            backlog += max(0.0, t.documents * per_doc - (now - t.granted_at))
+        return backlog / max(1, self.workers)
+
+    def snapshot(self):
+        """Queue depth, running jobs and wait times per priority class for the admin page."""
+        with self._cond:
+            now = time.monotonic()
+            classes = sorted(set(WORD_ROLE_PRIORITY.values())
+                             | {t.priority_class for t in self._waiting + self._running})
+            stats = []
+            for cls in classes:
+                waiting = [t for t in self._waiting if t.priority_class == cls]
+                recent = sorted(self._waits.get(cls, []))
+                stats.append({
+                    'priority_class': cls,
+                    'roles': sorted(r for r, c in WORD_ROLE_PRIORITY.items() if c == cls),
+                    'queued': len(waiting),
+                    'queued_documents': sum(t.documents for t in waiting),
+                    'running': sum(1 for t in self._running if t.priority_class == cls),
+                    'oldest_wait': max((now - t.queued_at for t in waiting), default=0.0),
+                    'avg_wait': sum(recent) / len(recent) if recent else 0.0,
+                    'max_wait': recent[-1] if recent else 0.0,
+                })
+
+            queue = [{
+                'id': t.id,
+                'user': t.user,
+                'role': t.role,
+                'route_type': t.route_type,
+                'documents': t.documents,
+                'priority_class': t.priority_class,
+                'state': 'running' if t in self._running else 'queued',
+                'seconds': now - (t.granted_at if t in self._running else t.queued_at),
+            } for t in self._running + sorted(self._waiting, key=lambda t: self._score(t, now))]
+
+            return {
+                'workers': self.workers,
+                'classes': stats,
+                'queue': queue,
+                'seconds_per_document': self._seconds_per_document(),
+                'estimated_wait': self._estimate_wait_locked(now),
+            }
+
+
+word_scheduler = WordScheduler()
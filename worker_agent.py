@@ -0,0 +1,219 @@
+"""
+Remote Word worker agent.
+
+Runs on a Windows host with Word and the macro template installed, pulls
+documents from the hub (app1.py) over HTTP, runs the requested macros with
+the same OptimizedDocumentProcessor the hub uses and uploads the results.
+
+    set S4C_WORKER_TOKEN=<shared token>
+    python worker_agent.py --hub http://s4c-host:5001 --capacity 2
+
+The hub must have the same S4C_WORKER_TOKEN set. Pointing an agent at
+http://127.0.0.1:5001 on the hub machine itself gives a loopback worker.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import argparse
+import tempfile
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from config import WORKER_AGENT_TOKEN, WORKER_HEARTBEAT_SECONDS, WORKER_POLL_SECONDS
+from utils import log_errors, is_output_of
+
+# Transient failures (network, hub restart) are retried after this many seconds
+RETRY_SECONDS = 10
+
+
+class HubError(Exception):
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+class HubClient:
+    def __init__(self, hub_url, token):
+        self.hub_url = hub_url.rstrip('/')
+        self.token = token
+
+    def request(self, method, path, payload=None, data=None, content_type=None):
+        headers = {'X-Worker-Token': self.token}
+        if payload is not None:
+            data = json.dumps(payload).encode('utf-8')
+            content_type = 'application/json'
+        if content_type:
+            headers['Content-Type'] = content_type
+        req = urllib.request.Request(f"{self.hub_url}/workers{path}", data=data, headers=headers, method=method)
+        try:
+            return urllib.request.urlopen(req, timeout=120)
+        except urllib.error.HTTPError as e:
+            raise HubError(e.code, e.read().decode('utf-8', 'replace')) from None
+
+    def json(self, method, path, payload=None):
+        with self.request(method, path, payload=payload if payload is not None else {}) as response:
+            if response.status == 204:
+                return None
+            return json.loads(response.read().decode('utf-8'))
+
+
+class WorkerAgent:
+    def __init__(self, client, name, capacity):
+        self.client = client
+        self.name = name
+        self.capacity = capacity
+        self.worker_id = None
+        self.heartbeat_seconds = WORKER_HEARTBEAT_SECONDS
+        self.poll_seconds = WORKER_POLL_SECONDS
+        self._lock = threading.Lock()
+        self._register_lock = threading.Lock()
+        self._active = set()
+        self._dropped = set()
+        self._stop = threading.Event()
+
+    def register(self):
+        info = self.client.json('POST', '/register', {'name': self.name, 'capacity': self.capacity})
+        self.worker_id = info['worker_id']
+        self.heartbeat_seconds = info.get('heartbeat_seconds', self.heartbeat_seconds)
+        self.poll_seconds = info.get('poll_seconds', self.poll_seconds)
+        print(f"Registered with {self.client.hub_url} as {self.name} ({self.capacity} slots)")
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.heartbeat_seconds):
+            with self._lock:
+                active = sorted(self._active)
+            worker_id = self.worker_id
+            try:
+                drop = self.client.json('POST', f'/{worker_id}/heartbeat', {'tasks': active})
+                with self._lock:
+                    self._dropped.update(drop.get('drop', []))
+            except HubError as e:
+                if e.status == 410:
+                    # The hub restarted or gave up on us; its leases are gone
+                    with self._lock:
+                        self._dropped.update(self._active)
+                    self._reregister(worker_id)
+            except OSError as e:
+                log_errors([f"Worker heartbeat failed: {e}"])
+
+    def _reregister(self, stale_id=None):
+        with self._register_lock:
+            # Another thread may have registered again already
+            while self.worker_id == stale_id and not self._stop.is_set():
+                try:
+                    self.register()
+                except (HubError, OSError) as e:
+                    log_errors([f"Worker registration failed: {e}"])
+                    self._stop.wait(RETRY_SECONDS)
+
+    def _lost(self, task_id):
+        with self._lock:
+            return task_id in self._dropped
+
+    def _slot_loop(self):
+        # COM is initialised per thread, so each slot drives its own Word
+        from word_processor import OptimizedDocumentProcessor
+
+        with OptimizedDocumentProcessor() as processor:
+            while not self._stop.is_set():
+                worker_id = self.worker_id
+                try:
+                    task = self.client.json('POST', f'/{worker_id}/lease')
+                except HubError as e:
+                    if e.status == 410:
+                        self._reregister(worker_id)
+                    else:
+                        self._stop.wait(RETRY_SECONDS)
+                    continue
+                except OSError:
+                    self._stop.wait(RETRY_SECONDS)
+                    continue
+                if task is None:
+                    self._stop.wait(self.poll_seconds)
+                    continue
+                task['worker_id'] = worker_id
+
+                with self._lock:
+                    self._active.add(task['task_id'])
+                try:
+                    self._run_task(processor, task)
+                except Exception as e:
+                    log_errors([f"Worker task {task['task_id']} failed: {e}"])
+                    try:
+                        self.client.json('POST', f"/{worker_id}/tasks/{task['task_id']}/fail", {'error': str(e)})
+                    except (HubError, OSError):
+                        pass
+                finally:
+                    with self._lock:
+                        self._active.discard(task['task_id'])
+                        self._dropped.discard(task['task_id'])
+
+    def _run_task(self, processor, task):
+        task_path = f"/{task['worker_id']}/tasks/{task['task_id']}"
+        workdir = tempfile.mkdtemp(prefix="s4c_worker_")
+        try:
+            filename = os.path.basename(task['filename'])
+            doc_path = os.path.join(workdir, filename)
+            with self.client.request('GET', f"{task_path}/input") as response, open(doc_path, 'wb') as f:
+                shutil.copyfileobj(response, f)
+
+            processor.timings = []
+            processor.not_applicable = []
+            errors, usable = processor.process_document(doc_path, task['macro_names'], task.get('user'))
+            if not usable:
+                # Word on this slot is unusable; restart it for the next task
+                processor._shutdown_word()
+            if self._lost(task['task_id']):
+                return
+
+            stem = os.path.splitext(filename)[0]
+            for fn in sorted(os.listdir(workdir)):
+                if is_output_of(fn, stem):
+                    with open(os.path.join(workdir, fn), 'rb') as f:
+                        data = f.read()
+                    self.client.request('PUT', f"{task_path}/files/{urllib.parse.quote(fn)}", data=data,
+                                        content_type='application/octet-stream').close()
+
+            self.client.json('POST', f"{task_path}/complete", {
+                'errors': errors,
+                'timings': processor.timings,
+                'not_applicable': processor.not_applicable,
+            })
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def run(self):
+        self._reregister()
+        threads = [threading.Thread(target=self._heartbeat_loop, name="heartbeat", daemon=True)]
+        threads += [threading.Thread(target=self._slot_loop, name=f"slot-{n}", daemon=True)
+                    for n in range(self.capacity)]
+        for thread in threads:
+            thread.start()
+        try:
+            while any(thread.is_alive() for thread in threads[1:]):
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("Stopping; documents in progress are requeued by the hub")
+            self._stop.set()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="S4C remote Word worker agent")
+    parser.add_argument('--hub', required=True, help="Hub base URL, e.g. http://s4c-host:5001")
+    parser.add_argument('--capacity', type=int, default=1, help="Documents processed at once (Word instances)")
+    parser.add_argument('--name', default=socket.gethostname())
+    parser.add_argument('--token', default=WORKER_AGENT_TOKEN, help="Shared worker token (default: S4C_WORKER_TOKEN)")
+    args = parser.parse_args(argv)
+    if not args.token:
+        parser.error("a worker token is required (--token or S4C_WORKER_TOKEN)")
+
+    WorkerAgent(HubClient(args.hub, args.token), args.name, max(1, args.capacity)).run()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
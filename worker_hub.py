@@ -0,0 +1,231 @@
+import os
+import time
+import uuid
+import itertools
+import threading
+from collections import deque
+from config import WORKER_LEASE_SECONDS, WORKER_DEAD_SECONDS, WORKER_MAX_ATTEMPTS, WORKER_RECLAIM_SECONDS
+from utils import log_errors, log_activity
+
+
+class RemoteWorker:
+    def __init__(self, worker_id, name, capacity):
+        self.id = worker_id
+        self.name = name
+        self.capacity = capacity
+        self.registered_at = time.monotonic()
+        self.last_seen = self.registered_at
+        self.leases = set()
+        self.completed = 0
+
+
+class RemoteTask:
+    def __init__(self, task_id, path, macro_names, route_type, user=None):
+        self.id = task_id
+        self.path = path
+        self.macro_names = macro_names
+        self.route_type = route_type
+        self.user = user
+        self.state = 'queued'  # queued | leased | done | failed
+        self.queued_at = time.monotonic()
+        self.worker_id = None
+        self.lease_expires = None
+        self.attempts = 0
+        self.errors = []
+        self.timings = []
+        self.not_applicable = []
+
+
+class WorkerHub:
+    """
+    Hands documents to remote worker agents. Agents register with their
+    capacity, lease one document at a time per free slot, keep their leases
+    alive with heartbeats and post the results back. A worker that stops
+    heartbeating is dropped and its leased documents are queued again for
+    another worker; run() falls back to the caller once no worker is left.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._ids = itertools.count(1)
+        self._workers = {}
+        self._tasks = {}
+        self._queue = deque()
+
+    # --- worker side -------------------------------------------------------
+
+    def register(self, name, capacity):
+        worker = RemoteWorker(uuid.uuid4().hex, name, max(1, int(capacity)))
+        with self._cond:
+            self._workers[worker.id] = worker
+            self._cond.notify_all()
+        log_activity('system', 'WORKER_REGISTERED', details=f"{name} ({worker.capacity} slots)")
+        return worker.id
+
+    def heartbeat(self, worker_id, task_ids):
+        """
+        Renew the worker's leases. Returns the ids it should drop because they
+        were reassigned or abandoned, or None when the worker is unknown and
+        has to register again.
+        """
+        now = time.monotonic()
+        with self._cond:
+            self._reap(now)
+            worker = self._workers.get(worker_id)
+            if worker is None:
+                return None
+            worker.last_seen = now
+            for task_id in worker.leases:
+                self._tasks[task_id].lease_expires = now + WORKER_LEASE_SECONDS
+            return [task_id for task_id in task_ids if task_id not in worker.leases]
+
+    def lease(self, worker_id):
+        """Next queued document for the worker, or None when it is full or nothing is queued."""
+        now = time.monotonic()
+        with self._cond:
+            self._reap(now)
+            worker = self._workers.get(worker_id)
+            if worker is None:
+                return None
+            worker.last_seen = now
+            if len(worker.leases) >= worker.capacity or not self._queue:
+                return None
+            task = self._tasks[self._queue.popleft()]
+            task.state = 'leased'
+            task.worker_id = worker_id
+            task.lease_expires = now + WORKER_LEASE_SECONDS
+            task.attempts += 1
+            worker.leases.add(task.id)
+            return task
+
+    def leased_task(self, worker_id, task_id):
+        """The task if it is currently leased to this worker, else None."""
+        with self._cond:
+            task = self._tasks.get(task_id)
+            if task is None or task.state != 'leased' or task.worker_id != worker_id:
+                return None
+            return task
+
+    def complete(self, worker_id, task_id, errors, timings, not_applicable):
+        with self._cond:
+            task = self._tasks.get(task_id)
+            if task is None or task.state != 'leased' or task.worker_id != worker_id:
+                return False
+            task.errors = list(errors)
+            task.timings = [tuple(t) for t in timings]
+            task.not_applicable = [tuple(n) for n in not_applicable]
+            task.state = 'done'
+            self._release(task)
+            self._workers[worker_id].completed += 1
+            self._cond.notify_all()
+            return True
+
+    def fail(self, worker_id, task_id, error):
+        """A worker gave up on a document: queue it for another worker, or fail it once attempts run out."""
+        with self._cond:
+            task = self._tasks.get(task_id)
+            if task is None or task.state != 'leased' or task.worker_id != worker_id:
+                return False
+            self._release(task)
+            self._retry(task, f"Worker {self._workers[worker_id].name} failed: {error}")
+            self._cond.notify_all()
+            return True
+
+    # --- hub side ----------------------------------------------------------
+
+    def capacity(self):
+        """Slots offered by the live workers."""
+        with self._cond:
+            self._reap(time.monotonic())
+            return sum(worker.capacity for worker in self._workers.values())
+
+    def run(self, path, macro_names, route_type, stop=None, user=None, reclaim=None):
+        """
+        Queue one document for the remote workers and wait for it. Returns
+        (errors, timings, not_applicable), or None when the document was not
+        run remotely because no worker is left or stop() became true while
+        it was still queued; the caller then handles it. Once the document
+        has waited WORKER_RECLAIM_SECONDS without a lease, reclaim() is
+        asked as well and can take it back the same way.
+        """
+        task = RemoteTask(f"{next(self._ids)}-{uuid.uuid4().hex[:8]}", os.path.abspath(path), macro_names, route_type,
+                          user)
+        with self._cond:
+            if not self._workers:
+                return None
+            self._tasks[task.id] = task
+            self._queue.append(task.id)
+            self._cond.notify_all()
+            try:
+                while task.state not in ('done', 'failed'):
+                    self._cond.wait(timeout=1.0)
+                    self._reap(time.monotonic())
+                    if task.state != 'queued':
+                        continue
+                    waited = time.monotonic() - task.queued_at
+                    if not self._workers or (stop is not None and stop()) or \
+                            (reclaim is not None and waited >= WORKER_RECLAIM_SECONDS and reclaim()):
+                        self._queue.remove(task.id)
+                        return None
+            finally:
+                self._tasks.pop(task.id, None)
+        return task.errors, task.timings, task.not_applicable
+
+    def snapshot(self):
+        now = time.monotonic()
+        with self._cond:
+            self._reap(now)
+            return {
+                'queued': len(self._queue),
+                'workers': [{
+                    'name': worker.name,
+                    'capacity': worker.capacity,
+                    'busy': len(worker.leases),
+                    'completed': worker.completed,
+                    'last_seen': now - worker.last_seen,
+                    'documents': [os.path.basename(self._tasks[t].path) for t in worker.leases],
+                } for worker in self._workers.values()],
+            }
+
+    # --- internals (caller holds the lock) ---------------------------------
+
+    def _release(self, task):
+        worker = self._workers.get(task.worker_id)
+        if worker is not None:
+            worker.leases.discard(task.id)
+        task.worker_id = None
+        task.lease_expires = None
+
+    def _retry(self, task, reason):
+        if task.attempts >= WORKER_MAX_ATTEMPTS:
+            task.state = 'failed'
+            task.errors = [f"{reason}; gave up after {task.attempts} attempt(s)"]
+        else:
+            task.state = 'queued'
+            task.queued_at = time.monotonic()
+            self._queue.appendleft(task.id)
+
+    def _reap(self, now):
+        """Drop workers that missed their heartbeats and requeue expired leases."""
+        changed = False
+        for worker in list(self._workers.values()):
+            if now - worker.last_seen > WORKER_DEAD_SECONDS:
+                del self._workers[worker.id]
+                log_errors([f"Remote worker {worker.name} stopped responding; "
+                            f"requeueing {len(worker.leases)} document(s)"])
+                for task_id in list(worker.leases):
+                    task = self._tasks[task_id]
+                    self._release(task)
+                    self._retry(task, f"Worker {worker.name} stopped responding")
+                changed = True
+        for task in self._tasks.values():
+            if task.state == 'leased' and task.lease_expires < now:
+                worker = self._workers.get(task.worker_id)
+                self._release(task)
+                self._retry(task, f"Lease expired on worker {worker.name if worker else '?'}")
+                changed = True
+        if changed:
+            self._cond.notify_all()
+
+
+worker_hub = WorkerHub()